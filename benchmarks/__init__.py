@@ -0,0 +1,11 @@
+""" Benchmarks of console_alarm.
+
+Every bench_*.py module in this package has bench_* functions that take no
+arguments and return a dict of measurements. Run them all with
+
+	python -m benchmarks [--output results.json] [--only NAME]
+
+and compare two runs with
+
+	python -m benchmarks --compare old.json new.json
+"""
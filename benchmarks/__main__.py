@@ -0,0 +1,91 @@
+""" Runs the benchmarks and writes their results as JSON. """
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+
+# The benchmarks need no sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# The directory of the benchmarks and the repository root.
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent))
+
+
+def collect(only: str = "", /) -> dict:
+	""" Returns every bench_* function of the bench_*.py modules by its name. """
+
+	benchmarks = {}
+	for path in sorted(BENCHMARKS_DIR.glob("bench_*.py")):
+		module = importlib.import_module("benchmarks." + path.stem)
+		for name in sorted(dir(module)):
+			if name.startswith("bench_") and callable(getattr(module, name)) and only in name:
+				benchmarks[name] = getattr(module, name)
+	return benchmarks
+
+
+def run(only: str = "", /) -> dict:
+	""" Runs the benchmarks and returns the results with some facts about the host. """
+
+	results = {}
+	for name, benchmark in collect(only).items():
+		print("Running {} ...".format(name), file=sys.stderr)
+		results[name] = benchmark()
+
+	return {
+		'meta': {
+			'date': datetime.datetime.now().isoformat(timespec='seconds'),
+			'python': platform.python_version(),
+			'platform': platform.platform(),
+			'cpu_count': os.cpu_count(),
+		},
+		'results': results,
+	}
+
+
+def compare(old_path: str, new_path: str, /):
+	""" Prints every measurement of two result files side by side. """
+
+	old = json.loads(Path(old_path).read_text())['results']
+	new = json.loads(Path(new_path).read_text())['results']
+
+	print("{:<50} {:>14} {:>14} {:>8}".format("measurement", "old", "new", "new/old"))
+	for benchmark in sorted(set(old) | set(new)):
+		old_values = old.get(benchmark, {})
+		new_values = new.get(benchmark, {})
+		for key in sorted(set(old_values) | set(new_values)):
+			old_value = old_values.get(key)
+			new_value = new_values.get(key)
+			ratio = new_value / old_value if old_value and new_value is not None else float('nan')
+			print("{:<50} {:>14.6g} {:>14.6g} {:>8.3f}".format(
+				benchmark + "." + key,
+				float('nan') if old_value is None else old_value,
+				float('nan') if new_value is None else new_value,
+				ratio))
+
+
+def main():
+	parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Runs the console_alarm benchmarks.")
+	parser.add_argument("--output", "-o", help="write the JSON results to this file instead of stdout")
+	parser.add_argument("--only", default="", help="only run benchmarks whose name contains this text")
+	parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+	args = parser.parse_args()
+
+	if args.compare:
+		compare(*args.compare)
+		return
+
+	text = json.dumps(run(args.only), indent=2, sort_keys=True)
+	if args.output:
+		Path(args.output).write_text(text + "\n")
+	else:
+		print(text)
+
+
+if __name__ == "__main__":
+	main()
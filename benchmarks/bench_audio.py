@@ -0,0 +1,45 @@
+""" Benchmark of the time it takes until the alarm sound plays.
+
+Run with: python benchmarks/bench_audio.py
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm import audio
+from console_alarm import synthesis
+
+
+def bench_ring_setup(repeat: int = 5, /) -> dict:
+	""" Times starting an engine from scratch and starting a ring on a running one. """
+
+	cold = []
+	for _ in range(repeat):
+		synthesis.clear_note_cache()
+		engine = audio.AudioEngine()
+		start = time.perf_counter()
+		engine.start_ring(1).stop()
+		cold.append(time.perf_counter() - start)
+		engine.shutdown()
+
+	warm = []
+	with audio.AudioEngine() as engine:
+		engine.start()
+		for _ in range(repeat * 20):
+			start = time.perf_counter()
+			engine.start_ring(1).stop()
+			warm.append(time.perf_counter() - start)
+
+	return {
+		'cold_start_s': min(cold),
+		'warm_start_s': min(warm),
+	}
+
+
+if __name__ == "__main__":
+	for name, value in bench_ring_setup().items():
+		print("{:<20} {:.6g}".format(name, value))
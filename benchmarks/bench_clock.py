@@ -0,0 +1,56 @@
+""" Benchmark of the alarm time calculations.
+
+Run with: python benchmarks/bench_clock.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm import console_alarm
+
+
+def bench_calc_secs_to_time(count: int = 100000, /) -> dict:
+	""" Measures how many _calc_secs_to_time calls run per second. """
+
+	now = time.localtime()
+
+	start = time.perf_counter()
+	for index in range(count):
+		console_alarm._calc_secs_to_time(index % 24, index % 60, index % 60)
+	reading_clock = time.perf_counter() - start
+
+	start = time.perf_counter()
+	for index in range(count):
+		console_alarm._calc_secs_to_time(index % 24, index % 60, index % 60, now=now)
+	fixed_time = time.perf_counter() - start
+
+	return {
+		'calls_per_s': count / reading_clock,
+		'calls_per_s_fixed_now': count / fixed_time,
+	}
+
+
+def bench_calc_secs_to_times(count: int = 100000, /) -> dict:
+	""" Measures how many alarm times calc_secs_to_times converts per second. """
+
+	import numpy
+
+	index = numpy.arange(count)
+	hours, minutes, seconds = index % 24, index % 60, index % 60
+
+	start = time.perf_counter()
+	console_alarm.calc_secs_to_times(hours, minutes, seconds)
+	elapsed = time.perf_counter() - start
+
+	return {
+		'alarms': count,
+		'alarms_per_s': count / elapsed,
+	}
+
+
+if __name__ == "__main__":
+	for benchmark in (bench_calc_secs_to_time, bench_calc_secs_to_times):
+		for name, value in benchmark().items():
+			print("{:<25} {:.6g}".format(name, value))
@@ -0,0 +1,82 @@
+""" Benchmark of how fast a key or a signal stops the ringing alarm.
+
+Run with: python benchmarks/bench_controls.py
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm.controls import RingControls
+
+
+def _summary(latencies: list, /) -> dict:
+	""" Returns percentiles of [latencies] in milliseconds. """
+
+	latencies = sorted(latencies)
+	return {
+		'p50_ms': latencies[len(latencies) // 2] * 1000,
+		'p99_ms': latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1000,
+		'max_ms': latencies[-1] * 1000,
+	}
+
+
+def bench_key_stop_latency(count: int = 200, /) -> dict:
+	""" Measures the time from a key press until the alarm is told to stop. """
+
+	read_fd, write_fd = os.pipe()
+	latencies = []
+	with os.fdopen(read_fd, 'rb', buffering=0) as input_file:
+		controls = RingControls(input_file, signals=False)
+		for _ in range(count):
+			stopped = threading.Event()
+			controls.start(stopped.set)
+			pressed = time.monotonic()
+			os.write(write_fd, b'q')
+			stopped.wait()
+			latencies.append(time.monotonic() - pressed)
+			controls.close()
+	os.close(write_fd)
+	return _summary(latencies)
+
+
+def bench_signal_stop_latency(count: int = 200, /) -> dict:
+	""" Measures the time from SIGUSR1 until the alarm is told to stop. """
+
+	controls = RingControls(signals=True)
+	controls.input_file = None
+	latencies = []
+	for _ in range(count):
+		stopped = threading.Event()
+		controls.start(stopped.set)
+		sent = time.monotonic()
+		os.kill(os.getpid(), signal.SIGUSR1)
+		stopped.wait()
+		latencies.append(time.monotonic() - sent)
+		controls.close()
+	return _summary(latencies)
+
+
+def bench_idle_cpu(seconds: float = 1.0, /) -> dict:
+	""" Measures the CPU the controls use while nothing happens. """
+
+	read_fd, write_fd = os.pipe()
+	with os.fdopen(read_fd, 'rb', buffering=0) as input_file:
+		controls = RingControls(input_file, signals=False)
+		controls.start(lambda: None)
+		cpu_time = time.process_time()
+		time.sleep(seconds)
+		cpu_time = time.process_time() - cpu_time
+		controls.close()
+	os.close(write_fd)
+	return {'idle_cpu_ratio': cpu_time / seconds}
+
+
+if __name__ == "__main__":
+	for benchmark in (bench_key_stop_latency, bench_signal_stop_latency, bench_idle_cpu):
+		for name, value in benchmark().items():
+			print("{:<25} {:.6g}".format(name, value))
@@ -0,0 +1,80 @@
+""" Micro-benchmark of the countdown renderers.
+
+Compares the cost and the output size of one countdown update with the
+line per update that _print_time_until_alarm printed before.
+
+Run with: python benchmarks/bench_countdown.py
+"""
+
+import io
+import sys
+import timeit
+from math import floor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm.countdown import JsonCountdown, TerminalCountdown
+
+# One hour of ticks, one per second.
+TICKS = 3600
+
+
+class _Terminal(io.StringIO):
+	""" A stream that claims to be a terminal. """
+
+	def isatty(self) -> bool:
+		return True
+
+
+def _legacy_line(seconds: int) -> str:
+	""" The line _print_time_until_alarm printed before. """
+
+	needed_hour = floor(seconds / 3600)
+	needed_min = floor((seconds - (needed_hour * 3600)) / 60)
+	needed_sec = floor(seconds - needed_min * 60 - needed_hour * 3600)
+	return "Alarm starts in {} hour(s), {} minute(s), and {} second(s)\n".format(needed_hour, needed_min, needed_sec)
+
+
+def _best_of(function, number: int, repeat: int = 5) -> float:
+	""" Returns the best time of one call in seconds. """
+
+	return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def bench_countdown() -> dict:
+	""" Times an hour of ticks and counts the bytes written per tick. """
+
+	def legacy() -> io.StringIO:
+		stream = io.StringIO()
+		for remaining_seconds in range(TICKS, 0, -1):
+			stream.write(_legacy_line(remaining_seconds))
+		return stream
+
+	def terminal() -> io.StringIO:
+		stream = _Terminal()
+		countdown = TerminalCountdown(stream)
+		for remaining_seconds in range(TICKS, 0, -1):
+			countdown.tick(remaining_seconds)
+		return stream
+
+	def json_lines() -> io.StringIO:
+		stream = io.StringIO()
+		countdown = JsonCountdown(stream)
+		for remaining_seconds in range(TICKS, 0, -1):
+			countdown.tick(remaining_seconds)
+		return stream
+
+	return {
+		'legacy_tick_s': _best_of(legacy, 3) / TICKS,
+		'terminal_tick_s': _best_of(terminal, 3) / TICKS,
+		'json_tick_s': _best_of(json_lines, 3) / TICKS,
+		'legacy_bytes_per_tick': len(legacy().getvalue()) / TICKS,
+		'terminal_bytes_per_tick': len(terminal().getvalue()) / TICKS,
+		'json_bytes_per_tick': len(json_lines().getvalue()) / TICKS,
+	}
+
+
+if __name__ == "__main__":
+	for benchmark in (bench_countdown,):
+		for name, value in benchmark().items():
+			print("{:<25} {:.6g}".format(name, value))
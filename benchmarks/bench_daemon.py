@@ -0,0 +1,78 @@
+""" Benchmark of the daemon: round trip latency and memory per alarm.
+
+Run with: python benchmarks/bench_daemon.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm.daemon import AlarmDaemon, DaemonClient
+from console_alarm.scheduler import AlarmScheduler
+
+
+def bench_daemon_round_trip(count: int = 2000, /) -> dict:
+	""" Sends [count] commands one by one and in one batch and measures the round trips. """
+
+	with tempfile.TemporaryDirectory() as directory:
+		daemon = AlarmDaemon(os.path.join(directory, "alarm.sock"), AlarmScheduler(lambda handle: None))
+		thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+		thread.start()
+
+		try:
+			with DaemonClient(daemon.socket_path) as client:
+				round_trips = []
+				for _ in range(count):
+					start = time.perf_counter()
+					client.request({'cmd': 'ping'})
+					round_trips.append(time.perf_counter() - start)
+
+				start = time.perf_counter()
+				for _ in range(count):
+					client.add(3600)
+				add_time = time.perf_counter() - start
+
+				start = time.perf_counter()
+				client.batch([{'cmd': 'add', 'in': 3600}] * count)
+				batch_time = time.perf_counter() - start
+		finally:
+			daemon.shutdown()
+			thread.join()
+			daemon.close()
+
+	round_trips.sort()
+	return {
+		'commands': count,
+		'ping_p50_s': round_trips[count // 2],
+		'ping_p99_s': round_trips[count * 99 // 100],
+		'add_s_per_alarm': add_time / count,
+		'batched_add_s_per_alarm': batch_time / count,
+	}
+
+
+def bench_daemon_memory_per_alarm(count: int = 10000, /) -> dict:
+	""" Measures how many bytes every further alarm costs inside the daemon. """
+
+	with tempfile.TemporaryDirectory() as directory:
+		with AlarmDaemon(os.path.join(directory, "alarm.sock"), AlarmScheduler(lambda handle: None)) as daemon:
+			tracemalloc.start()
+			before = tracemalloc.get_traced_memory()[0]
+			daemon.handle_request([{'cmd': 'add', 'in': 3600}] * count)
+			after = tracemalloc.get_traced_memory()[0]
+			tracemalloc.stop()
+
+	return {
+		'alarms': count,
+		'bytes_per_alarm': (after - before) / count,
+	}
+
+
+if __name__ == "__main__":
+	for benchmark in (bench_daemon_round_trip, bench_daemon_memory_per_alarm):
+		for name, value in benchmark().items():
+			print("{:<25} {:.6g}".format(name, value))
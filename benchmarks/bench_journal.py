@@ -0,0 +1,63 @@
+""" Benchmark of the timer journal: writing, recovery and file size.
+
+Run with: python benchmarks/bench_journal.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm.journal import TimerJournal
+
+
+def bench_journal(count: int = 100000, /) -> dict:
+	""" Writes [count] timers, cancels half of them and measures recovery and compaction. """
+
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "timers.journal")
+		now = time.time()
+
+		with TimerJournal(path) as journal:
+			start = time.perf_counter()
+			for timer_id in range(1, count + 1):
+				journal.add(timer_id, now + timer_id)
+			write_time = time.perf_counter() - start
+
+			for timer_id in range(1, count + 1, 2):
+				journal.cancel(timer_id)
+			size = os.path.getsize(path)
+
+		start = time.perf_counter()
+		with TimerJournal(path) as journal:
+			upcoming, missed = journal.recover(now)
+		recovery_time = time.perf_counter() - start
+
+		with TimerJournal(path) as journal:
+			start = time.perf_counter()
+			journal.compact()
+			compaction_time = time.perf_counter() - start
+		compacted_size = os.path.getsize(path)
+
+		start = time.perf_counter()
+		with TimerJournal(path) as journal:
+			journal.recover(now)
+		compacted_recovery_time = time.perf_counter() - start
+
+	return {
+		'timers': count,
+		'recovered_timers': len(upcoming) + len(missed),
+		'write_s_per_timer': write_time / count,
+		'journal_bytes': size,
+		'recovery_s': recovery_time,
+		'compaction_s': compaction_time,
+		'compacted_bytes': compacted_size,
+		'compacted_recovery_s': compacted_recovery_time,
+	}
+
+
+if __name__ == "__main__":
+	for name, value in bench_journal().items():
+		print("{:<25} {:.6g}".format(name, value))
@@ -0,0 +1,50 @@
+""" Micro-benchmark of the software mixer.
+
+Times one block with more and more alarms ringing at once, all playing
+the alarm pattern and all with their own buffer, and how much of the
+time of a block the mixing takes.
+
+Run with: python benchmarks/bench_mixer.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm import audio, synthesis
+from console_alarm.mixer import BLOCK_FRAMES, SoftwareMixer
+
+# How many alarms ring at once.
+VOICE_COUNTS = (1, 8, 32, 64)
+
+
+def _best_of(function, number: int, repeat: int = 5) -> float:
+	""" Returns the best time of one call in seconds. """
+
+	return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def bench_mix_block() -> dict:
+	""" Times one block for every number of voices, with a shared and with own buffers. """
+
+	pattern = synthesis.render_ring_pattern(audio.NOTE_C4, audio.NOTE_G4)
+	results = {}
+	for count in VOICE_COUNTS:
+		shared = SoftwareMixer()
+		separate = SoftwareMixer()
+		for index in range(count):
+			shared.add(pattern, volume=0.5)
+			separate.add(pattern.copy(), volume=0.5)
+		results['shared_{}_voices_s'.format(count)] = _best_of(shared.mix, 200)
+		results['separate_{}_voices_s'.format(count)] = _best_of(separate.mix, 200)
+
+	block_seconds = BLOCK_FRAMES / synthesis.SAMPLE_RATE
+	results['block_s'] = block_seconds
+	results['shared_64_load_ratio'] = results['shared_64_voices_s'] / block_seconds
+	return results
+
+
+if __name__ == "__main__":
+	for name, value in bench_mix_block().items():
+		print("{:<25} {:.6g}".format(name, value))
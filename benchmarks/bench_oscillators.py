@@ -0,0 +1,46 @@
+""" Micro-benchmark of the oscillators.
+
+Times one second of a note in every waveform at every sample rate the
+oscillators are tuned for, and the memory that note takes.
+
+Run with: python benchmarks/bench_oscillators.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm import oscillators, synthesis
+
+# The note to render: A-4.
+FREQUENCY = 440.0
+
+
+def _best_of(function, number: int, repeat: int = 5) -> float:
+	""" Returns the best time of one call in seconds. """
+
+	return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def bench_oscillators() -> dict:
+	""" Times the uncached rendering of one second in every waveform and sample rate. """
+
+	results = {}
+	for waveform in synthesis.WAVEFORMS:
+		for sample_rate in oscillators.SAMPLE_RATES:
+			def render():
+				synthesis.clear_note_cache()
+				synthesis.render_note(FREQUENCY, sample_rate, waveform)
+
+			results['{}_{}_s'.format(waveform, sample_rate)] = _best_of(render, 20)
+
+	for sample_rate in oscillators.SAMPLE_RATES:
+		results['bytes_per_note_{}'.format(sample_rate)] = synthesis.render_note(FREQUENCY, sample_rate).nbytes
+	return results
+
+
+if __name__ == "__main__":
+	for benchmark in (bench_oscillators,):
+		for name, value in benchmark().items():
+			print("{:<25} {:.6g}".format(name, value))
@@ -0,0 +1,54 @@
+""" Benchmark of the recurring schedules: compiling and finding the next fire time.
+
+Run with: python benchmarks/bench_recurring.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm.recurring import RecurringSchedule
+
+
+def _expressions(count: int, /) -> list:
+	""" Returns [count] random schedule expressions of the common kinds. """
+
+	rng = random.Random(42)
+	kinds = (
+		lambda: "{} {} * * *".format(rng.randrange(60), rng.randrange(24)),
+		lambda: "{} {} * * 1-5".format(rng.randrange(60), rng.randrange(24)),
+		lambda: "*/{} {}-{} * * mon-fri".format(rng.randint(5, 30), rng.randint(6, 9), rng.randint(16, 20)),
+		lambda: "0 {} {} * *".format(rng.randrange(24), rng.randint(1, 28)),
+		lambda: "30 {} 1 {} *".format(rng.randrange(24), rng.randint(1, 12)),
+	)
+	return [rng.choice(kinds)() for _ in range(count)]
+
+
+def bench_recurring_next_fire(count: int = 100000, /) -> dict:
+	""" Compiles [count] schedules and finds the next fire time of each. """
+
+	expressions = _expressions(count)
+	now = time.localtime(time.mktime((2024, 3, 12, 14, 9, 30, 0, 0, -1)))
+
+	start = time.perf_counter()
+	schedules = [RecurringSchedule(expression) for expression in expressions]
+	compile_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	for schedule in schedules:
+		schedule.secs_until(now)
+	next_fire_time = time.perf_counter() - start
+
+	return {
+		'schedules': count,
+		'compile_s_per_schedule': compile_time / count,
+		'next_fire_s_per_schedule': next_fire_time / count,
+		'next_fire_total_s': next_fire_time,
+	}
+
+
+if __name__ == "__main__":
+	for name, value in bench_recurring_next_fire().items():
+		print("{:<25} {:.6g}".format(name, value))
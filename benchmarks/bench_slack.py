@@ -0,0 +1,55 @@
+""" Benchmark of how many wakeups timer slack saves.
+
+Schedules a dense synthetic schedule, timers at random times within a
+few seconds, once without slack and once with every slack of SLACKS,
+and counts how often the scheduler thread woke up to fire them.
+
+Run with: python benchmarks/bench_slack.py
+"""
+
+import random
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm.scheduler import AlarmScheduler
+from console_alarm.stats import FireStats
+
+# The slack of every timer in seconds, 0 is the scheduler without coalescing.
+SLACKS = (0.0, 0.005, 0.02, 0.05)
+
+
+def _run_schedule(count: int, spread: float, slack: float, /) -> AlarmScheduler:
+	""" Fires [count] timers spread over [spread] seconds and returns the finished scheduler. """
+
+	offsets = random.Random(4).sample(range(count * 10), count)
+	fired = []
+	done = threading.Event()
+
+	def on_fire(handle):
+		fired.append(handle)
+		if len(fired) == count:
+			done.set()
+
+	with AlarmScheduler(on_fire, stats=FireStats()) as scheduler:
+		for offset in offsets:
+			scheduler.schedule(0.05 + spread * offset / (count * 10), slack=slack)
+		done.wait(spread + slack + 5)
+	return scheduler
+
+
+def bench_wakeups(count: int = 1000, spread: float = 2.0, /) -> dict:
+	""" Counts the wakeups of [count] timers within [spread] seconds for every slack. """
+
+	results = {}
+	for slack in SLACKS:
+		scheduler = _run_schedule(count, spread, slack)
+		results['wakeups_slack_{}ms'.format(round(slack * 1000))] = scheduler.wakeups
+		results['saved_slack_{}ms'.format(round(slack * 1000))] = scheduler.wakeups_saved
+	return results
+
+
+if __name__ == "__main__":
+	for name, value in bench_wakeups().items():
+		print("{:<25} {:.6g}".format(name, value))
@@ -0,0 +1,55 @@
+""" Benchmark of the sound cache: building it and mapping sounds from it.
+
+Run with: python benchmarks/bench_sound_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm import sound_cache
+from console_alarm import synthesis
+
+
+def bench_sound_cache(count: int = 100, /) -> dict:
+	""" Builds the bank with one and with all CPUs and compares mapping with rendering [count] notes. """
+
+	with tempfile.TemporaryDirectory() as directory:
+		root = os.path.join(directory, "console_alarm")
+
+		start = time.perf_counter()
+		sounds = sound_cache.build(root=root, workers=1)
+		serial_build_time = time.perf_counter() - start
+
+		start = time.perf_counter()
+		sound_cache.build(root=root)
+		parallel_build_time = time.perf_counter() - start
+
+		frequencies = [sound_cache.BANK_FREQUENCIES[index % len(sound_cache.BANK_FREQUENCIES)] for index in range(count)]
+
+		start = time.perf_counter()
+		for frequency in frequencies:
+			sound_cache.load_note(frequency, synthesis.SAMPLE_RATE, root=root)
+		map_time = time.perf_counter() - start
+
+		start = time.perf_counter()
+		for frequency in frequencies:
+			synthesis.clear_note_cache()
+			synthesis.render_note(frequency)
+		render_time = time.perf_counter() - start
+
+	return {
+		'sounds': sounds,
+		'serial_build_s': serial_build_time,
+		'parallel_build_s': parallel_build_time,
+		'map_s_per_note': map_time / count,
+		'render_s_per_note': render_time / count,
+	}
+
+
+if __name__ == "__main__":
+	for name, value in bench_sound_cache().items():
+		print("{:<25} {:.6g}".format(name, value))
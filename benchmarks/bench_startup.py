@@ -0,0 +1,80 @@
+""" Benchmark of the import time and the memory of a waiting alarm.
+
+Starts fresh interpreters that import console_alarm, with and without the
+audio stack, and reports their start-up time and resident memory.
+
+Run with: python benchmarks/bench_startup.py
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# The repository root, so the interpreters import the local package.
+ROOT = str(Path(__file__).resolve().parent.parent)
+
+# Prints the resident memory of the interpreter in kB.
+_PRINT_RSS = (
+	"import resource, sys\n"
+	"try:\n"
+	"	rss = [int(line.split()[1]) for line in open('/proc/self/status') if line.startswith('VmRSS:')][0]\n"
+	"except OSError:\n"
+	"	rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+	"print(rss)\n"
+)
+
+# What the interpreters run before they print their memory.
+SCENARIOS = {
+	'bare_interpreter': "",
+	'import_console_alarm': "import console_alarm.console_alarm\n",
+	'import_with_audio': "import console_alarm.audio as a\na._import_audio()\n",
+}
+
+# What `console_alarm` without valid arguments runs: it prints the help.
+_CLI_CODE = (
+	"import io, sys\n"
+	"from console_alarm import console_alarm\n"
+	"sys.stdout = io.StringIO()\n"
+	"console_alarm.console_script_entry_point(['console_alarm', 'help'])\n"
+	"sys.stdout = sys.__stdout__\n"
+)
+
+
+def _run(code: str, /) -> tuple:
+	""" Runs [code] in a fresh interpreter, returns its wall time and rss in kB. """
+
+	start = time.perf_counter()
+	output = subprocess.run([sys.executable, "-c", code + _PRINT_RSS], cwd=ROOT, check=True,
+		capture_output=True, text=True).stdout
+	return time.perf_counter() - start, int(output.split()[-1])
+
+
+def bench_startup(repeat: int = 5, /) -> dict:
+	""" Measures the best start-up time and the memory of every scenario. """
+
+	results = {}
+	for name, code in SCENARIOS.items():
+		runs = [_run(code) for _ in range(repeat)]
+		results[name + '_s'] = min(run[0] for run in runs)
+		results[name + '_rss_kb'] = min(run[1] for run in runs)
+
+	# What the console_alarm import adds to a bare interpreter.
+	results['import_overhead_s'] = results['import_console_alarm_s'] - results['bare_interpreter_s']
+	results['import_overhead_rss_kb'] = results['import_console_alarm_rss_kb'] - results['bare_interpreter_rss_kb']
+	return results
+
+
+def bench_cli_cold_start(repeat: int = 5, /) -> dict:
+	""" Measures the cold start of the console script entry point. """
+
+	times = sorted(_run(_CLI_CODE)[0] for _ in range(repeat))
+	return {
+		'best_s': times[0],
+		'median_s': times[len(times) // 2],
+	}
+
+
+if __name__ == "__main__":
+	for name, value in {**bench_startup(), **bench_cli_cold_start()}.items():
+		print("{:<30} {:.6g}".format(name, value))
@@ -0,0 +1,92 @@
+""" Micro-benchmark of the note synthesis.
+
+Compares the vectorized, cached synthesis with the list comprehension that
+_get_note used before.
+
+Run with: python benchmarks/bench_synthesis.py
+"""
+
+import sys
+import timeit
+import numpy
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm import synthesis
+
+# The notes ring() plays: C-4 and G-4.
+FREQUENCIES = (261.626, 391.995)
+
+
+def _legacy_note(frequency: float) -> numpy.ndarray:
+	""" The per-sample implementation _get_note had before. """
+
+	frames = 44100/frequency
+	return numpy.array([16384 * (x % frames) / frames - 8192 for x in range(0, 44100)]).astype(numpy.int16)
+
+
+def _best_of(function, number: int, repeat: int = 5) -> float:
+	""" Returns the best time of one call in seconds. """
+
+	return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def bench_synthesis() -> dict:
+	""" Times the legacy, the vectorized and the cached note synthesis. """
+
+	def legacy():
+		for frequency in FREQUENCIES:
+			_legacy_note(frequency)
+
+	def vectorized():
+		synthesis.clear_note_cache()
+		for frequency in FREQUENCIES:
+			synthesis.render_note(frequency)
+
+	def cached():
+		for frequency in FREQUENCIES:
+			synthesis.render_note(frequency)
+
+	legacy_time = _best_of(legacy, 3)
+	vectorized_time = _best_of(vectorized, 50)
+	cached()
+	cached_time = _best_of(cached, 10000)
+
+	return {
+		'legacy_s': legacy_time,
+		'vectorized_s': vectorized_time,
+		'cached_s': cached_time,
+		'vectorized_speedup': legacy_time / vectorized_time,
+		'cached_speedup': legacy_time / cached_time,
+	}
+
+
+def bench_wavetable() -> dict:
+	""" Compares the memory and the render time of full notes and wavetables. """
+
+	def full():
+		synthesis.clear_note_cache()
+		for frequency in FREQUENCIES:
+			synthesis.render_note(frequency)
+
+	def wavetable():
+		synthesis.clear_note_cache()
+		for frequency in FREQUENCIES:
+			synthesis.render_wavetable(frequency)
+
+	full_bytes = sum(synthesis.render_note(frequency).nbytes for frequency in FREQUENCIES) / len(FREQUENCIES)
+	wavetable_bytes = sum(synthesis.render_wavetable(frequency).nbytes for frequency in FREQUENCIES) / len(FREQUENCIES)
+
+	return {
+		'full_bytes_per_note': full_bytes,
+		'wavetable_bytes_per_note': wavetable_bytes,
+		'memory_ratio': full_bytes / wavetable_bytes,
+		'full_render_s': _best_of(full, 50),
+		'wavetable_render_s': _best_of(wavetable, 50),
+	}
+
+
+if __name__ == "__main__":
+	for benchmark in (bench_synthesis, bench_wavetable):
+		for name, value in benchmark().items():
+			print("{:<25} {:.6g}".format(name, value))
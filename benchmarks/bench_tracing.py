@@ -0,0 +1,41 @@
+""" Micro-benchmark of the tracing spans.
+
+Times an empty span without a handler, which is what every alarm pays,
+and with a ChromeTraceExporter registered.
+
+Run with: python benchmarks/bench_tracing.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm import tracing
+
+
+def _best_of(function, number: int, repeat: int = 5) -> float:
+	""" Returns the best time of one call in seconds. """
+
+	return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def _empty_span():
+	""" Enters and leaves one span. """
+
+	with tracing.span('synthesis', frequency=440):
+		pass
+
+
+def bench_span() -> dict:
+	""" Times one span while tracing is off and on. """
+
+	results = {'disabled_span_s': _best_of(_empty_span, 100000)}
+	with tracing.ChromeTraceExporter():
+		results['exported_span_s'] = _best_of(_empty_span, 10000)
+	return results
+
+
+if __name__ == "__main__":
+	for name, value in bench_span().items():
+		print("{:<25} {:.6g}".format(name, value))
@@ -0,0 +1,62 @@
+""" Benchmark of how late short real-time alarms fire.
+
+Run with: python benchmarks/bench_wakeup.py
+"""
+
+import contextlib
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from console_alarm import console_alarm
+from console_alarm.scheduler import AlarmScheduler
+
+
+def _summary(latenesses: list, /) -> dict:
+	""" Returns percentiles of [latenesses] in milliseconds. """
+
+	latenesses = sorted(latenesses)
+	return {
+		'p50_ms': latenesses[len(latenesses) // 2] * 1000,
+		'p99_ms': latenesses[min(len(latenesses) - 1, len(latenesses) * 99 // 100)] * 1000,
+		'max_ms': latenesses[-1] * 1000,
+	}
+
+
+def bench_wait_until_lateness(count: int = 20, delay: float = 0.05, /) -> dict:
+	""" Measures how late _wait_until returns for alarms [delay] seconds ahead. """
+
+	latenesses = []
+	with contextlib.redirect_stdout(io.StringIO()):
+		for _ in range(count):
+			alarm_time = time.time() + delay
+			console_alarm._wait_until(alarm_time)
+			latenesses.append(time.time() - alarm_time)
+	return _summary(latenesses)
+
+
+def bench_scheduler_lateness(count: int = 200, spread: float = 0.5, /) -> dict:
+	""" Measures how late [count] scheduler timers within [spread] seconds fire. """
+
+	latenesses = []
+	done = threading.Event()
+
+	def fired(handle):
+		latenesses.append(time.monotonic() - handle.deadline)
+		if len(latenesses) == count:
+			done.set()
+
+	with AlarmScheduler(fired) as scheduler:
+		for index in range(count):
+			scheduler.schedule(0.05 + spread * index / count)
+		done.wait(spread + 5)
+	return _summary(latenesses)
+
+
+if __name__ == "__main__":
+	for benchmark in (bench_wait_until_lateness, bench_scheduler_lateness):
+		for name, value in benchmark().items():
+			print("{:<35} {:.6g}".format(benchmark.__name__ + "." + name, value))
@@ -0,0 +1,268 @@
+""" Coroutine counterparts of the console_alarm functions.
+
+Summary
+-------
+	The functions in console_alarm block the calling thread while they
+	wait or ring. The coroutines in this module do the same on an asyncio
+	event loop: waiting uses loop timers and the alarm sound is left to
+	the mixer thread, so the loop stays free for other tasks.
+
+Routine Listings
+----------------
+	async_start_pomodoro
+		Starts pomodorolike alarm.
+
+	async_start_alarm_clock
+		Starts an alarm that rings at a specified time.
+
+	async_ring
+		Rings the alarm for a given amount of seconds.
+
+Notes
+-----
+	Cancel the task that awaits one of the coroutines to stop the alarm.
+	A ringing alarm is silenced when its task gets cancelled.
+
+	Every alarm shows its own countdown by default. When many alarms wait
+	at once, pass them a console_alarm.countdown.SilentCountdown.
+"""
+
+import asyncio
+import time
+from typing import Callable, Optional
+from console_alarm import console_alarm
+from console_alarm.countdown import countdown_for
+from console_alarm.stats import FireRecord, fire_stats
+
+
+async def async_start_pomodoro(minutes: int, /, *, countdown=None) -> Optional[float]:
+	""" Starts pomodorolike alarm.
+
+	Parameters
+	----------
+	minutes : int
+		In how many minutes the alarm should start. Minutes has to be
+		between 1 and 1439.
+	countdown : TerminalCountdown, JsonCountdown or SilentCountdown, optional
+		Shows the time until the alarm rings, see async_start_alarm_clock.
+
+	Returns
+	-------
+	Optional[float]
+		How many seconds after the alarm time the alarm started ringing or
+		None if the alarm was missed.
+
+	Raises
+	------
+	ValueError
+		If the [minutes] parameter isn't between 1 and 1439.
+
+	TypeError
+		If the [minutes] parameter is not int.
+
+	See Also
+	--------
+	console_alarm.start_pomodoro
+
+	Example
+	-------
+	await async_start_pomodoro(25)
+	"""
+
+	# Check if parameter is in range.
+	console_alarm._is_in_range(minutes, 1, 1439)
+
+	# Add [minutes] to current time.
+	alarm = time.localtime(time.time()+minutes*60)
+
+	# We set the alarm clock to the calculated time.
+	return await async_start_alarm_clock(alarm.tm_hour, alarm.tm_min, alarm.tm_sec, countdown=countdown)
+
+
+async def async_start_alarm_clock(alarm_hour: int, alarm_min: int, alarm_sec: int = 0, /, *,
+		countdown=None) -> Optional[float]:
+	""" Starts an alarm that rings at a specified time.
+
+	Parameters
+	----------
+	alarm_hour : int
+		The hour value of the alarm time.
+	alarm_min : int
+		The minute value of the alarm time.
+	alarm_sec : int, default = 0
+		The seconds of the alarm time.
+	countdown : TerminalCountdown, JsonCountdown or SilentCountdown, optional
+		Shows the time until the alarm rings and its messages. Defaults
+		to console_alarm.countdown.countdown_for the standard output. Pass
+		a SilentCountdown when many alarms wait at once.
+
+	Returns
+	-------
+	Optional[float]
+		How many seconds after the alarm time the alarm started ringing or
+		None if the alarm was missed.
+
+	Raises
+	------
+	ValueError
+		If the [alarm_hours] parameter isn't between 0 and 23 or
+		[alarm_min] or [alarm_sec] parameters aren't between 0 and 59.
+
+	TypeError
+		If one of the [alarm_hour], [alarm_min] or [alarm_sec] parameters
+		is not int.
+
+	See Also
+	--------
+	console_alarm.start_alarm_clock
+
+	Example
+	-------
+	await async_start_alarm_clock(14, 9)
+	"""
+
+	# Check if parameters are in range.
+	console_alarm._is_in_range(alarm_hour, 0, 23)
+	console_alarm._is_in_range(alarm_min, 0, 59)
+	console_alarm._is_in_range(alarm_sec, 0, 59)
+
+	# Here we calc when the alarm is supposed to ring.
+	alarm_time = console_alarm._calc_alarm_time(alarm_hour, alarm_min, alarm_sec)
+
+	# Sleeping time!
+	countdown = countdown or countdown_for()
+	lateness = await _async_wait_until(alarm_time, countdown)
+
+	# The clock jumped over the alarm time, e.g. while the os was hibernated.
+	if lateness is None:
+		fire_stats.record(FireRecord(alarm_time, None, None))
+		return None
+
+	# Remember when we woke up and when the first audio sample played.
+	loop = asyncio.get_running_loop()
+	woke = loop.time()
+	audio_started = []
+
+	# And time to wake up!!
+	countdown.fired(lateness)
+	try:
+		await async_ring(5, on_start=lambda: audio_started.append(loop.time()), countdown=countdown)
+	finally:
+		fire_stats.record(FireRecord(alarm_time, alarm_time + lateness, lateness,
+			lateness + audio_started[0] - woke if audio_started else None))
+
+	return lateness
+
+
+async def async_ring(seconds: int, /, *, on_start: Optional[Callable[[], None]] = None, countdown=None):
+	""" Rings the alarm for a given amount of [seconds].
+
+	Parameters
+	----------
+	seconds : int
+		How long the alarm is going to ring.
+	on_start : Callable[[], None], optional
+		Called as soon as the sound plays.
+	countdown : TerminalCountdown or JsonCountdown, optional
+		Shows the messages of the alarm, see console_alarm.ring.
+
+	Raises
+	------
+	ValueError
+		If the [seconds] parameter isn't between 1 and 60.
+
+	TypeError
+		If the [seconds] parameter is not int.
+
+	See Also
+	--------
+	console_alarm.ring
+
+	Example
+	-------
+	await async_ring(5)
+	"""
+
+	# Check the parameter here, so the error isn't raised from a thread.
+	console_alarm._is_in_range(seconds, 1, 60)
+
+	# Starting the mixer can take a moment, so it happens in a thread.
+	starting = asyncio.get_running_loop().run_in_executor(None, console_alarm._start_ring, seconds, countdown)
+	try:
+		pattern = await asyncio.shield(starting)
+	except asyncio.CancelledError:
+		# The thread can't be cancelled and starts the sound anyway, stop it as soon as it plays.
+		starting.add_done_callback(_stop_started_ring)
+		raise
+	if on_start is not None:
+		on_start()
+
+	# The mixer plays the sound on its own, we only stop it in the end.
+	try:
+		await asyncio.sleep(seconds)
+	finally:
+		pattern.stop()
+
+
+def _stop_started_ring(starting: asyncio.Future, /):
+	""" Stops the sound a cancelled async_ring started. """
+
+	if not starting.cancelled() and starting.exception() is None:
+		starting.result().stop()
+
+
+async def _async_wait_until(alarm_time: float, countdown=None, /) -> Optional[float]:
+	""" Sleeps until the wall clock reaches [alarm_time].
+
+	Works like console_alarm._wait_until, but sleeps with loop timers.
+
+	Parameters
+	----------
+	alarm_time : float
+		The time.time() value to wait for.
+	countdown : TerminalCountdown or JsonCountdown, optional
+		Shows the remaining time. Defaults to countdown_for the standard
+		output.
+
+	Returns
+	-------
+	Optional[float]
+		How many seconds after the deadline the wait returned or None if
+		the wall clock jumped over [alarm_time].
+	"""
+
+	loop = asyncio.get_running_loop()
+	countdown = countdown or countdown_for()
+	countdown.scheduled(alarm_time)
+	interval = min(countdown.interval, console_alarm._CLOCK_CHECK_INTERVAL)
+
+	# The difference between the wall clock and the loop clock. It only
+	# changes when the wall clock jumps.
+	clock_offset = time.time() - loop.time()
+	deadline = alarm_time - clock_offset
+
+	while True:
+		remaining_seconds = deadline - loop.time()
+		if remaining_seconds <= 0:
+			break
+
+		# Tell the user about the waiting time
+		countdown.tick(remaining_seconds)
+
+		# Sleep until the deadline or the next tick.
+		await asyncio.sleep(min(remaining_seconds, interval))
+
+		# Check if the wall clock jumped, e.g. because the os was hibernated.
+		new_clock_offset = time.time() - loop.time()
+		if abs(new_clock_offset - clock_offset) > console_alarm._CLOCK_JUMP_TOLERANCE:
+			clock_offset = new_clock_offset
+
+			# Check if the alarm time passed during the jump.
+			if time.time() > alarm_time + console_alarm._CLOCK_JUMP_TOLERANCE:
+				countdown.missed(alarm_time, time.time() - alarm_time, False)
+				return None
+
+			deadline = alarm_time - clock_offset
+
+	# How late we woke up.
+	return loop.time() - deadline
@@ -0,0 +1,493 @@
+""" A persistent audio engine for ringing the alarm many times.
+
+Summary
+-------
+	The AudioEngine initializes only the pygame mixer, once, and keeps a
+	bank of ready-to-play sounds. Long-living processes that ring more
+	than once reuse the mixer and the sounds instead of setting up pygame
+	and synthesizing the notes for every alarm.
+
+Routine Listings
+----------------
+	AudioEngine
+		Owns the mixer and the sound bank.
+
+	default_engine
+		Returns the engine that console_alarm.ring uses.
+
+	configure_default_engine
+		Sets the sample rate, the waveform and the mixing of the default
+		engine.
+
+Notes
+-----
+	pygame and NumPy are imported when an engine starts, not when this
+	module is imported. Sounds built into the console_alarm.sound_cache are
+	mapped from their files instead of being synthesized.
+
+	Every alarm normally plays the shared alarm sound on its own pygame
+	channel, and stopping one stops them all. With mixing, the alarms are
+	voices of a console_alarm.mixer.SoftwareMixer instead, summed into one
+	stream on one channel, each with its own volume and priority.
+"""
+
+import os
+import sys
+import threading
+import wave
+from typing import Callable, Dict, Optional
+from console_alarm import sound_cache
+from console_alarm import tracing
+from console_alarm import wav
+from console_alarm.clock import system_clock
+
+# The frequencies of the two notes the alarm rings with.
+NOTE_C4 = 261.626
+NOTE_G4 = 391.995
+
+# The name of the alarm pattern in the sound bank.
+RING_PATTERN = 'ring_pattern'
+
+_default_engine: Optional['AudioEngine'] = None
+_default_engine_lock = threading.Lock()
+
+
+class AudioEngine:
+	""" Owns the mixer and a bank of ready-to-play sounds.
+
+	Parameters
+	----------
+	sample_rate : int, optional
+		The sample rate of the mixer. Defaults to synthesis.SAMPLE_RATE.
+	clock : SystemClock or VirtualClock, optional
+		The clock ring waits with. Defaults to
+		console_alarm.clock.system_clock.
+	wavetable : bool, default = False
+		Keep a few looped periods of every note instead of a whole second,
+		see note, and build the alarm pattern from them.
+	waveform : str, default = 'sawtooth'
+		The shape of the wave of the alarm and the notes, one of
+		synthesis.WAVEFORMS.
+	mixing : bool, default = False
+		Mix all ringing alarms in software into one stream, see note.
+
+	Example
+	-------
+	with AudioEngine() as engine:
+		engine.ring(5)
+		engine.ring(5)
+	"""
+
+	def __init__(self, sample_rate: Optional[int] = None, clock=None, wavetable: bool = False,
+			waveform: str = 'sawtooth', mixing: bool = False):
+		self.sample_rate = sample_rate
+		self.clock = clock or system_clock
+		self.wavetable = wavetable
+		self.waveform = waveform
+		self.mixing = mixing
+		self._sounds: Dict[object, 'pygame.mixer.Sound'] = {}
+		self._lock = threading.RLock()
+		self._stop_ringing = threading.Event()
+		self._pygame = None
+		self._ring_samples = None
+		self._mixer: Optional['mixer.SoftwareMixer'] = None
+		self._feeder: Optional[threading.Thread] = None
+		self._feeder_wakeup = threading.Condition()
+		self._feeding = False
+
+	def __enter__(self) -> 'AudioEngine':
+		self.start()
+		return self
+
+	def __exit__(self, *exc_info):
+		self.shutdown()
+
+	@property
+	def running(self) -> bool:
+		""" True while the mixer of the engine is initialized. """
+
+		return self._pygame is not None and self._pygame.mixer.get_init() is not None
+
+	def start(self):
+		""" Imports the audio stack, initializes the mixer and renders the alarm pattern.
+
+		Does nothing if the engine already runs. Only the mixer gets
+		initialized, no other pygame subsystem. There is only one pygame
+		mixer per process, so if somebody else closed it, the engine
+		starts it again with fresh sounds.
+
+		Raises
+		------
+		pygame.error
+			If there is no usable audio device.
+		"""
+
+		with self._lock:
+			if self.running:
+				return
+
+			# Sounds of a closed mixer can't be played anymore.
+			self._sounds.clear()
+
+			with tracing.span('mixer_init', sample_rate=self.sample_rate):
+				pygame, synthesis = _import_audio()
+
+				if self.sample_rate is None:
+					self.sample_rate = synthesis.SAMPLE_RATE
+
+				# 16 bit signed mono, exactly, because the buffers are rendered that way.
+				pygame.mixer.init(self.sample_rate, -16, 1, allowedchanges=0)
+				self._pygame = pygame
+
+			# Fill the bank with the alarm pattern, alternating between
+			# C-4 (Do) and G-4 (Sol) followed by a short pause. Take it from
+			# the sound cache if it was built.
+			with tracing.span('synthesis', sound=RING_PATTERN, waveform=self.waveform):
+				samples = sound_cache.load_ring_pattern(NOTE_C4, NOTE_G4, self.sample_rate, self.waveform)
+				if samples is None:
+					samples = synthesis.render_ring_pattern(NOTE_C4, NOTE_G4, self.sample_rate, self.waveform,
+						wavetable=self.wavetable)
+			self._sounds[RING_PATTERN] = pygame.sndarray.make_sound(samples)
+			self._ring_samples = samples
+
+			# A running feeder keeps playing the mixer it has.
+			if self.mixing and self._mixer is None:
+				from console_alarm import mixer
+				self._mixer = mixer.SoftwareMixer()
+
+	def shutdown(self):
+		""" Stops all sounds, empties the sound bank and closes the mixer.
+
+		The engine can be started again afterwards.
+		"""
+
+		# The feeder needs the lock, so it is stopped first.
+		self._stop_feeder()
+
+		with self._lock:
+			self._stop_ringing.set()
+			if self._mixer is not None:
+				self._mixer.clear()
+				self._mixer = None
+			if self._pygame is None:
+				return
+
+			self._sounds.clear()
+			self._ring_samples = None
+			self._pygame.mixer.quit()
+			self._pygame = None
+
+	def note(self, frequency: float, /) -> 'pygame.mixer.Sound':
+		""" Returns a Sound object with one second of the note from the bank.
+
+		In wavetable mode the Sound holds only a few whole periods of the
+		note, some hundred bytes instead of a second of samples. Loop it
+		with play(-1) and stop it when the note should end.
+
+		Parameters
+		----------
+		frequency : float
+			The frequency of the note e.g. 440 for A and 880 for A'.
+
+		Returns
+		-------
+		pygame.mixer.Sound
+			The Sound object, shared with everybody asking for this note.
+		"""
+
+		with self._lock:
+			self.start()
+
+			sound = self._sounds.get(frequency)
+			if sound is None:
+				from console_alarm import synthesis
+				with tracing.span('synthesis', frequency=frequency, waveform=self.waveform):
+					if self.wavetable:
+						samples = synthesis.render_wavetable(frequency, self.sample_rate, self.waveform)
+					else:
+						samples = sound_cache.load_note(frequency, self.sample_rate, self.waveform)
+						if samples is None:
+							samples = synthesis.render_note(frequency, self.sample_rate, self.waveform)
+				sound = self._pygame.sndarray.make_sound(samples)
+				self._sounds[frequency] = sound
+			return sound
+
+	def start_ring(self, seconds: int, /, *, volume: float = 1.0, priority: int = 0):
+		""" Starts ringing for [seconds] and returns at once.
+
+		Parameters
+		----------
+		seconds : int
+			How long the alarm is going to ring.
+		volume : float, default = 1.0
+			The volume of this alarm.
+		priority : int, default = 0
+			Alarms with a higher priority are kept when the mixer has no
+			free voice. Only used with mixing.
+
+		Returns
+		-------
+		pygame.mixer.Sound or mixer.Voice
+			The playing alarm sound, or its voice with mixing. Stop it to
+			end the alarm early.
+
+		Raises
+		------
+		ValueError
+			If [seconds] is smaller than 1.
+
+		TypeError
+			If [seconds] is not int.
+		"""
+
+		_check_seconds(seconds)
+
+		with self._lock:
+			self.start()
+			self._stop_ringing.clear()
+
+			if self._mixer is not None:
+				voice = self._mixer.add(self._ring_samples, volume=volume, priority=priority,
+					frames=seconds * self.sample_rate)
+				self._start_feeder()
+				return voice
+
+			pattern = self._sounds[RING_PATTERN]
+
+			# Play the one second pattern for the passed number of seconds with one call.
+			channel = pattern.play(seconds - 1)
+			if channel is not None:
+				channel.set_volume(min(volume, 1.0))
+			return pattern
+
+	def ring(self, seconds: int, /, *, on_start: Optional[Callable[[], None]] = None, sound: Optional[str] = None,
+			volume: float = 1.0, priority: int = 0):
+		""" Rings the alarm for [seconds].
+
+		Returns early if stop or shutdown is called from another thread. With
+		mixing, rings from many threads play at the same time.
+
+		Parameters
+		----------
+		seconds : int
+			How long the alarm is going to ring.
+		on_start : Callable[[], None], optional
+			Called as soon as the sound plays.
+		sound : str, optional
+			A WAV file to ring with instead of the built-in tones. It is
+			streamed and repeated until [seconds] are over. If it can't be
+			played, the built-in tones ring instead. It is never mixed.
+		volume : float, default = 1.0
+			The volume of this alarm.
+		priority : int, default = 0
+			Alarms with a higher priority are kept when the mixer has no
+			free voice. Only used with mixing.
+
+		Raises
+		------
+		ValueError
+			If [seconds] is smaller than 1.
+
+		TypeError
+			If [seconds] is not int.
+		"""
+
+		with tracing.span('ring', seconds=seconds, sound=sound):
+			if sound is not None:
+				_check_seconds(seconds)
+				self.start()
+				try:
+					with wav.WavStream(sound, self.sample_rate) as stream:
+						self._ring_stream(stream, seconds, on_start)
+					return
+				except (OSError, EOFError, ValueError, wave.Error) as error:
+					print("Can't play {}, ringing the built-in tones: {}".format(sound, error), file=sys.stderr)
+
+			ringing = self.start_ring(seconds, volume=volume, priority=priority)
+			if on_start is not None:
+				on_start()
+
+			# Let the mixer do the timing while we sleep. A voice finishes on
+			# its own when it is stopped or replaced.
+			self.clock.wait(seconds, getattr(ringing, 'finished', self._stop_ringing))
+			ringing.stop()
+
+	def stop(self):
+		""" Stops the ringing alarm, or all of them with mixing. """
+
+		with self._lock:
+			self._stop_ringing.set()
+			if self._mixer is not None:
+				self._mixer.clear()
+			if self.running:
+				self._sounds[RING_PATTERN].stop()
+
+	def _ring_stream(self, stream: 'wav.WavStream', seconds: int, on_start: Optional[Callable[[], None]], /):
+		""" Plays [stream] in a loop for [seconds], queueing one chunk ahead. """
+
+		make_sound = self._pygame.sndarray.make_sound
+		chunks = stream.chunks(True)
+		# Read before anything plays, a file without samples raises EOFError here.
+		first, second = next(chunks), next(chunks)
+
+		with self._lock:
+			self._stop_ringing.clear()
+			channel = self._pygame.mixer.find_channel(True)
+			channel.play(make_sound(first))
+			channel.queue(make_sound(second))
+		if on_start is not None:
+			on_start()
+
+		# Only the playing and the queued chunk are in memory. Look a few
+		# times per chunk if the queued one started playing and queue the next.
+		end = self.clock.monotonic() + seconds
+		poll_interval = stream.chunk_seconds / 4
+		while True:
+			remaining = end - self.clock.monotonic()
+			if remaining <= 0 or self.clock.wait(min(remaining, poll_interval), self._stop_ringing):
+				break
+			if channel.get_queue() is None:
+				channel.queue(make_sound(next(chunks)))
+
+		with self._lock:
+			# A shutdown from another thread closed the mixer already.
+			if self.running:
+				channel.stop()
+
+	def _start_feeder(self):
+		""" Starts the thread that plays the software mixer, if it doesn't run yet. """
+
+		with self._feeder_wakeup:
+			if self._feeder is None:
+				self._feeding = True
+				self._feeder = threading.Thread(target=self._feed_mixer, args=(self._mixer,),
+					name='console_alarm mixer', daemon=True)
+				self._feeder.start()
+			self._feeder_wakeup.notify()
+
+	def _stop_feeder(self):
+		""" Stops the thread that plays the software mixer and waits for it. """
+
+		with self._feeder_wakeup:
+			feeder, self._feeder = self._feeder, None
+			self._feeding = False
+			self._feeder_wakeup.notify()
+		if feeder is not None:
+			feeder.join()
+
+	def _feed_mixer(self, software_mixer: 'mixer.SoftwareMixer', /):
+		""" Plays the blocks of [software_mixer] on one channel while voices play.
+
+		Like _ring_stream, one block plays and one is queued. The thread
+		sleeps without a timeout while no voice plays.
+		"""
+
+		make_sound = self._pygame.sndarray.make_sound
+		# Real seconds, the blocks play in real time even with a virtual clock.
+		poll_interval = software_mixer.block_frames / self.sample_rate / 4
+		channel = None
+
+		while True:
+			with self._feeder_wakeup:
+				while self._feeding and not len(software_mixer):
+					self._feeder_wakeup.wait()
+				if not self._feeding:
+					return
+
+			with self._lock:
+				if not self.running:
+					# Somebody closed the mixer, the voices can't be heard.
+					software_mixer.clear()
+					channel = None
+					continue
+				if channel is None or not channel.get_busy():
+					channel = self._pygame.mixer.find_channel(True)
+					channel.play(make_sound(software_mixer.mix()))
+				if channel.get_queue() is None:
+					channel.queue(make_sound(software_mixer.mix()))
+
+			with self._feeder_wakeup:
+				if self._feeding:
+					self._feeder_wakeup.wait(poll_interval)
+
+
+def default_engine() -> AudioEngine:
+	""" Returns the engine that console_alarm.ring uses.
+
+	The engine is created on the first call. It isn't started until it
+	has to play something.
+	"""
+
+	global _default_engine
+
+	with _default_engine_lock:
+		if _default_engine is None:
+			_default_engine = AudioEngine()
+		return _default_engine
+
+
+def configure_default_engine(sample_rate: Optional[int] = None, waveform: str = 'sawtooth', /, *,
+		mixing: bool = False, wavetable: bool = False) -> AudioEngine:
+	""" Replaces the default engine with one using [sample_rate] and [waveform].
+
+	A lower sample rate, e.g. 8000 or 16000, needs less CPU and memory on
+	small hosts at the cost of fidelity. Pass [mixing] if many alarms ring
+	at once and [wavetable] to keep the sounds small, see AudioEngine. The
+	old default engine is shut down.
+
+	Raises
+	------
+	ValueError
+		If [waveform] is unknown or [sample_rate] isn't positive.
+
+	Example
+	-------
+	configure_default_engine(16000, 'sine')
+	"""
+
+	from console_alarm import synthesis
+
+	if waveform not in synthesis.WAVEFORMS:
+		raise ValueError
+	if sample_rate is not None and not (isinstance(sample_rate, int) and sample_rate > 0):
+		raise ValueError
+
+	global _default_engine
+
+	with _default_engine_lock:
+		if _default_engine is not None:
+			_default_engine.shutdown()
+		_default_engine = AudioEngine(sample_rate, wavetable=wavetable, waveform=waveform, mixing=mixing)
+		return _default_engine
+
+
+def _import_audio() -> tuple:
+	""" Imports pygame and the synthesis module on first use.
+
+	NumPy and pygame take a long time to import and need a lot of memory,
+	so they are only imported when a sound is needed. Later calls get the
+	modules from the import cache.
+
+	Returns
+	-------
+	tuple
+		The pygame module and the console_alarm.synthesis module.
+	"""
+
+	# Don't print the pygame banner into the alarm output.
+	os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+	import pygame
+	import pygame.sndarray
+	from console_alarm import synthesis
+
+	return pygame, synthesis
+
+
+def _check_seconds(seconds: int, /):
+	""" Checks if [seconds] is a positive int. """
+
+	if not isinstance(seconds, int) or isinstance(seconds, bool):
+		raise TypeError
+	if seconds < 1:
+		raise ValueError
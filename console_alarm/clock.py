@@ -0,0 +1,250 @@
+""" Clocks the alarm functions read the time from and sleep with.
+
+Summary
+-------
+	Every function that waits for an alarm takes an optional clock. The
+	SystemClock reads the real clocks and really sleeps. The VirtualClock
+	only pretends to: sleeping moves its time forward at once, so tests can
+	wait for hours, cross midnight or simulate a suspend in no time while
+	still checking the exact fire times.
+
+Routine Listings
+----------------
+	SystemClock
+		The real clocks of the os.
+
+	VirtualClock
+		A simulated clock that jumps instead of sleeping.
+
+	system_clock
+		The SystemClock instance used when no clock is passed.
+
+Notes
+-----
+	There are three clocks: the wall clock, which NTP and the user can
+	move, the monotonic clock, which stands still while the os is
+	suspended, and the boot clock, which keeps counting then. A growing
+	difference between the boot and the monotonic clock means the os was
+	suspended.
+"""
+
+import os
+import threading
+import time
+from time import struct_time
+from typing import List, Optional, Tuple
+
+# The clock that keeps counting while the os is suspended, where there is one.
+_BOOT_CLOCK = getattr(time, 'CLOCK_BOOTTIME', None)
+
+# How often wait_boottime looks at the boot clock if the os can't wake it
+# at the end of the wait itself.
+_SUSPEND_CHECK_INTERVAL = 5.0
+
+
+class SystemClock:
+	""" The real clocks of the os. """
+
+	def time(self) -> float:
+		""" Returns the wall clock time in seconds since the epoch. """
+
+		return time.time()
+
+	def monotonic(self) -> float:
+		""" Returns the value of a clock that never jumps. """
+
+		return time.monotonic()
+
+	def boottime(self) -> float:
+		""" Returns the value of a clock that never jumps and counts while the os is suspended.
+
+		The monotonic clock stands still during a suspend, so the suspended
+		time is the growth of boottime() - monotonic(). Where the os has no
+		such clock, this is the monotonic clock.
+		"""
+
+		if _BOOT_CLOCK is None:
+			return time.monotonic()
+		return time.clock_gettime(_BOOT_CLOCK)
+
+	def localtime(self, seconds: Optional[float] = None, /) -> struct_time:
+		""" Converts [seconds] since the epoch, or the current time, into local time. """
+
+		return time.localtime(seconds)
+
+	def wait(self, seconds: float, event: Optional[threading.Event] = None, /) -> bool:
+		""" Sleeps for [seconds] or until [event] is set.
+
+		Parameters
+		----------
+		seconds : float
+			How long to sleep at most.
+		event : threading.Event, optional
+			Ends the sleep early when it gets set.
+
+		Returns
+		-------
+		bool
+			True if [event] is set.
+		"""
+
+		if event is None:
+			time.sleep(max(seconds, 0))
+			return False
+
+		return event.wait(max(seconds, 0))
+
+	def wait_boottime(self, seconds: float, /):
+		""" Sleeps for [seconds] of the boot clock.
+
+		A suspend counts as waited time, so a wait that ran out during a
+		suspend ends right after the resume instead of sleeping its rest.
+		A timerfd on the boot clock lets the kernel end the wait. Without
+		one, the boot clock is read every _SUSPEND_CHECK_INTERVAL seconds.
+		"""
+
+		if seconds <= 0:
+			return
+
+		if _BOOT_CLOCK is not None and hasattr(os, 'timerfd_create'):
+			timer = os.timerfd_create(_BOOT_CLOCK)
+			try:
+				os.timerfd_settime(timer, initial=seconds)
+				os.read(timer, 8)
+			finally:
+				os.close(timer)
+			return
+
+		end = self.boottime() + seconds
+		while True:
+			remaining = end - self.boottime()
+			if remaining <= 0:
+				return
+			time.sleep(min(remaining, _SUSPEND_CHECK_INTERVAL))
+
+
+class VirtualClock:
+	""" A simulated clock that jumps instead of sleeping.
+
+	Parameters
+	----------
+	start : float, optional
+		The wall clock time the clock starts at, in seconds since the epoch.
+		Defaults to the current time, rounded down to whole seconds.
+
+	Attributes
+	----------
+	sleeps : List[float]
+		The duration of every wait, in order.
+
+	Example
+	-------
+	clock = VirtualClock(time.mktime((2024, 1, 1, 23, 59, 30, 0, 0, -1)))
+	start_alarm_clock(0, 0, clock=clock, sink=print)
+	"""
+
+	def __init__(self, start: Optional[float] = None):
+		self._time = float(int(time.time()) if start is None else start)
+		self._monotonic = 0.0
+		self._boottime = 0.0
+		self._suspends: List[Tuple[float, float]] = []
+		self.sleeps: List[float] = []
+
+	def time(self) -> float:
+		""" Returns the simulated wall clock time. """
+
+		return self._time
+
+	def monotonic(self) -> float:
+		""" Returns the simulated monotonic time. It starts at 0. """
+
+		return self._monotonic
+
+	def boottime(self) -> float:
+		""" Returns the simulated boot time. It starts at 0 and counts suspends. """
+
+		return self._boottime
+
+	def localtime(self, seconds: Optional[float] = None, /) -> struct_time:
+		""" Converts [seconds] since the epoch, or the simulated time, into local time. """
+
+		return time.localtime(self._time if seconds is None else seconds)
+
+	def wait(self, seconds: float, event: Optional[threading.Event] = None, /) -> bool:
+		""" Moves the clock forward by [seconds] at once.
+
+		Suspends that were planned with suspend_at inside the waited time
+		move only the wall clock forward, like a real suspend does.
+
+		Returns
+		-------
+		bool
+			True if [event] is set.
+		"""
+
+		if event is not None and event.is_set():
+			return True
+
+		seconds = max(seconds, 0)
+		self.sleeps.append(seconds)
+
+		end = self._monotonic + seconds
+		while self._suspends and self._suspends[0][0] <= end:
+			_, duration = self._suspends.pop(0)
+			self._suspend(duration)
+
+		self.advance(seconds)
+		return event is not None and event.is_set()
+
+	def wait_boottime(self, seconds: float, /):
+		""" Moves the clock forward by [seconds] of the boot clock at once.
+
+		A suspend planned inside the wait counts as waited time. If the
+		wait runs out during the suspend, it ends with the resume.
+		"""
+
+		seconds = max(seconds, 0)
+		self.sleeps.append(seconds)
+
+		while self._suspends and self._suspends[0][0] <= self._monotonic + seconds:
+			at, duration = self._suspends.pop(0)
+			awake = max(at - self._monotonic, 0)
+			self.advance(awake)
+			self._suspend(duration)
+			seconds -= awake + duration
+			if seconds <= 0:
+				return
+
+		self.advance(seconds)
+
+	def advance(self, seconds: float, /):
+		""" Moves the wall, the monotonic and the boot clock forward by [seconds]. """
+
+		self._time += seconds
+		self._monotonic += seconds
+		self._boottime += seconds
+
+	def jump(self, seconds: float, /):
+		""" Moves only the wall clock by [seconds], like an NTP correction. """
+
+		self._time += seconds
+
+	def suspend_at(self, monotonic: float, seconds: float, /):
+		""" Plans a suspend of [seconds] when the monotonic clock reaches [monotonic].
+
+		While the os is suspended the monotonic clock stands still and the
+		wall clock keeps going.
+		"""
+
+		self._suspends.append((monotonic, seconds))
+		self._suspends.sort()
+
+	def _suspend(self, seconds: float, /):
+		""" Suspends the os for [seconds]: only the monotonic clock stands still. """
+
+		self._time += seconds
+		self._boottime += seconds
+
+
+# The clock used when no clock is passed.
+system_clock = SystemClock()
@@ -19,32 +19,84 @@ Routine Listings
 	ring
 		Rings the alarm for a given amount of seconds.
 
+	prewarm
+		Loads the audio stack and renders the alarm sound ahead of time.
+
+	calc_secs_to_times
+		Calculates the seconds until many alarms ring, with NumPy arrays.
+
+	calc_alarm_times
+		Calculates the times at which many alarms ring, with NumPy arrays.
+
 Notes
 -----
-	This alarm clock checks every minute how long the script has to sleep
-	until the alarm rings. When less than a minute is left, the script
-	waits for this period of time and then rings.
+	This alarm clock converts the alarm time into a time.monotonic()
+	deadline once and sleeps until it. Every minute it wakes up to tell
+	the user the remaining time and to compare the wall clock with the
+	monotonic clock. Only if the wall clock jumped, e.g. after a suspend or
+	an NTP correction, the deadline gets calculated again. The sleeps run
+	on the boot clock, which keeps counting during a suspend, so a suspend
+	over the alarm time is noticed right at the resume. Such a missed alarm
+	is skipped, rung late or rung within a grace window, see
+	start_alarm_clock. All reading of the time and all sleeping goes
+	through a clock from console_alarm.clock, so tests can pass a
+	VirtualClock and a sink instead of waiting and ringing for real.
+
+	NumPy and pygame are only imported when the alarm rings or prewarm is
+	called, so a waiting alarm starts fast and stays small. The sounds are
+	played by the default console_alarm.audio.AudioEngine, which keeps the
+	mixer and the rendered sounds for the next alarm.
 
 	This approach is not preferred for projects where you can set more
 	than one timer and where you want to stop timer before they ring.
+	Those projects should use console_alarm.scheduler.AlarmScheduler,
+	which keeps the timers in a priority queue and fires them from one
+	background thread. Timers can be cancelled or snoozed there. From the
+	console the same is possible with console_alarm.daemon, one process
+	that owns the scheduler and is controlled over a Unix socket.
+
+	A ringing alarm can be stopped or snoozed with a key or a signal, see
+	console_alarm.controls. A snoozed alarm is set again as a pomodoro.
 
-	Therefore I would suggest a list of active timer timestamps that are
-	checked periodically in background (every second or less) and start an
-	alarm if the current time passes one of the list values. After the
-	alarm starts, this timestamp could be set to a snooze (maybe 5
-	minutes) or get removed after the user notices the alarm.
+	The wait and the ring are timed with console_alarm.tracing spans,
+	which cost next to nothing until a handler is registered.
 """
 
 import sys
 import time
-import numpy
-import pygame
-import pygame.sndarray
 from math import floor
-from typing import List
-
-
-def start_pomodoro(minutes: int, /):
+from typing import Callable, List, Optional, Tuple
+from console_alarm import audio
+from console_alarm import tracing
+from console_alarm.clock import system_clock
+from console_alarm.controls import RingControls, SNOOZE, SNOOZE_MINUTES
+from console_alarm.countdown import countdown_for
+from console_alarm.stats import FireRecord, FireStats, fire_stats
+
+# How often the waiting alarm clock wakes up to look for clock jumps and
+# to tell the user the remaining time.
+_CLOCK_CHECK_INTERVAL = 60
+
+# By how many seconds the wall clock has to move against the monotonic
+# clock before we call it a clock jump.
+_CLOCK_JUMP_TOLERANCE = 1.0
+
+# What happens to an alarm whose time passed while the os was suspended:
+# it is dropped and logged, rung late or rung if it is at most the grace
+# window late.
+MISSED_DROP = 'drop'
+MISSED_RING = 'ring'
+MISSED_GRACE = 'grace'
+MISSED_POLICIES = (MISSED_DROP, MISSED_RING, MISSED_GRACE)
+
+# How many seconds late an alarm still rings with MISSED_GRACE by default.
+DEFAULT_GRACE_SECONDS = 300
+
+
+def start_pomodoro(minutes: int, /, *, clock=None, sink: Optional[Callable[[int], Optional[str]]] = None,
+		stats: Optional[FireStats] = None, sound: Optional[str] = None,
+		controls: Optional[RingControls] = None, missed: str = MISSED_DROP,
+		grace: float = DEFAULT_GRACE_SECONDS, countdown=None) -> Optional[float]:
 	""" Starts pomodorolike alarm.
 
 	Parameters
@@ -52,6 +104,31 @@ def start_pomodoro(minutes: int, /):
 	minutes : float
 		In how many minutes the alarm should start. Minutes has to be
 		between 1 and 1439.
+	clock : SystemClock or VirtualClock, optional
+		The clock to read the time from and to sleep with. Defaults to
+		console_alarm.clock.system_clock.
+	sink : Callable[[int], None], optional
+		Called with the ring duration in seconds instead of ring.
+	stats : FireStats, optional
+		Where the timing of the alarm gets recorded.
+	sound : str, optional
+		A WAV file to ring with, see ring.
+	controls : RingControls, optional
+		Stop or snooze the ringing alarm with a key or a signal, see
+		start_alarm_clock.
+	missed : str, default = MISSED_DROP
+		What happens if the alarm time passes during a suspend, see
+		start_alarm_clock.
+	grace : float, default = DEFAULT_GRACE_SECONDS
+		How many seconds late the alarm still rings with MISSED_GRACE.
+	countdown : TerminalCountdown or JsonCountdown, optional
+		Shows the time until the alarm rings, see start_alarm_clock.
+
+	Returns
+	-------
+	Optional[float]
+		How many seconds after the alarm time the alarm started ringing or
+		None if the alarm was missed.
 
 	Raises
 	------
@@ -73,14 +150,20 @@ def start_pomodoro(minutes: int, /):
 	# Check if parameter is in range.
 	_is_in_range(minutes, 1, 1439)
 
+	clock = clock or system_clock
+
 	# Add [minutes] to current time.
-	alarm = time.localtime(time.time()+minutes*60)
+	alarm = clock.localtime(clock.time()+minutes*60)
 
 	# We set the alarm clock to the calculated time.
-	start_alarm_clock(alarm.tm_hour, alarm.tm_min, alarm.tm_sec)
+	return start_alarm_clock(alarm.tm_hour, alarm.tm_min, alarm.tm_sec, clock=clock, sink=sink, stats=stats,
+		sound=sound, controls=controls, missed=missed, grace=grace, countdown=countdown)
 
 
-def start_alarm_clock(alarm_hour: int, alarm_min: int, alarm_sec: int = 0, /):
+def start_alarm_clock(alarm_hour: int, alarm_min: int, alarm_sec: int = 0, /, *, clock=None,
+		sink: Optional[Callable[[int], Optional[str]]] = None, stats: Optional[FireStats] = None,
+		sound: Optional[str] = None, controls: Optional[RingControls] = None, missed: str = MISSED_DROP,
+		grace: float = DEFAULT_GRACE_SECONDS, countdown=None) -> Optional[float]:
 	""" Starts an alarm that rings at a specified time.
 
 	Parameters
@@ -92,12 +175,45 @@ def start_alarm_clock(alarm_hour: int, alarm_min: int, alarm_sec: int = 0, /):
 	alarm_sec : int, default = 0
 		The seconds of the alarm time. This parameter is optional and
 		defaults to 0.
+	clock : SystemClock or VirtualClock, optional
+		The clock to read the time from and to sleep with. Defaults to
+		console_alarm.clock.system_clock.
+	sink : Callable[[int], Optional[str]], optional
+		Called with the ring duration in seconds instead of ring. It can
+		return an action like ring does.
+	stats : FireStats, optional
+		Where the timing of the alarm gets recorded. Defaults to
+		console_alarm.stats.fire_stats.
+	sound : str, optional
+		A WAV file to ring with, see ring.
+	controls : RingControls, optional
+		Stop the ringing alarm with a key or a signal. A snoozed alarm
+		is set again as a pomodoro of [controls.snooze_minutes] and
+		this function returns after that one rang.
+	missed : str, default = MISSED_DROP
+		What happens if the alarm time passes while the os is suspended:
+		MISSED_DROP logs and skips the alarm, MISSED_RING rings it as
+		soon as the os resumes and MISSED_GRACE only if it is at most
+		[grace] seconds late.
+	grace : float, default = DEFAULT_GRACE_SECONDS
+		How many seconds late the alarm still rings with MISSED_GRACE.
+	countdown : TerminalCountdown or JsonCountdown, optional
+		Shows the time until the alarm rings and its messages. Defaults
+		to console_alarm.countdown.countdown_for the standard output: a
+		line redrawn in place on a terminal, else JSON events.
+
+	Returns
+	-------
+	Optional[float]
+		How many seconds after the alarm time the alarm started ringing or
+		None if the alarm was missed.
 
 	Raises
 	------
 	ValueError
 		If the [alarm_hours] parameter isn't between 0 and 23 or
-		[alarm_min] or [alarm_sec] parameters aren't between 0 and 59.
+		[alarm_min] or [alarm_sec] parameters aren't between 0 and 59 or
+		[missed] is none of MISSED_POLICIES.
 
 	TypeError
 		If one of the [alarm_hour], [alarm_min] or [alarm_sec] parameters
@@ -116,50 +232,78 @@ def start_alarm_clock(alarm_hour: int, alarm_min: int, alarm_sec: int = 0, /):
 	_is_in_range(alarm_hour, 0, 23)
 	_is_in_range(alarm_min, 0, 59)
 	_is_in_range(alarm_sec, 0, 59)
+	if missed not in MISSED_POLICIES:
+		raise ValueError
 
-	# Here we calc how many seconds we have to wait.
-	remaining_seconds = _calc_secs_to_time(alarm_hour, alarm_min, alarm_sec)
+	clock = clock or system_clock
+	stats = fire_stats if stats is None else stats
+	countdown = countdown or countdown_for()
 
-	# Define boolean variable to break the while loop
-	is_waiting_done = False
+	# Here we calc when the alarm is supposed to ring.
+	alarm_time = _calc_alarm_time(alarm_hour, alarm_min, alarm_sec, clock=clock)
 
 	# Sleeping time!
-	# While there are still seconds to wait
-	while not is_waiting_done:
-		# Memorize the last count of remaining seconds
-		old_remaining_seconds = remaining_seconds
-
-		# Calc how many seconds are still on the clock
-		remaining_seconds = _calc_secs_to_time(alarm_hour, alarm_min, alarm_sec)
+	lateness = _wait_until(alarm_time, clock=clock, missed=missed, grace=grace, countdown=countdown)
 
-		# Tell the user about the waiting time
-		_print_time_until_alarm(remaining_seconds)
+	# The clock jumped over the alarm time, e.g. while the os was hibernated.
+	if lateness is None:
+		stats.record(FireRecord(alarm_time, None, None))
+		return None
 
-		# Check if os was hibernated during alarm ring
-		if old_remaining_seconds < remaining_seconds:
-			print('Missed alarm!', old_remaining_seconds, remaining_seconds)
-			return
+	# Remember when we woke up and when the first audio sample played.
+	woke = clock.monotonic()
+	audio_started = []
 
-		# Check if there are less than 60 seconds left.
-		if 60 >= remaining_seconds > 0:
-			# Sleep for the last few seconds.
-			time.sleep(remaining_seconds)
-			is_waiting_done = True
-		elif remaining_seconds >= 60:
-			# Sleep for 60 seconds and check again
-			time.sleep(60)
+	def on_start():
+		audio_started.append(clock.monotonic())
 
 	# And time to wake up!!
-	ring(5)
+	countdown.fired(lateness)
+	if sink is None:
+		action = ring(5, on_start=on_start, sound=sound, controls=controls, countdown=countdown)
+	else:
+		on_start()
+		action = sink(5)
+
+	stats.record(FireRecord(alarm_time, alarm_time + lateness, lateness,
+		lateness + audio_started[0] - woke if audio_started else None))
 
+	# A snoozed alarm is just a new pomodoro.
+	if action == SNOOZE:
+		snooze_minutes = SNOOZE_MINUTES if controls is None else controls.snooze_minutes
+		countdown.message("Snoozed for {} minutes".format(snooze_minutes))
+		start_pomodoro(snooze_minutes, clock=clock, sink=sink, stats=stats, sound=sound, controls=controls,
+			missed=missed, grace=grace, countdown=countdown)
 
-def ring(seconds: int, /):
+	return lateness
+
+
+def ring(seconds: int, /, *, on_start: Optional[Callable[[], None]] = None, sound: Optional[str] = None,
+		controls: Optional[RingControls] = None, countdown=None) -> Optional[str]:
 	""" Rings the alarm for a given amount of [seconds].
 
 	Parameters
 	----------
 	seconds : int
 		How long the alarm is going to ring.
+	on_start : Callable[[], None], optional
+		Called as soon as the sound plays.
+	sound : str, optional
+		A WAV file to ring with instead of the built-in tones. It is
+		streamed in chunks, so long recordings need no more memory than
+		short ones. If it can't be played, the built-in tones ring.
+	controls : RingControls, optional
+		Watches the keyboard and SIGUSR1/SIGUSR2 while the alarm rings and
+		stops it at once on the first key or signal.
+	countdown : TerminalCountdown or JsonCountdown, optional
+		Shows the messages of the alarm, so they are JSON events when the
+		countdown writes JSON lines. They are printed by default.
+
+	Returns
+	-------
+	Optional[str]
+		console_alarm.controls.DISMISS or SNOOZE if [controls] ended the
+		alarm, None if it rang for all [seconds].
 
 	Raises
 	------
@@ -178,137 +322,127 @@ def ring(seconds: int, /):
 	_is_in_range(seconds, 1, 60)
 
 	# Console ring ! important for tests.
-	print("Wake up!!! <3")
+	_tell("Wake up!!! <3", countdown)
 
-	# Initializing pygame for playing audio
-	pygame.mixer.pre_init(44100, -16, 1)
-	pygame.init()
+	# Let the default audio engine ring.
+	engine = audio.default_engine()
+	if controls is None:
+		engine.ring(seconds, on_start=on_start, sound=sound)
+		return None
 
-	# Load the notes we want to play
-	# C-4 (Do)
-	low = _get_note(261.626)
+	if controls.has_keyboard:
+		_tell("Press s to snooze or any other key to stop.", countdown)
 
-	# G-4 (Sol)
-	high = _get_note(391.995)
+	# Watch only while the sound plays, so no key stops the ring before it started.
+	def start_watching():
+		controls.start(engine.stop)
+		if on_start is not None:
+			on_start()
 
-	# Play the one second alarm sound for the passed number of seconds.
-	for i in range(seconds):
-		for x in range(10):
-			_play_note(high, 25)
-			_play_note(low, 25)
-		pygame.time.delay(500)
+	try:
+		engine.ring(seconds, on_start=start_watching, sound=sound)
+	finally:
+		controls.close()
+	return controls.action
 
 
-def _get_note(frequency: float, /) -> pygame.mixer.Sound:
-	""" Calculates the note and returns a Sound object.
+def prewarm():
+	""" Loads the audio stack and renders the alarm sound ahead of time.
 
-	Parameters
-	----------
-	frequency : float
-		The frequency of the note e.g. 440 for A and 880 for A'.
+	The audio stack is otherwise only loaded when the alarm rings, which
+	keeps waiting alarms small and fast to start. Call this to move the
+	loading time away from the moment the alarm rings.
 
-	Returns
+	Example
 	-------
-	pygame.mixer.Sound
-		The calculated Sound object, that can be played.
-
-	Raises
-	------
-	ValueError
-		If the [frequency] parameter isn't between 1 and 44100.
-
-	TypeError
-		If the [frequency] parameter is not float or int.
+	prewarm()
 	"""
 
-	# Check if parameter is in range.
-	_is_in_range(floor(frequency), 1, 44099)
-
-	# Check if parameter has the correct type,
-	if not isinstance(frequency, (int, float)):
-		raise TypeError
-
-	# How many sound frames are there per wave
-	frames = 44100/frequency
-
-	# Put the sawtooth frames into an array.
-	arr = numpy.array([16384 * (x % frames) / frames - 8192 for x in range(0, 44100)]).astype(numpy.int16)
-
-	# Return a Sound object created from the wave frame array.
-	return pygame.sndarray.make_sound(arr)
+	audio.default_engine().start()
 
 
-def _play_note(sound: pygame.mixer.Sound, duration: int, /):
-	""" Plays the passed note for the passed duration.
+def _start_ring(seconds: int, countdown=None, /):
+	""" Starts ringing the alarm for [seconds] and returns at once.
 
 	Parameters
 	----------
-	sound : pygame.mixer.Sound
-		The Sound object containing the note.
-	duration : int
-		The duration of the note in milliseconds.
+	seconds : int
+		How long the alarm is going to ring.
+	countdown : TerminalCountdown or JsonCountdown, optional
+		Shows the messages of the alarm, see ring.
+
+	Returns
+	-------
+	pygame.mixer.Sound or mixer.Voice
+		The playing alarm sound, or its voice if the default engine mixes.
+		Stop it to end the alarm early.
 
 	Raises
 	------
 	ValueError
-		If duration is smaller than or equal 0.
+		If the [seconds] parameter isn't between 1 and 60.
 
 	TypeError
-		If the [sound] parameter is not pygame.mixer.Sound or [duration]
-		is not int.
+		If the [seconds] parameter is not int.
 
-	Example
-	-------
-	_play_note(high_C, 50)
+	See Also
+	--------
+	ring
 	"""
 
-	# Check if parameter [duration] is in range.
-	_is_in_range(duration, 1)
+	# Check if parameter is in range.
+	_is_in_range(seconds, 1, 60)
+
+	# Console ring ! important for tests.
+	_tell("Wake up!!! <3", countdown)
+
+	return audio.default_engine().start_ring(seconds)
 
-	# Check parameter [sound] for correct type.
-	if not isinstance(sound, pygame.mixer.Sound):
-		raise TypeError
 
-	sound.play(-1)
-	pygame.time.delay(duration)
-	sound.stop()
+def _tell(text: str, countdown, /):
+	""" Prints [text], or gives it to [countdown] if there is one. """
+
+	if countdown is None:
+		print(text)
+	else:
+		countdown.message(text)
 
 
-def _print_time_until_alarm(seconds: int, /):
-	""" Prints the time until the alarm rings onto the console.
+def _get_note(frequency: float, /) -> 'pygame.mixer.Sound':
+	""" Calculates the note and returns a Sound object.
 
 	Parameters
 	----------
-	seconds : int
-		The remaining seconds until the alarm rings.
+	frequency : float
+		The frequency of the note e.g. 440 for A and 880 for A'.
+
+	Returns
+	-------
+	pygame.mixer.Sound
+		The calculated Sound object, that can be played.
 
 	Raises
 	------
 	ValueError
-		If the [seconds] parameter is smaller than 0.
+		If the [frequency] parameter isn't between 1 and 44100.
 
 	TypeError
-		If the [seconds] parameter is not int.
-
-	Example
-	-------
-	print_time_until_alarm(128)
-	> Alarm starts in 0 hour(s), 2 minute(s), and 8 second(s)
+		If the [frequency] parameter is not float or int.
 	"""
 
 	# Check if parameter is in range.
-	_is_in_range(seconds, 0)
+	_is_in_range(floor(frequency), 1, 44099)
 
-	# Calc our user output.
-	needed_hour = floor(seconds / 3600)
-	needed_min = floor((seconds - (needed_hour * 3600)) / 60)
-	needed_sec = floor(seconds - needed_min * 60 - needed_hour * 3600)
+	# Check if parameter has the correct type,
+	if not isinstance(frequency, (int, float)):
+		raise TypeError
 
-	# Here we inform the user on how long he have to wait for his alarm.
-	print("Alarm starts in {} hour(s), {} minute(s), and {} second(s)".format(needed_hour, needed_min, needed_sec))
+	# Get the note from the sound bank of the default audio engine.
+	return audio.default_engine().note(frequency)
 
 
-def _calc_secs_to_time(hour: int, minutes: int, seconds: int = 0, /) -> int:
+def _calc_secs_to_time(hour: int, minutes: int, seconds: int = 0, /, *,
+		now: Optional[time.struct_time] = None, clock=None) -> int:
 	""" Calculates the amount of seconds until the alarm is supposed to ring.
 
 	Parameters
@@ -319,6 +453,11 @@ def _calc_secs_to_time(hour: int, minutes: int, seconds: int = 0, /) -> int:
 		The clocks minute value at the alarm ring time.
 	seconds : int, optional = 0
 		The clocks second value at the alarm ring time.
+	now : time.struct_time, optional
+		The local time to count from. Defaults to the local time of [clock].
+	clock : SystemClock or VirtualClock, optional
+		The clock to read the time from. Defaults to
+		console_alarm.clock.system_clock.
 
 	Returns
 	-------
@@ -346,7 +485,8 @@ def _calc_secs_to_time(hour: int, minutes: int, seconds: int = 0, /) -> int:
 	_is_in_range(seconds, 0, 60)
 
 	# Get the current time.
-	now = time.localtime()
+	if now is None:
+		now = (clock or system_clock).localtime()
 
 	# Put the hours and the minutes of the current time in variables.
 	current_hour = now.tm_hour
@@ -379,6 +519,238 @@ def _calc_secs_to_time(hour: int, minutes: int, seconds: int = 0, /) -> int:
 	return needed_min*60 + needed_hour*3600 - now.tm_sec + seconds
 
 
+def _calc_alarm_time(hour: int, minutes: int, seconds: int = 0, /, *, clock=None) -> float:
+	""" Calculates the time.time() value at which the alarm is supposed to ring.
+
+	Parameters
+	----------
+	hour : int
+		The clocks hour value at the alarm ring time.
+	minutes : int
+		The clocks minute value at the alarm ring time.
+	seconds : int, optional = 0
+		The clocks second value at the alarm ring time.
+	clock : SystemClock or VirtualClock, optional
+		The clock to read the time from.
+
+	Returns
+	-------
+	float
+		The alarm time in seconds since the epoch.
+
+	See Also
+	--------
+	_calc_secs_to_time
+	"""
+
+	clock = clock or system_clock
+
+	# Read the clock once, so the whole seconds and the fraction match.
+	now = clock.time()
+
+	# _calc_secs_to_time counts from the start of the current second.
+	return floor(now) + _calc_secs_to_time(hour, minutes, seconds, now=clock.localtime(now))
+
+
+def calc_secs_to_times(hours, minutes, seconds=0, /, *, now: Optional[time.struct_time] = None,
+		clock=None) -> 'numpy.ndarray':
+	""" Calculates the seconds until many alarms are supposed to ring at once.
+
+	The vectorized version of _calc_secs_to_time: the current time is read
+	once and every element gets exactly the seconds _calc_secs_to_time
+	would return for it, including the wraparound at midnight and the 24
+	hours for an alarm at the current minute.
+
+	Parameters
+	----------
+	hours : array_like of int
+		The clocks hour values at the alarm ring times.
+	minutes : array_like of int
+		The clocks minute values at the alarm ring times.
+	seconds : array_like of int, default = 0
+		The clocks second values at the alarm ring times.
+	now : time.struct_time, optional
+		The local time to count from. Defaults to the local time of [clock].
+	clock : SystemClock or VirtualClock, optional
+		The clock to read the time from. Defaults to
+		console_alarm.clock.system_clock.
+
+	Returns
+	-------
+	numpy.ndarray
+		The seconds remaining until every alarm rings, as int64, in the
+		broadcast shape of the three arrays.
+
+	Raises
+	------
+	ValueError
+		If a value of [hours] isn't between 0 and 23 or one of [minutes] or
+		[seconds] isn't between 0 and 60, the same limits as
+		_calc_secs_to_time has.
+
+	TypeError
+		If one of the arrays doesn't hold integers.
+
+	Example
+	-------
+	calc_secs_to_times(numpy.array([9, 14]), numpy.array([30, 9]))
+	"""
+
+	import numpy
+
+	hours, minutes, seconds = numpy.broadcast_arrays(*(numpy.asarray(values) for values in (hours, minutes, seconds)))
+
+	# Check if parameters are in range.
+	for values, maximum in ((hours, 23), (minutes, 60), (seconds, 60)):
+		if values.dtype.kind not in 'iu':
+			raise TypeError
+		if values.size and (values.min() < 0 or values.max() > maximum):
+			raise ValueError
+
+	# Get the current time once for all alarms.
+	if now is None:
+		now = (clock or system_clock).localtime()
+
+	# The same steps as _calc_secs_to_time, with numpy.where instead of
+	# branches, which works for 0-d arrays as well.
+	needed_min = minutes.astype(numpy.int64) - now.tm_min
+	earlier_minute = needed_min < 0
+	needed_min = numpy.where(earlier_minute, needed_min + 60, needed_min)
+
+	needed_hour = hours.astype(numpy.int64) - (now.tm_hour + earlier_minute)
+	needed_hour = numpy.where(needed_hour < 0, needed_hour + 24, needed_hour)
+
+	# An alarm at the current time rings in 24 hours.
+	needed_hour = numpy.where((needed_hour == 0) & (needed_min == 0), 24, needed_hour)
+
+	# Arithmetic on 0-d arrays gives NumPy scalars, keep the array.
+	return numpy.asarray(needed_min*60 + needed_hour*3600 - now.tm_sec + seconds)
+
+
+def calc_alarm_times(hours, minutes, seconds=0, /, *, clock=None) -> 'numpy.ndarray':
+	""" Calculates the time.time() values at which many alarms are supposed to ring.
+
+	The vectorized version of _calc_alarm_time, see calc_secs_to_times for
+	the parameters.
+
+	Returns
+	-------
+	numpy.ndarray
+		The alarm times in seconds since the epoch, as float64.
+	"""
+
+	clock = clock or system_clock
+
+	# Read the clock once, so the whole seconds and the fraction match.
+	now = clock.time()
+
+	return floor(now) + calc_secs_to_times(hours, minutes, seconds, now=clock.localtime(now)).astype(float)
+
+
+def _wait_until(alarm_time: float, /, *, clock=None, missed: str = MISSED_DROP,
+		grace: float = DEFAULT_GRACE_SECONDS, countdown=None) -> Optional[float]:
+	""" Sleeps until the wall clock reaches [alarm_time].
+
+	The alarm time is converted into a time.monotonic() deadline once. The
+	wait wakes up every [countdown.interval] seconds, at most every
+	_CLOCK_CHECK_INTERVAL seconds, to show the remaining time and
+	recalculates the deadline only if the wall clock jumped against the
+	monotonic clock or the os was suspended. The waits run on the boot
+	clock, so they end as soon as the os resumes from a suspend that
+	outlasted them.
+
+	Parameters
+	----------
+	alarm_time : float
+		The time.time() value to wait for.
+	clock : SystemClock or VirtualClock, optional
+		The clock to read the time from and to sleep with.
+	missed : str, default = MISSED_DROP
+		What happens if the wall clock jumped over [alarm_time], see
+		start_alarm_clock.
+	grace : float, default = DEFAULT_GRACE_SECONDS
+		How many seconds late the alarm still rings with MISSED_GRACE.
+	countdown : TerminalCountdown or JsonCountdown, optional
+		Shows the remaining time. Defaults to countdown_for the standard
+		output.
+
+	Returns
+	-------
+	Optional[float]
+		How many seconds after the deadline the wait returned or None if
+		the wall clock jumped over [alarm_time] and [missed] drops it.
+
+	Example
+	-------
+	_wait_until(time.time() + 60)
+	"""
+
+	clock = clock or system_clock
+	countdown = countdown or countdown_for()
+	with tracing.span('wait', alarm_time=alarm_time, missed=missed):
+		return _wait_for_deadline(alarm_time, clock, missed, grace, countdown)
+
+
+def _wait_for_deadline(alarm_time: float, clock, missed: str, grace: float, countdown, /) -> Optional[float]:
+	""" The loop of _wait_until, with all parameters set. """
+
+	countdown.scheduled(alarm_time)
+	interval = min(countdown.interval, _CLOCK_CHECK_INTERVAL)
+
+	# The difference between the wall and the monotonic clock. It only
+	# changes when the wall clock jumps.
+	clock_offset = clock.time() - clock.monotonic()
+	deadline = alarm_time - clock_offset
+
+	# How long the os was suspended so far. It only grows during a suspend.
+	suspended = clock.boottime() - clock.monotonic()
+
+	while True:
+		remaining_seconds = deadline - clock.monotonic()
+		if remaining_seconds <= 0:
+			break
+
+		# Tell the user about the waiting time
+		countdown.tick(remaining_seconds)
+
+		# Sleep until the deadline, the next tick or the resume from a suspend.
+		clock.wait_boottime(min(remaining_seconds, interval))
+
+		# Check if the wall clock jumped or the os was suspended.
+		new_clock_offset = clock.time() - clock.monotonic()
+		new_suspended = clock.boottime() - clock.monotonic()
+		if abs(new_clock_offset - clock_offset) > _CLOCK_JUMP_TOLERANCE \
+				or new_suspended - suspended > _CLOCK_JUMP_TOLERANCE:
+			clock_offset = new_clock_offset
+			suspended = new_suspended
+
+			# Check if the alarm time passed during the jump.
+			lateness = clock.time() - alarm_time
+			if lateness > _CLOCK_JUMP_TOLERANCE:
+				rung = missed == MISSED_RING or missed == MISSED_GRACE and lateness <= grace
+				countdown.missed(alarm_time, lateness, rung)
+				return lateness if rung else None
+
+			deadline = alarm_time - clock_offset
+
+	# How late we woke up.
+	return clock.monotonic() - deadline
+
+
+def _pop_option(sys_args: List[str], name: str, /) -> Tuple[Optional[str], List[str]]:
+	""" Returns the value of the option [name] and [sys_args] without both.
+
+	The option can be anywhere after the script name. The value is None
+	if the option isn't there.
+	"""
+
+	if name not in sys_args[1:-1]:
+		return None, sys_args
+
+	index = sys_args.index(name, 1)
+	return sys_args[index + 1], sys_args[:index] + sys_args[index + 2:]
+
+
 def _is_in_range(value: int, minimum: int = -sys.maxsize - 1, maximum: int = sys.maxsize, /):
 	""" Checks if value is in range and raises an exception if not.
 
@@ -424,16 +796,50 @@ def _print_help():
 	print("With two arguments, you will set a alarm clock for a specified time.")
 	print("If you set 14 09 as arguments, the alarm will start at 14:09.")
 	print("")
+	print("While the alarm rings, press s to snooze it for 5 minutes or any other key to")
+	print("stop it. 'kill -USR1 PID' stops and 'kill -USR2 PID' snoozes it as well.")
+	print("")
+	print("If the alarm time passes while the computer sleeps, the alarm is skipped.")
+	print("'--missed ring' rings it after the wake up instead, '--grace MINUTES' only")
+	print("if it is at most MINUTES late.")
+	print("")
+	print("On a terminal the countdown is redrawn every second, '--refresh SECONDS'")
+	print("changes that. Else the alarm writes JSON lines, one per event.")
+	print("")
+	print("Add --stats to print how accurately the alarm fired.")
+	print("Add --trace FILE to write the timing of the alarm as Chrome trace JSON, e.g.")
+	print("for https://ui.perfetto.dev.")
+	print("Add --sound FILE to ring with a WAV file instead of the built-in tones.")
+	print("Add --waveform NAME to pick the tone: sawtooth, sine, square, triangle or")
+	print("bandlimited_saw. Add --sample-rate RATE, e.g. 8000 or 16000, to save CPU and")
+	print("memory on small hosts. Add --wavetable to build the tones from a few looped")
+	print("periods, which keeps the sounds in memory small.")
+	print("")
+	print("Schedule file:")
+	print("'--from-file FILE' rings every alarm of FILE, '-' reads the standard input.")
+	print("Every line is one alarm with one value (minutes) or with the hour, the minute")
+	print("and optionally the second of an alarm time, separated by commas.")
+	print("")
+	print("Run with --build-sound-cache once to render all alarm sounds ahead of time.")
+	print("")
+	print("Daemon:")
+	print("'daemon' starts one process that keeps all alarms, 'daemon --journal FILE'")
+	print("keeps them over restarts. Talk to it with 'add MINUTES', 'add HOUR MINUTE',")
+	print("'list', 'cancel ID' and 'snooze ID MINUTES'. Add '--socket PATH' to use")
+	print("another socket than the default one.")
+	print("")
 	print("On ubuntu you can put this task into background with 'ctrl+z' and then run 'bg'")
 	print("Get it to the foreground again with fg")
 
 
-def console_script_entry_point(sys_args: List[str]):
+def console_script_entry_point(sys_args: List[str], *, clock=None, sink: Optional[Callable[[int], Optional[str]]] = None):
 	""" Entry point for start from console.
 
 	Parameters
 	----------
 	sys_args : The list of arguments the script was started with.
+	clock : The clock the alarm waits with, see start_alarm_clock.
+	sink : Called instead of ring, see start_alarm_clock.
 
 	Raises
 	------
@@ -449,8 +855,91 @@ def console_script_entry_point(sys_args: List[str]):
 		if not isinstance(sys_args[argument_index], str):
 			raise TypeError
 
+	# A trace records everything the rest of the arguments do, --stats included.
+	trace, sys_args = _pop_option(sys_args, '--trace')
+	if trace is not None:
+		exporter = tracing.ChromeTraceExporter()
+		with exporter:
+			console_script_entry_point(sys_args, clock=clock, sink=sink)
+		try:
+			exporter.write(trace)
+		except OSError as error:
+			print("Can't write the trace {}: {}".format(trace, error.strerror or error), file=sys.stderr)
+		return
+
+	# The --stats flag can be anywhere after the script name.
+	show_stats = '--stats' in sys_args[1:]
+	if show_stats:
+		sys_args = sys_args[:1] + [argument for argument in sys_args[1:] if argument != '--stats']
+
+	# So can --wavetable.
+	wavetable = '--wavetable' in sys_args[1:]
+	if wavetable:
+		sys_args = sys_args[:1] + [argument for argument in sys_args[1:] if argument != '--wavetable']
+
+	# So can the options with a value.
+	sound, sys_args = _pop_option(sys_args, '--sound')
+	waveform, sys_args = _pop_option(sys_args, '--waveform')
+	sample_rate, sys_args = _pop_option(sys_args, '--sample-rate')
+	missed, sys_args = _pop_option(sys_args, '--missed')
+	grace, sys_args = _pop_option(sys_args, '--grace')
+	refresh, sys_args = _pop_option(sys_args, '--refresh')
+
+	if missed is None:
+		missed = MISSED_DROP if grace is None else MISSED_GRACE
+	elif missed not in MISSED_POLICIES:
+		print("Unknown policy {}, use one of {}".format(missed, ", ".join(MISSED_POLICIES)), file=sys.stderr)
+		return
+	if grace is None:
+		grace = DEFAULT_GRACE_SECONDS
+	elif grace.isdecimal():
+		grace = int(grace) * 60
+	else:
+		print("The grace window has to be a number of minutes, got {}".format(grace), file=sys.stderr)
+		return
+	try:
+		countdown = countdown_for() if refresh is None else countdown_for(refresh=float(refresh))
+	except ValueError:
+		print("The refresh has to be a positive number of seconds, got {}".format(refresh), file=sys.stderr)
+		return
+
+	if waveform is not None or sample_rate is not None or wavetable:
+		from console_alarm import synthesis
+		if waveform is not None and waveform not in synthesis.WAVEFORMS:
+			print("Unknown waveform {}, use one of {}".format(waveform, ", ".join(synthesis.WAVEFORMS)), file=sys.stderr)
+			return
+		if sample_rate is not None:
+			if not sample_rate.isdecimal() or int(sample_rate) == 0:
+				print("The sample rate has to be a positive number, got {}".format(sample_rate), file=sys.stderr)
+				return
+			sample_rate = int(sample_rate)
+		audio.configure_default_engine(sample_rate, waveform or 'sawtooth', wavetable=wavetable)
+
+	# Render the sound bank into the on-disk cache.
+	if len(sys_args) == 2 and sys_args[1] == '--build-sound-cache':
+		from console_alarm import sound_cache
+		count = sound_cache.build(sound_cache.BANK_FREQUENCIES, None, None if sample_rate is None else (sample_rate,))
+		print("Rendered {} sounds into {}".format(count, sound_cache.cache_directory()))
+		return
+
+	# Many alarms from a schedule file.
+	elif len(sys_args) == 3 and sys_args[1] == '--from-file':
+		from console_alarm import schedule_file
+		try:
+			schedule_file.run_file(sys_args[2], clock=clock, sink=sink, sound=sound)
+		except OSError as error:
+			print("Can't read {}: {}".format(sys_args[2], error.strerror or error), file=sys.stderr)
+			return
+
+	# The daemon and its client commands start with a word.
+	elif len(sys_args) > 1 and not sys_args[1].isnumeric():
+		from console_alarm import daemon
+		if not daemon.command_line(sys_args):
+			_print_help()
+		return
+
 	# If the user entered one numeric parameter.
-	if len(sys_args) == 2 and sys_args[1].isnumeric():
+	elif len(sys_args) == 2 and sys_args[1].isnumeric():
 
 		# Load the parameter as minutes.
 		arg_minutes = (int(sys_args[1]))
@@ -459,11 +948,13 @@ def console_script_entry_point(sys_args: List[str]):
 		if 1 <= arg_minutes < 1440:
 
 			# Start the pomodoro.
-			start_pomodoro(arg_minutes)
+			start_pomodoro(arg_minutes, clock=clock, sink=sink, sound=sound, controls=RingControls(), missed=missed,
+				grace=grace, countdown=countdown)
 
 		else:
 			# Else we tell the user how he can use this tool.
 			_print_help()
+			return
 
 	# If the user entered two numeric parameter.
 	elif len(sys_args) == 3 and sys_args[1].isnumeric() and sys_args[2].isnumeric():
@@ -476,15 +967,22 @@ def console_script_entry_point(sys_args: List[str]):
 		# Check if the hour and minute values are reasonable for a alarm clock time.
 		if arg_hour >= 0 or arg_hour < 24 or arg_minute >= 0 or arg_minute < 60:
 			# We start our alarm clock.
-			start_alarm_clock(arg_hour, arg_minute)
+			start_alarm_clock(arg_hour, arg_minute, clock=clock, sink=sink, sound=sound, controls=RingControls(),
+				missed=missed, grace=grace, countdown=countdown)
 		else:
 			# Else we let the user know how to use this tool.
 			_print_help()
+			return
 
 	# Else there where the wrong number of arguments or they had the wrong type.
 	else:
 		# Show the help text.
 		_print_help()
+		return
+
+	# Show how accurately the alarm fired.
+	if show_stats:
+		print(fire_stats.format())
 
 
 # If the module is run as a script.
@@ -0,0 +1,238 @@
+""" Stops a ringing alarm on a key press or a signal.
+
+Summary
+-------
+	While the alarm rings, RingControls waits for a key on the terminal or
+	for SIGUSR1 and SIGUSR2 in one background thread. The thread blocks in
+	a selector without a timeout, so it needs no CPU until something
+	happens, and stops the sound at once when it does.
+
+Routine Listings
+----------------
+	RingControls
+		Watches the keyboard and the signals while the alarm rings.
+
+	DISMISS
+		The action that ends the alarm.
+
+	SNOOZE
+		The action that ends the alarm and sets it again later.
+
+Notes
+-----
+	's' snoozes and every other key dismisses the alarm. SIGUSR1 dismisses
+	and SIGUSR2 snoozes it, e.g. `kill -USR2 <pid>` from a hotkey of the
+	window manager. The terminal is put into cbreak mode while the alarm
+	rings, so a key works without Enter, and is restored afterwards.
+
+	Signals are delivered with signal.set_wakeup_fd, which only works in
+	the main thread. Controls started in another thread only watch the
+	keyboard.
+"""
+
+import os
+import selectors
+import signal
+import sys
+import threading
+from typing import Callable, List, Optional, TextIO, Tuple
+
+# The actions of the controls.
+DISMISS = 'dismiss'
+SNOOZE = 'snooze'
+
+# How many minutes a snoozed alarm waits by default.
+SNOOZE_MINUTES = 5
+
+# The keys that snooze, every other key dismisses.
+SNOOZE_KEYS = b'sS'
+
+# The signals and their actions, where the os has them.
+SIGNAL_ACTIONS = {signal_number: action for signal_number, action in (
+	(getattr(signal, 'SIGUSR1', None), DISMISS),
+	(getattr(signal, 'SIGUSR2', None), SNOOZE),
+) if signal_number is not None}
+
+
+class RingControls:
+	""" Watches the keyboard and the signals while the alarm rings.
+
+	Parameters
+	----------
+	input_file : TextIO, optional
+		Where the keys are read from. Defaults to the standard input if it
+		is a terminal, else no keys are read.
+	snooze_minutes : int, default = SNOOZE_MINUTES
+		How long a snoozed alarm waits before it rings again.
+	signals : bool, default = True
+		Watch SIGUSR1 and SIGUSR2.
+
+	Attributes
+	----------
+	action : Optional[str]
+		DISMISS or SNOOZE if the last alarm was ended that way, None if it
+		rang until its end.
+
+	Example
+	-------
+	controls = RingControls()
+	controls.start(engine.stop)
+	try:
+		engine.ring(5)
+	finally:
+		controls.close()
+	"""
+
+	def __init__(self, input_file: Optional[TextIO] = None, *, snooze_minutes: int = SNOOZE_MINUTES,
+			signals: bool = True):
+		if input_file is None:
+			input_file = _terminal_input()
+		self.input_file = input_file
+		self.snooze_minutes = snooze_minutes
+		self.signals = signals
+		self.action: Optional[str] = None
+		self._thread: Optional[threading.Thread] = None
+		self._close_pipe: Optional[Tuple[int, int]] = None
+		self._signal_pipe: Optional[Tuple[int, int]] = None
+		self._old_handlers: List[Tuple[int, object]] = []
+		self._old_wakeup_fd: Optional[int] = None
+		self._old_terminal = None
+
+	@property
+	def has_keyboard(self) -> bool:
+		""" True if keys are read. """
+
+		return self.input_file is not None
+
+	def start(self, stop: Callable[[], None], /):
+		""" Starts watching and calls [stop] on the first key or signal.
+
+		Parameters
+		----------
+		stop : Callable[[], None]
+			Ends the ringing, e.g. AudioEngine.stop. Called from the thread
+			of the controls.
+		"""
+
+		self.close()
+		self.action = None
+
+		selector = selectors.DefaultSelector()
+		self._close_pipe = os.pipe()
+		selector.register(self._close_pipe[0], selectors.EVENT_READ, None)
+
+		if self.input_file is not None:
+			self._enter_cbreak()
+			selector.register(self.input_file.fileno(), selectors.EVENT_READ, 'key')
+
+		if self.signals and SIGNAL_ACTIONS and threading.current_thread() is threading.main_thread():
+			self._signal_pipe = os.pipe()
+			os.set_blocking(self._signal_pipe[1], False)
+			selector.register(self._signal_pipe[0], selectors.EVENT_READ, 'signal')
+			# The handler does nothing, the wakeup fd tells the thread which signal came.
+			for signal_number in SIGNAL_ACTIONS:
+				self._old_handlers.append((signal_number, signal.signal(signal_number, _ignore_signal)))
+			self._old_wakeup_fd = signal.set_wakeup_fd(self._signal_pipe[1])
+
+		self._thread = threading.Thread(target=self._watch, args=(selector, stop), daemon=True)
+		self._thread.start()
+
+	def close(self):
+		""" Stops watching and restores the terminal and the signal handlers. """
+
+		if self._thread is not None:
+			os.write(self._close_pipe[1], b'x')
+			self._thread.join()
+			self._thread = None
+
+		if self._signal_pipe is not None:
+			signal.set_wakeup_fd(self._old_wakeup_fd)
+			for signal_number, handler in self._old_handlers:
+				signal.signal(signal_number, handler)
+			self._old_handlers = []
+			_close_pipe(self._signal_pipe)
+			self._signal_pipe = None
+
+		if self._close_pipe is not None:
+			_close_pipe(self._close_pipe)
+			self._close_pipe = None
+
+		self._leave_cbreak()
+
+	def _watch(self, selector: selectors.BaseSelector, stop: Callable[[], None], /):
+		""" Blocks until a key, a signal or close and acts on the first one. """
+
+		with selector:
+			while True:
+				for key, _ in selector.select():
+					if key.data is None:
+						return
+
+					data = os.read(key.fd, 64)
+					if key.data == 'key':
+						if not data:
+							# The input was closed, only the signals are left.
+							selector.unregister(key.fd)
+							continue
+						self.action = SNOOZE if data[0] in SNOOZE_KEYS else DISMISS
+					else:
+						actions = [SIGNAL_ACTIONS[number] for number in data if number in SIGNAL_ACTIONS]
+						if not actions:
+							continue
+						self.action = actions[0]
+
+					stop()
+					return
+
+	def _enter_cbreak(self):
+		""" Lets single keys through without Enter, if the input is a terminal. """
+
+		try:
+			import termios
+			import tty
+		except ImportError:
+			return
+
+		try:
+			if not os.isatty(self.input_file.fileno()):
+				return
+			self._old_terminal = termios.tcgetattr(self.input_file.fileno())
+			tty.setcbreak(self.input_file.fileno())
+		except (OSError, termios.error):
+			self._old_terminal = None
+
+	def _leave_cbreak(self):
+		""" Restores the terminal mode from before start. """
+
+		if self._old_terminal is None:
+			return
+
+		import termios
+		try:
+			termios.tcsetattr(self.input_file.fileno(), termios.TCSADRAIN, self._old_terminal)
+		except (OSError, termios.error):
+			pass
+		self._old_terminal = None
+
+
+def _terminal_input() -> Optional[TextIO]:
+	""" Returns the standard input if it is a terminal. """
+
+	try:
+		if sys.stdin is not None and os.isatty(sys.stdin.fileno()):
+			return sys.stdin
+	except (AttributeError, OSError, ValueError):
+		# Replaced by something without a file descriptor, e.g. in tests.
+		pass
+	return None
+
+
+def _ignore_signal(signal_number: int, frame, /):
+	""" Keeps the signal from ending the process. """
+
+
+def _close_pipe(pipe: Tuple[int, int], /):
+	""" Closes both ends of [pipe]. """
+
+	for fd in pipe:
+		os.close(fd)
@@ -0,0 +1,279 @@
+""" Shows the time until the alarm rings.
+
+Summary
+-------
+	On a terminal the countdown is one line that is redrawn in place a few
+	times per second or less, see DEFAULT_REFRESH. Only the characters
+	from the first changed one on are written again, in one write per
+	update. Anywhere else, e.g. when a supervisor captures the output, the
+	countdown writes one compact JSON object per event instead.
+
+Routine Listings
+----------------
+	countdown_for
+		Returns the countdown that fits a stream.
+
+	TerminalCountdown
+		A single line countdown that is redrawn in place.
+
+	JsonCountdown
+		Writes the events of the alarm as JSON lines.
+
+	SilentCountdown
+		Shows nothing, e.g. for many alarms at once.
+
+Notes
+-----
+	The JSON events are, one per line:
+
+		{"event":"scheduled","alarm_time":1700000000.0}
+		{"event":"tick","remaining":540}
+		{"event":"missed","alarm_time":1700000000.0,"lateness":3120.0,"rung":false}
+		{"event":"fired","lateness":0.001}
+		{"event":"message","text":"Wake up!!! <3"}
+
+	alarm_time is in seconds since the epoch, remaining and lateness are
+	in seconds. A missed alarm that rings anyway, see
+	console_alarm.start_alarm_clock, is followed by a fired event. The
+	messages of the ringing alarm, e.g. that it was snoozed, are message
+	events, so the output stays JSON lines only.
+"""
+
+import json
+import math
+import sys
+from typing import Optional, TextIO
+
+# How many seconds pass between two redraws of the terminal countdown by default.
+DEFAULT_REFRESH = 1.0
+
+# How many seconds pass between two JSON tick events.
+TICK_INTERVAL = 60.0
+
+
+class TerminalCountdown:
+	""" A single line countdown that is redrawn in place.
+
+	Parameters
+	----------
+	stream : TextIO, optional
+		Where the countdown is drawn. Defaults to the standard output.
+	refresh : float, default = DEFAULT_REFRESH
+		How many seconds pass between two redraws.
+
+	Attributes
+	----------
+	interval : float
+		How long the waiting alarm sleeps between two ticks.
+
+	Example
+	-------
+	countdown = TerminalCountdown(refresh=0.5)
+	"""
+
+	def __init__(self, stream: Optional[TextIO] = None, *, refresh: float = DEFAULT_REFRESH):
+		if not refresh > 0:
+			raise ValueError
+		self.stream = stream
+		self.interval = refresh
+		self._line: Optional[str] = None
+
+	def scheduled(self, alarm_time: float, /):
+		""" Called once when the alarm starts waiting. The line is drawn by the first tick. """
+
+	def tick(self, remaining_seconds: float, /):
+		""" Redraws the line with [remaining_seconds] until the alarm. """
+
+		hours, seconds = divmod(math.ceil(remaining_seconds), 3600)
+		line = "Alarm starts in {:02d}:{:02d}:{:02d}".format(hours, *divmod(seconds, 60))
+
+		if self._line is None:
+			self._write(line)
+		elif line != self._line:
+			# Step back to the first changed character and draw from there.
+			start = next(index for index, (old, new) in enumerate(zip(self._line, line)) if old != new) \
+				if len(line) == len(self._line) else 0
+			self._write('\b' * (len(self._line) - start) + line[start:])
+		self._line = line
+
+	def missed(self, alarm_time: float, lateness: float, rung: bool, /):
+		""" Tells that the alarm time passed during a suspend. """
+
+		self._end_line()
+		if rung:
+			self._write("Missed alarm by {} seconds, ringing now\n".format(round(lateness)))
+		else:
+			self._write("Missed alarm! {} {}\n".format(alarm_time, alarm_time + lateness))
+
+	def fired(self, lateness: float, /):
+		""" Ends the line when the alarm rings. """
+
+		self._end_line()
+
+	def message(self, text: str, /):
+		""" Writes [text] on a line of its own. """
+
+		self._end_line()
+		self._write(text + '\n')
+
+	def close(self):
+		""" Ends the line if one is drawn. """
+
+		self._end_line()
+
+	def _end_line(self):
+		""" Moves to the next line, so the countdown stays visible. """
+
+		if self._line is not None:
+			self._write('\n')
+			self._line = None
+
+	def _write(self, text: str, /):
+		""" Writes [text] at once. """
+
+		stream = self.stream or sys.stdout
+		stream.write(text)
+		stream.flush()
+
+
+class JsonCountdown:
+	""" Writes the events of the alarm as JSON lines.
+
+	Parameters
+	----------
+	stream : TextIO, optional
+		Where the events are written. Defaults to the standard output.
+	tick_interval : float, default = TICK_INTERVAL
+		How many seconds pass between two tick events.
+
+	Attributes
+	----------
+	interval : float
+		How long the waiting alarm sleeps between two ticks.
+
+	Example
+	-------
+	countdown = JsonCountdown(sys.stderr)
+	"""
+
+	def __init__(self, stream: Optional[TextIO] = None, *, tick_interval: float = TICK_INTERVAL):
+		if not tick_interval > 0:
+			raise ValueError
+		self.stream = stream
+		self.interval = tick_interval
+
+	def scheduled(self, alarm_time: float, /):
+		""" Writes a scheduled event. """
+
+		self._write({'event': 'scheduled', 'alarm_time': alarm_time})
+
+	def tick(self, remaining_seconds: float, /):
+		""" Writes a tick event with the whole [remaining_seconds]. """
+
+		self._write({'event': 'tick', 'remaining': round(remaining_seconds)})
+
+	def missed(self, alarm_time: float, lateness: float, rung: bool, /):
+		""" Writes a missed event. """
+
+		self._write({'event': 'missed', 'alarm_time': alarm_time, 'lateness': round(lateness, 3), 'rung': rung})
+
+	def fired(self, lateness: float, /):
+		""" Writes a fired event. """
+
+		self._write({'event': 'fired', 'lateness': round(lateness, 6)})
+
+	def message(self, text: str, /):
+		""" Writes a message event with [text]. """
+
+		self._write({'event': 'message', 'text': text})
+
+	def close(self):
+		""" Nothing to finish, every event is a whole line. """
+
+	def _write(self, event: dict, /):
+		""" Writes [event] as one compact line. """
+
+		stream = self.stream or sys.stdout
+		stream.write(json.dumps(event, separators=(',', ':')) + '\n')
+		stream.flush()
+
+
+class SilentCountdown:
+	""" Shows nothing, e.g. for many alarms at once.
+
+	Thousands of alarms waiting together would otherwise redraw the same
+	terminal line or write a tick line each.
+
+	Attributes
+	----------
+	interval : float
+		How long the waiting alarm sleeps between two ticks.
+
+	Example
+	-------
+	countdown = SilentCountdown()
+	"""
+
+	interval = TICK_INTERVAL
+
+	def scheduled(self, alarm_time: float, /):
+		""" Does nothing. """
+
+	def tick(self, remaining_seconds: float, /):
+		""" Does nothing. """
+
+	def missed(self, alarm_time: float, lateness: float, rung: bool, /):
+		""" Does nothing. """
+
+	def fired(self, lateness: float, /):
+		""" Does nothing. """
+
+	def message(self, text: str, /):
+		""" Does nothing. """
+
+	def close(self):
+		""" Does nothing. """
+
+
+def countdown_for(stream: Optional[TextIO] = None, /, *, refresh: float = DEFAULT_REFRESH):
+	""" Returns the countdown that fits [stream].
+
+	Parameters
+	----------
+	stream : TextIO, optional
+		Where the countdown goes. Defaults to the standard output.
+	refresh : float, default = DEFAULT_REFRESH
+		How many seconds pass between two redraws on a terminal.
+
+	Returns
+	-------
+	TerminalCountdown or JsonCountdown
+		A TerminalCountdown if [stream] is a terminal, else a
+		JsonCountdown.
+
+	Raises
+	------
+	ValueError
+		If [refresh] isn't positive.
+
+	Example
+	-------
+	countdown = countdown_for()
+	"""
+
+	if not refresh > 0:
+		raise ValueError
+
+	if _is_terminal(stream or sys.stdout):
+		return TerminalCountdown(stream, refresh=refresh)
+	return JsonCountdown(stream)
+
+
+def _is_terminal(stream: TextIO, /) -> bool:
+	""" Checks if [stream] is a terminal. """
+
+	try:
+		return stream.isatty()
+	except (AttributeError, ValueError):
+		# Closed or without isatty.
+		return False
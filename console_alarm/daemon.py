@@ -0,0 +1,458 @@
+""" A long-running alarm daemon and its Unix socket clients.
+
+Summary
+-------
+	`console_alarm daemon` starts one process that owns an AlarmScheduler
+	and the audio engine. Thin clients add, list, cancel and snooze alarms
+	over a Unix domain socket, so every further alarm costs a few hundred
+	bytes in the daemon instead of a whole interpreter with its own audio
+	stack.
+
+Routine Listings
+----------------
+	AlarmDaemon
+		Serves the control protocol for a scheduler.
+
+	DaemonClient
+		Sends commands to a running daemon.
+
+	default_socket_path
+		Returns the socket path used when none is given.
+
+	command_line
+		Handles the daemon and client commands of the console script.
+
+Notes
+-----
+	The protocol is line based. Every request is one line of JSON, either
+	a command object or a list of command objects for a batch, and gets
+	one line of JSON back: the response object or the list of responses.
+
+		{"cmd": "add", "in": 1500}             -> {"ok": true, "id": 1, "at": 1700000000.0}
+		{"cmd": "add", "at": [14, 9, 0]}       -> {"ok": true, "id": 2, "at": 1700000540.0}
+		{"cmd": "list"}                        -> {"ok": true, "alarms": [{"id": 1, "at": ...}, ...]}
+		{"cmd": "cancel", "id": 1}             -> {"ok": true, "cancelled": true}
+		{"cmd": "snooze", "id": 2, "in": 300}  -> {"ok": true, "at": 1700000840.0}
+		{"cmd": "ping"}                        -> {"ok": true}
+
+	Failed commands answer {"ok": false, "error": "..."}. The times are
+	time.time() values. An add can carry "slack": 2 to let the alarm fire
+	up to 2 seconds early or late together with others, see
+	console_alarm.scheduler.
+"""
+
+import json
+import math
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Union
+from console_alarm.journal import TimerJournal
+from console_alarm.scheduler import AlarmScheduler, TimerHandle, _to_wall_time
+
+# The commands of the console script that talk to the daemon.
+CLIENT_COMMANDS = ('add', 'list', 'cancel', 'snooze')
+
+# The most seconds a client can set an alarm or a slack ahead, about a year.
+MAX_SECONDS = 366 * 24 * 60 * 60
+
+
+def default_socket_path() -> str:
+	""" Returns $XDG_RUNTIME_DIR/console_alarm.sock or a per user file in the temp directory. """
+
+	runtime_directory = os.environ.get('XDG_RUNTIME_DIR')
+	if runtime_directory and os.path.isdir(runtime_directory):
+		return os.path.join(runtime_directory, 'console_alarm.sock')
+	return os.path.join(tempfile.gettempdir(), 'console_alarm-{}.sock'.format(os.getuid()))
+
+
+class AlarmDaemon:
+	""" Serves the control protocol for a scheduler.
+
+	Parameters
+	----------
+	socket_path : str, optional
+		Where the daemon listens. Defaults to default_socket_path().
+	scheduler : AlarmScheduler, optional
+		The scheduler the commands act on. A new one, ringing the alarm
+		for every timer, is created if it isn't passed.
+
+	Raises
+	------
+	OSError
+		If another daemon already listens on [socket_path].
+
+	Example
+	-------
+	with AlarmDaemon() as daemon:
+		daemon.serve_forever()
+	"""
+
+	def __init__(self, socket_path: Optional[str] = None, scheduler: Optional[AlarmScheduler] = None):
+		self.socket_path = socket_path or default_socket_path()
+		self.scheduler = AlarmScheduler(_ring_alarm) if scheduler is None else scheduler
+		self._handles: Dict[int, TimerHandle] = {handle.id: handle for handle in self.scheduler.pending()}
+		self._lock = threading.Lock()
+
+		_remove_stale_socket(self.socket_path)
+		self._server = _Server(self.socket_path, _RequestHandler)
+		self._server.daemon = self
+
+	def __enter__(self) -> 'AlarmDaemon':
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def serve_forever(self, poll_interval: float = 0.5, /):
+		""" Starts the scheduler and answers clients until shutdown is called.
+
+		Parameters
+		----------
+		poll_interval : float, default = 0.5
+			How many seconds pass between two checks for a shutdown, at
+			most as long as shutdown takes.
+		"""
+
+		self.scheduler.start()
+		self._server.serve_forever(poll_interval)
+
+	def shutdown(self):
+		""" Stops serve_forever. Can be called from any other thread. """
+
+		self._server.shutdown()
+
+	def close(self):
+		""" Stops the scheduler, closes the socket and removes its file. """
+
+		self.scheduler.stop()
+		self._server.server_close()
+		try:
+			os.unlink(self.socket_path)
+		except FileNotFoundError:
+			pass
+
+	def handle_request(self, request: Union[dict, list], /) -> Union[dict, list]:
+		""" Answers one command or a batch of commands. """
+
+		if isinstance(request, list):
+			return [self._handle_command(command) for command in request]
+		return self._handle_command(request)
+
+	def _handle_command(self, command: dict, /) -> dict:
+		""" Answers one command object. """
+
+		try:
+			if not isinstance(command, dict):
+				raise ValueError("a command has to be an object")
+
+			name = command.get('cmd')
+			if name == 'add':
+				return self._add(command)
+			if name == 'list':
+				return {'ok': True, 'alarms': [{'id': handle.id,
+					'at': _to_wall_time(handle.deadline, self.scheduler.clock)} for handle in self.scheduler.pending()]}
+			if name == 'cancel':
+				return {'ok': True, 'cancelled': self.scheduler.cancel(self._handle(command))}
+			if name == 'snooze':
+				handle = self._handle(command)
+				self.scheduler.snooze(handle, _seconds(command, 'in'))
+				return {'ok': True, 'at': _to_wall_time(handle.deadline, self.scheduler.clock)}
+			if name == 'ping':
+				return {'ok': True}
+			raise ValueError("unknown command {!r}".format(name))
+
+		except (KeyError, TypeError, ValueError) as error:
+			return {'ok': False, 'error': str(error) or type(error).__name__}
+
+	def _add(self, command: dict, /) -> dict:
+		""" Schedules a new alarm, in seconds or at a time of day. """
+
+		slack = _seconds(command, 'slack') if 'slack' in command else 0.0
+		if 'at' in command:
+			handle = self.scheduler.schedule_at(*_time_of_day(command), slack=slack)
+		else:
+			handle = self.scheduler.schedule(_seconds(command, 'in'), slack=slack)
+
+		with self._lock:
+			# Forget the handles of fired and cancelled timers, so they don't pile up.
+			if len(self._handles) > 2 * len(self.scheduler) + 64:
+				self._handles = {timer_id: known for timer_id, known in self._handles.items() if known.pending}
+			self._handles[handle.id] = handle
+
+		return {'ok': True, 'id': handle.id, 'at': _to_wall_time(handle.deadline, self.scheduler.clock)}
+
+	def _handle(self, command: dict, /) -> TimerHandle:
+		""" Returns the handle of the alarm with the id of [command]. """
+
+		with self._lock:
+			handle = self._handles.get(command['id'])
+		if handle is None:
+			raise ValueError("unknown alarm {!r}".format(command['id']))
+		return handle
+
+
+def _seconds(command: dict, key: str, /) -> float:
+	""" Returns the seconds under [key] of [command].
+
+	Raises
+	------
+	ValueError
+		If they aren't a finite number between 0 and MAX_SECONDS. JSON
+		lets clients send Infinity and NaN, and the scheduler can't wait
+		that long.
+	"""
+
+	seconds = command[key]
+	if not isinstance(seconds, (int, float)) or isinstance(seconds, bool) \
+			or not 0 <= seconds <= MAX_SECONDS or math.isnan(seconds):
+		raise ValueError("{} has to be between 0 and {} seconds".format(key, MAX_SECONDS))
+	return seconds
+
+
+def _time_of_day(command: dict, /) -> list:
+	""" Returns the hour, minute and optional second under 'at' of [command].
+
+	Raises
+	------
+	ValueError
+		If they aren't a list of 2 or 3 whole numbers. Anything more would
+		be passed on to the scheduler as the callback of the timer.
+	"""
+
+	values = command['at']
+	if not isinstance(values, list) or not 2 <= len(values) <= 3 \
+			or not all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+		raise ValueError("at has to be [hour, minute] or [hour, minute, second]")
+	return values
+
+
+class DaemonClient:
+	""" Sends commands to a running daemon.
+
+	Parameters
+	----------
+	socket_path : str, optional
+		Where the daemon listens. Defaults to default_socket_path().
+
+	Raises
+	------
+	OSError
+		If no daemon listens on [socket_path].
+
+	Example
+	-------
+	with DaemonClient() as client:
+		alarm_id = client.add(25 * 60)['id']
+		client.snooze(alarm_id, 300)
+	"""
+
+	def __init__(self, socket_path: Optional[str] = None):
+		self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self._socket.connect(socket_path or default_socket_path())
+		self._file = self._socket.makefile('rwb')
+
+	def __enter__(self) -> 'DaemonClient':
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def close(self):
+		""" Closes the connection. """
+
+		self._file.close()
+		self._socket.close()
+
+	def request(self, request: Union[dict, list], /) -> Union[dict, list]:
+		""" Sends a command or a batch of commands and returns the answer. """
+
+		self._file.write(json.dumps(request).encode() + b'\n')
+		self._file.flush()
+		line = self._file.readline()
+		if not line:
+			raise ConnectionError("the daemon closed the connection")
+		return json.loads(line)
+
+	def batch(self, commands: List[dict], /) -> List[dict]:
+		""" Sends many commands in one round trip and returns their answers. """
+
+		return self.request(commands)
+
+	def add(self, seconds: float, /, *, slack: float = 0.0) -> dict:
+		""" Adds an alarm that rings in [seconds], give or take [slack] seconds. """
+
+		return self.request({'cmd': 'add', 'in': seconds, 'slack': slack})
+
+	def add_at(self, hour: int, minutes: int, seconds: int = 0, /, *, slack: float = 0.0) -> dict:
+		""" Adds an alarm that rings at the next given time of day, give or take [slack] seconds. """
+
+		return self.request({'cmd': 'add', 'at': [hour, minutes, seconds], 'slack': slack})
+
+	def list(self) -> List[dict]:
+		""" Returns the id and the time of every pending alarm. """
+
+		return self.request({'cmd': 'list'})['alarms']
+
+	def cancel(self, alarm_id: int, /) -> dict:
+		""" Cancels an alarm. """
+
+		return self.request({'cmd': 'cancel', 'id': alarm_id})
+
+	def snooze(self, alarm_id: int, seconds: float, /) -> dict:
+		""" Lets an alarm ring (again) in [seconds]. """
+
+		return self.request({'cmd': 'snooze', 'id': alarm_id, 'in': seconds})
+
+
+def command_line(sys_args: List[str], /) -> bool:
+	""" Handles the daemon and client commands of the console script.
+
+	Parameters
+	----------
+	sys_args : List[str]
+		The arguments the script was started with.
+
+	Returns
+	-------
+	bool
+		False if the arguments are no daemon or client command or if
+		they are malformed, so the caller can print the help.
+	"""
+
+	arguments = list(sys_args[1:])
+
+	# Take the options out of the arguments.
+	options = {}
+	for option in ('--socket', '--journal'):
+		if option in arguments:
+			index = arguments.index(option)
+			if index + 1 >= len(arguments):
+				return False
+			options[option] = arguments[index + 1]
+			del arguments[index:index + 2]
+
+	if not arguments:
+		return False
+
+	command, values = arguments[0], arguments[1:]
+	if not all(value.isnumeric() for value in values):
+		return False
+	numbers = [int(value) for value in values]
+
+	if command == 'daemon' and not numbers:
+		_run_daemon(options.get('--socket'), options.get('--journal'))
+		return True
+
+	if command not in CLIENT_COMMANDS:
+		return False
+
+	try:
+		with DaemonClient(options.get('--socket')) as client:
+			if command == 'add' and len(numbers) == 1:
+				answer = client.add(numbers[0] * 60)
+			elif command == 'add' and len(numbers) == 2:
+				answer = client.add_at(numbers[0], numbers[1])
+			elif command == 'list' and not numbers:
+				for alarm in client.list():
+					print("{:>6}  {}".format(alarm['id'], time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(alarm['at']))))
+				return True
+			elif command == 'cancel' and len(numbers) == 1:
+				answer = client.cancel(numbers[0])
+			elif command == 'snooze' and len(numbers) == 2:
+				answer = client.snooze(numbers[0], numbers[1] * 60)
+			else:
+				return False
+	except OSError:
+		print("No console_alarm daemon is running. Start one with 'console_alarm daemon'.", file=sys.stderr)
+		return True
+
+	if not answer['ok']:
+		print("Error:", answer['error'], file=sys.stderr)
+	elif 'id' in answer:
+		print("Alarm {} rings at {}".format(answer['id'], time.strftime('%H:%M:%S', time.localtime(answer['at']))))
+	elif 'at' in answer:
+		print("Alarm {} rings at {}".format(numbers[0], time.strftime('%H:%M:%S', time.localtime(answer['at']))))
+	else:
+		print("Cancelled" if answer['cancelled'] else "Nothing to cancel")
+	return True
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	""" A Unix socket server with one thread per client connection. """
+
+	daemon_threads = True
+	daemon: AlarmDaemon
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+	""" Answers the request lines of one client connection. """
+
+	def handle(self):
+		for line in self.rfile:
+			try:
+				answer = self.server.daemon.handle_request(json.loads(line))
+			except ValueError:
+				answer = {'ok': False, 'error': 'malformed request'}
+			self.wfile.write(json.dumps(answer).encode() + b'\n')
+			self.wfile.flush()
+
+
+def _run_daemon(socket_path: Optional[str], journal_path: Optional[str], /):
+	""" Runs a daemon in the foreground until it gets interrupted. """
+
+	journal = TimerJournal(journal_path) if journal_path else None
+	scheduler = AlarmScheduler(_ring_alarm, journal=journal)
+
+	# Bring back the alarms of the last run.
+	if journal is not None:
+		for timer_id, deadline in scheduler.recover():
+			print("Missed alarm {} at {}".format(timer_id, time.strftime('%H:%M:%S', time.localtime(deadline))))
+
+	with AlarmDaemon(socket_path, scheduler) as daemon:
+		print("console_alarm daemon listening on", daemon.socket_path)
+		try:
+			daemon.serve_forever()
+		except KeyboardInterrupt:
+			pass
+
+	if journal is not None:
+		journal.close()
+
+
+def _ring_alarm(handle: TimerHandle, /):
+	""" Starts ringing the alarm of [handle] for 5 seconds and returns at once. """
+
+	from console_alarm import console_alarm
+
+	print("Alarm", handle.id)
+	# The sound ends on its own, the scheduler thread goes on with the next timers.
+	console_alarm._start_ring(5)
+
+
+def _remove_stale_socket(socket_path: str, /):
+	""" Removes a socket file nobody listens on anymore.
+
+	Raises
+	------
+	OSError
+		If a daemon listens on [socket_path].
+	"""
+
+	if not os.path.exists(socket_path):
+		return
+
+	probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	try:
+		probe.connect(socket_path)
+	except OSError:
+		os.unlink(socket_path)
+		return
+	finally:
+		probe.close()
+
+	raise OSError("a console_alarm daemon already listens on {}".format(socket_path))
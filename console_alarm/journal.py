@@ -0,0 +1,247 @@
+""" A crash-safe journal of pending timers.
+
+Summary
+-------
+	The TimerJournal appends one fixed-size binary record per change of a
+	timer to a file: added, moved, cancelled or done. After a reboot, an
+	OOM kill or a closed terminal, replaying the file tells which timers
+	are still pending and which ones were missed while nothing was
+	running. The journal is compacted to the live timers when it is
+	mostly made of dead records.
+
+Routine Listings
+----------------
+	TimerJournal
+		Appends timer changes to a file and replays them.
+
+Notes
+-----
+	Every record is written with a single os.write call, so a killed
+	process loses at most the record it was writing. A torn record at the
+	end of the file is ignored and cut off on the next open. Pass
+	fsync=True to survive power loss as well, at the cost of a disk flush
+	per change.
+
+	Compaction writes the live timers into a temporary file and replaces
+	the journal with os.replace, which is atomic. The compacted journal
+	starts with an OP_MAX_ID record that keeps the biggest timer id ever
+	added, so ids aren't given out again after their timers are gone.
+"""
+
+import os
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Marks the start of a journal file, the last byte is the format version.
+MAGIC = b'CAJ\x01'
+
+# One record: operation, timer id and wall clock deadline.
+_RECORD = struct.Struct('<BQd')
+
+# The operations of the records.
+OP_ADD = 1
+OP_MOVE = 2
+OP_CANCEL = 3
+OP_DONE = 4
+# The biggest timer id ever added, written by the compaction.
+OP_MAX_ID = 5
+
+# The journal is compacted when it has more dead records than this and
+# more dead than live records.
+_MIN_DEAD_FOR_COMPACTION = 1024
+
+
+class TimerJournal:
+	""" Appends timer changes to a file and replays them.
+
+	Parameters
+	----------
+	path : str
+		The journal file. It is created if it doesn't exist.
+	fsync : bool, default = False
+		Flush every record to the disk.
+
+	Raises
+	------
+	ValueError
+		If the file exists but isn't a timer journal.
+
+	Example
+	-------
+	with TimerJournal('~/.console_alarm.journal') as journal:
+		pending, missed = journal.recover()
+	"""
+
+	def __init__(self, path: str, fsync: bool = False):
+		self.path = os.path.expanduser(path)
+		self.fsync = fsync
+		self._lock = threading.Lock()
+		self._timers: Dict[int, float] = {}
+		self._max_id = 0
+		self._records = 0
+		self._fd: Optional[int] = None
+		self._open()
+
+	def __enter__(self) -> 'TimerJournal':
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def __len__(self) -> int:
+		""" Returns how many timers are pending in the journal. """
+
+		return len(self._timers)
+
+	@property
+	def max_id(self) -> int:
+		""" The biggest timer id ever recorded in the journal, 0 if it is empty.
+
+		Fired, cancelled and compacted timers count as well, so new ids
+		above it are never reused.
+		"""
+
+		return self._max_id
+
+	def add(self, timer_id: int, deadline: float, /):
+		""" Records a new timer that fires at the time.time() value [deadline]. """
+
+		self._append(OP_ADD, timer_id, deadline)
+
+	def move(self, timer_id: int, deadline: float, /):
+		""" Records a new deadline of a timer, e.g. after a snooze. """
+
+		self._append(OP_MOVE, timer_id, deadline)
+
+	def cancel(self, timer_id: int, /):
+		""" Records that a timer got cancelled. """
+
+		self._append(OP_CANCEL, timer_id, 0.0)
+
+	def done(self, timer_id: int, /):
+		""" Records that a timer fired or that its miss was handled. """
+
+		self._append(OP_DONE, timer_id, 0.0)
+
+	def pending(self) -> List[Tuple[int, float]]:
+		""" Returns the id and the deadline of every pending timer, ordered by deadline. """
+
+		with self._lock:
+			return sorted(self._timers.items(), key=lambda timer: timer[1])
+
+	def recover(self, now: Optional[float] = None, /) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]:
+		""" Splits the pending timers into the ones still to come and the missed ones.
+
+		Parameters
+		----------
+		now : float, optional
+			The time.time() value to compare the deadlines with.
+
+		Returns
+		-------
+		Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]
+			The upcoming and the missed timers as (id, deadline) pairs,
+			each ordered by deadline. Missed timers stay in the journal
+			until done is recorded for them.
+		"""
+
+		if now is None:
+			now = time.time()
+
+		pending = self.pending()
+		return ([timer for timer in pending if timer[1] >= now],
+			[timer for timer in pending if timer[1] < now])
+
+	def compact(self):
+		""" Rewrites the journal with one record per pending timer. """
+
+		with self._lock:
+			self._compact()
+
+	def close(self):
+		""" Closes the journal file. """
+
+		with self._lock:
+			if self._fd is not None:
+				os.close(self._fd)
+				self._fd = None
+
+	def _open(self):
+		""" Replays the journal file and opens it for appending. """
+
+		data = b''
+		if os.path.exists(self.path):
+			with open(self.path, 'rb') as journal_file:
+				data = journal_file.read()
+
+		if data and not data.startswith(MAGIC):
+			raise ValueError("{} is not a timer journal".format(self.path))
+
+		# Replay the complete records, a torn one at the end is ignored.
+		body_size = (len(data) - len(MAGIC)) // _RECORD.size * _RECORD.size if data else 0
+		timers = self._timers
+		max_id = 0
+		for operation, timer_id, deadline in _RECORD.iter_unpack(data[len(MAGIC):len(MAGIC) + body_size]):
+			if timer_id > max_id:
+				max_id = timer_id
+			if operation == OP_ADD or operation == OP_MOVE:
+				timers[timer_id] = deadline
+			elif operation != OP_MAX_ID:
+				timers.pop(timer_id, None)
+		self._max_id = max_id
+		self._records = body_size // _RECORD.size
+
+		self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+		if not data:
+			os.write(self._fd, MAGIC)
+		else:
+			# Cut off a torn record.
+			os.ftruncate(self._fd, len(MAGIC) + body_size)
+		os.lseek(self._fd, 0, os.SEEK_END)
+
+	def _append(self, operation: int, timer_id: int, deadline: float, /):
+		""" Writes one record and updates the pending timers. """
+
+		with self._lock:
+			if self._fd is None:
+				raise ValueError("the journal is closed")
+
+			os.write(self._fd, _RECORD.pack(operation, timer_id, deadline))
+			if self.fsync:
+				os.fsync(self._fd)
+			self._records += 1
+			if timer_id > self._max_id:
+				self._max_id = timer_id
+
+			if operation == OP_ADD or operation == OP_MOVE:
+				self._timers[timer_id] = deadline
+			else:
+				self._timers.pop(timer_id, None)
+
+			# Compact when most records belong to dead timers.
+			dead = self._records - len(self._timers)
+			if dead > _MIN_DEAD_FOR_COMPACTION and dead > len(self._timers):
+				self._compact()
+
+	def _compact(self):
+		""" Rewrites the journal with one record per pending timer. Needs the lock. """
+
+		temporary_path = self.path + '.tmp'
+		# Only the user may read the journal, like the one it replaces.
+		descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+		with open(descriptor, 'wb') as journal_file:
+			journal_file.write(MAGIC)
+			journal_file.write(_RECORD.pack(OP_MAX_ID, self._max_id, 0.0))
+			journal_file.write(b''.join(_RECORD.pack(OP_ADD, timer_id, deadline)
+				for timer_id, deadline in self._timers.items()))
+			journal_file.flush()
+			os.fsync(journal_file.fileno())
+
+		# Swap the files atomically and continue appending to the new one.
+		os.replace(temporary_path, self.path)
+		if self._fd is not None:
+			os.close(self._fd)
+		self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+		self._records = len(self._timers) + 1
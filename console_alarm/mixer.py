@@ -0,0 +1,291 @@
+""" Mixes many ringing alarms into one output stream.
+
+Summary
+-------
+	The SoftwareMixer sums the buffers of all ringing alarms into one block
+	of samples at a time with NumPy. Every alarm is a Voice with its own
+	volume and priority. The sum is scaled down by a fixed headroom and
+	only peaks above a knee are bent softly towards full scale, so a few
+	alarms keep their level and dozens of them don't wrap around.
+
+Routine Listings
+----------------
+	SoftwareMixer
+		Sums the voices into blocks of 16 bit samples.
+
+	Voice
+		One alarm playing in a SoftwareMixer.
+
+Notes
+-----
+	Voices playing the same buffer, e.g. the alarm pattern of many alarms,
+	are mixed together with one gather and one matrix product. The NumPy
+	calls per block grow with the number of different buffers, not with
+	the number of voices, and the voices are capped by max_voices, so the
+	work of a block has a fixed upper bound however many alarms are set.
+	See benchmarks/bench_mixer.py for the numbers.
+
+	When all voices are taken, a new voice replaces the one with the
+	lowest priority, the oldest one of those. If every playing voice has a
+	higher priority than the new one, the new voice is dropped and
+	finished at once.
+"""
+
+import itertools
+import threading
+from typing import Dict, List, Optional
+import numpy
+
+# How many samples one block has. About 23 ms at 44100 Hz.
+BLOCK_FRAMES = 1024
+
+# How many voices can play at once.
+MAX_VOICES = 64
+
+# How far the sum is scaled down, in dB. Two full scale voices fit without clipping.
+HEADROOM_DB = -6.0
+
+# Where the soft clipping starts, as a part of full scale.
+CLIP_KNEE = 0.8
+
+# The scale of 16 bit samples.
+_FULL_SCALE = 32768.0
+
+
+class Voice:
+	""" One alarm playing in a SoftwareMixer.
+
+	Create voices with SoftwareMixer.add.
+
+	Attributes
+	----------
+	volume : float
+		The gain of the voice, 1.0 plays the buffer as it is. Changes are
+		heard from the next block on.
+	priority : int
+		Voices with a higher priority are kept when all voices are taken.
+	finished : threading.Event
+		Set when the voice ended, was stopped or was replaced.
+	"""
+
+	__slots__ = ('volume', 'priority', 'finished', '_mixer', '_table', '_position', '_remaining', '_order')
+
+	def __init__(self, mixer: 'SoftwareMixer', table: numpy.ndarray, volume: float, priority: int,
+			frames: Optional[int], order: int, /):
+		self.volume = volume
+		self.priority = priority
+		self.finished = threading.Event()
+		self._mixer = mixer
+		self._table = table
+		self._position = 0
+		self._remaining = frames
+		self._order = order
+
+	def stop(self):
+		""" Stops the voice. Does nothing if it already finished. """
+
+		self._mixer.remove(self)
+
+
+class SoftwareMixer:
+	""" Sums the voices into blocks of 16 bit samples.
+
+	Parameters
+	----------
+	block_frames : int, default = BLOCK_FRAMES
+		How many samples mix returns.
+	max_voices : int, default = MAX_VOICES
+		How many voices can play at once.
+	headroom_db : float, default = HEADROOM_DB
+		The gain of the sum in dB, 0 or less.
+	knee : float, default = CLIP_KNEE
+		Where the soft clipping starts, between 0 and 1.
+
+	Attributes
+	----------
+	clipped_samples : int
+		How many samples were bent by the soft clipping so far.
+	dropped_voices : int
+		How many voices were replaced or not played because all voices
+		were taken.
+
+	Raises
+	------
+	ValueError
+		If a parameter is out of its range.
+
+	Example
+	-------
+	mixer = SoftwareMixer()
+	voice = mixer.add(samples, volume=0.5, priority=1, frames=5 * 44100)
+	block = mixer.mix()
+	"""
+
+	def __init__(self, *, block_frames: int = BLOCK_FRAMES, max_voices: int = MAX_VOICES,
+			headroom_db: float = HEADROOM_DB, knee: float = CLIP_KNEE):
+		if block_frames < 1 or max_voices < 1 or headroom_db > 0 or not 0 < knee < 1:
+			raise ValueError
+
+		self.block_frames = block_frames
+		self.max_voices = max_voices
+		self.clipped_samples = 0
+		self.dropped_voices = 0
+		self._gain = numpy.float32(10 ** (headroom_db / 20) / _FULL_SCALE)
+		self._knee = knee
+		self._frame_index = numpy.arange(block_frames)
+		self._voices: List[Voice] = []
+		# The float copies of the played buffers, by the id of the buffer.
+		self._tables: Dict[int, tuple] = {}
+		self._order = itertools.count()
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		""" Returns the number of playing voices. """
+
+		return len(self._voices)
+
+	def add(self, samples: numpy.ndarray, /, *, volume: float = 1.0, priority: int = 0,
+			frames: Optional[int] = None) -> Voice:
+		""" Starts playing [samples] in a loop.
+
+		Parameters
+		----------
+		samples : numpy.ndarray
+			The mono 16 bit samples to play. Pass the same array for every
+			alarm with the same sound, so they are mixed together.
+		volume : float, default = 1.0
+			The gain of the voice.
+		priority : int, default = 0
+			Voices with a higher priority are kept when all voices are
+			taken.
+		frames : int, optional
+			How many samples the voice plays before it finishes. Plays
+			until it is stopped by default.
+
+		Returns
+		-------
+		Voice
+			The playing voice, or a finished one if it was dropped.
+
+		Raises
+		------
+		ValueError
+			If [samples] is empty or not mono, or [volume] is negative.
+		"""
+
+		if samples.ndim != 1 or not len(samples) or not volume >= 0:
+			raise ValueError
+
+		with self._lock:
+			# Convert every buffer only once, while it plays.
+			entry = self._tables.get(id(samples))
+			if entry is None or entry[0] is not samples:
+				entry = (samples, samples.astype(numpy.float32))
+				self._tables[id(samples)] = entry
+
+			voice = Voice(self, entry[1], volume, priority, frames, next(self._order))
+
+			if len(self._voices) >= self.max_voices:
+				victim = min(self._voices, key=lambda playing: (playing.priority, playing._order))
+				self.dropped_voices += 1
+				if victim.priority > priority:
+					# Every playing voice is more important.
+					self._prune_tables()
+					voice.finished.set()
+					return voice
+				self._voices.remove(victim)
+				victim.finished.set()
+
+			self._voices.append(voice)
+			return voice
+
+	def remove(self, voice: Voice, /):
+		""" Stops [voice]. Does nothing if it already finished. """
+
+		with self._lock:
+			if voice in self._voices:
+				self._voices.remove(voice)
+				self._prune_tables()
+			voice.finished.set()
+
+	def clear(self):
+		""" Stops all voices. """
+
+		with self._lock:
+			for voice in self._voices:
+				voice.finished.set()
+			self._voices.clear()
+			self._tables.clear()
+
+	def mix(self) -> numpy.ndarray:
+		""" Returns the next block of the sum of all voices.
+
+		Returns
+		-------
+		numpy.ndarray
+			block_frames 16 bit samples, silence if no voice plays.
+		"""
+
+		mixed = numpy.zeros(self.block_frames, dtype=numpy.float32)
+
+		with self._lock:
+			groups: Dict[int, List[Voice]] = {}
+			for voice in self._voices:
+				groups.setdefault(id(voice._table), []).append(voice)
+
+			for group in groups.values():
+				table = group[0]._table
+				positions = numpy.array([voice._position for voice in group])
+				gains = numpy.array([voice.volume for voice in group], dtype=numpy.float32)
+
+				# One row of samples per voice, wrapping around the end of the buffer.
+				rows = table[(positions[:, None] + self._frame_index) % len(table)]
+
+				ending = [voice._remaining if voice._remaining is not None and voice._remaining < self.block_frames
+					else self.block_frames for voice in group]
+				if min(ending) < self.block_frames:
+					# Silence the voices after their last sample.
+					rows *= self._frame_index < numpy.array(ending)[:, None]
+				mixed += gains @ rows
+
+			self._advance()
+
+		mixed *= self._gain
+		return self._clip(mixed)
+
+	def _advance(self):
+		""" Moves every voice to its next block and drops the finished ones. """
+
+		playing = []
+		for voice in self._voices:
+			voice._position = (voice._position + self.block_frames) % len(voice._table)
+			if voice._remaining is not None:
+				voice._remaining -= self.block_frames
+				if voice._remaining <= 0:
+					voice.finished.set()
+					continue
+			playing.append(voice)
+
+		if len(playing) != len(self._voices):
+			self._voices = playing
+			self._prune_tables()
+
+	def _prune_tables(self):
+		""" Forgets the float copies no voice plays anymore. """
+
+		used = {id(voice._table) for voice in self._voices}
+		self._tables = {key: entry for key, entry in self._tables.items() if id(entry[1]) in used}
+
+	def _clip(self, mixed: numpy.ndarray, /) -> numpy.ndarray:
+		""" Bends the peaks of [mixed] above the knee into full scale and converts it to 16 bit. """
+
+		knee = self._knee
+		over = numpy.abs(mixed) > knee
+		clipped = int(numpy.count_nonzero(over))
+		if clipped:
+			self.clipped_samples += clipped
+			peaks = mixed[over]
+			# tanh stays below 1, so the bent peaks never go past full scale.
+			bent = knee + (1 - knee) * numpy.tanh((numpy.abs(peaks) - knee) / (1 - knee))
+			mixed[over] = numpy.copysign(bent, peaks)
+		return (mixed * (_FULL_SCALE - 1)).astype(numpy.int16)
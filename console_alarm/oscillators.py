@@ -0,0 +1,141 @@
+""" Vectorized oscillators for the alarm sounds.
+
+Summary
+-------
+	Every oscillator turns an array of phases into one sample per phase in
+	the range -1 to 1 with whole-array NumPy operations. The square and
+	the band-limited saw smooth their jumps with polyBLEP, so they don't
+	alias into audible whistles, even at the low sample rates of small
+	hosts.
+
+Routine Listings
+----------------
+	generate
+		Returns the samples of a waveform for an array of phases.
+
+	phases
+		Returns the phases of a note at a sample rate.
+
+	OSCILLATORS
+		The oscillator functions by waveform name.
+
+	SAMPLE_RATES
+		The sample rates the oscillators are tuned and tested for.
+
+Notes
+-----
+	A phase counts periods: 0 is the start of a period, 1 the start of the
+	next one. The increment is how far the phase moves per sample, the
+	frequency divided by the sample rate. polyBLEP needs it to know how
+	wide a jump has to be smoothed.
+
+	The triangle has no jumps and its harmonics fall off with 12 dB per
+	octave, so it is generated directly. The 'sawtooth' of
+	console_alarm.synthesis is the original, aliasing sawtooth and is not
+	rendered here.
+"""
+
+from typing import Callable, Dict
+import numpy
+
+# The sample rates the oscillators are tuned and tested for, from small
+# embedded hosts to CD quality.
+SAMPLE_RATES = (8000, 16000, 22050, 44100)
+
+
+def phases(frequency: float, sample_rate: int, sample_count: int, /) -> numpy.ndarray:
+	""" Returns the phases of [sample_count] samples of a note, starting at 0. """
+
+	# Multiply the indices instead of summing increments, so there is no drift.
+	return (numpy.arange(sample_count, dtype=numpy.float64) * (frequency / sample_rate)) % 1.0
+
+
+def generate(waveform: str, phase: numpy.ndarray, increment: float, /) -> numpy.ndarray:
+	""" Returns the samples of a waveform for an array of phases.
+
+	Parameters
+	----------
+	waveform : str
+		One of OSCILLATORS.
+	phase : numpy.ndarray
+		The phases of the samples, each between 0 and 1.
+	increment : float
+		How far the phase moves per sample.
+
+	Returns
+	-------
+	numpy.ndarray
+		float64 samples between -1 and 1.
+
+	Raises
+	------
+	ValueError
+		If [waveform] is unknown.
+
+	Example
+	-------
+	generate('sine', phases(440, 8000, 8000), 440 / 8000)
+	"""
+
+	oscillator = OSCILLATORS.get(waveform)
+	if oscillator is None:
+		raise ValueError
+	return oscillator(phase, increment)
+
+
+def _sine(phase: numpy.ndarray, increment: float, /) -> numpy.ndarray:
+	""" A pure tone. """
+
+	return numpy.sin(2 * numpy.pi * phase)
+
+
+def _triangle(phase: numpy.ndarray, increment: float, /) -> numpy.ndarray:
+	""" Rises from -1 to 1 in the first half of the period and falls back in the second. """
+
+	return 1 - 4 * numpy.abs(phase - 0.5)
+
+
+def _square(phase: numpy.ndarray, increment: float, /) -> numpy.ndarray:
+	""" 1 in the first half of the period, -1 in the second, with smoothed jumps. """
+
+	samples = numpy.where(phase < 0.5, 1.0, -1.0)
+	samples += _poly_blep(phase, increment)
+	samples -= _poly_blep((phase + 0.5) % 1.0, increment)
+	return samples
+
+
+def _bandlimited_saw(phase: numpy.ndarray, increment: float, /) -> numpy.ndarray:
+	""" Rises from -1 to 1 over the period, with a smoothed jump back. """
+
+	return 2 * phase - 1 - _poly_blep(phase, increment)
+
+
+def _poly_blep(phase: numpy.ndarray, increment: float, /) -> numpy.ndarray:
+	""" Returns the polyBLEP correction for a jump from 1 to -1 at phase 0.
+
+	Only the samples within one increment of the jump get a correction, a
+	two sample polynomial that replaces the hard step.
+	"""
+
+	correction = numpy.zeros_like(phase)
+
+	# Just after the jump.
+	after = phase < increment
+	x = phase[after] / increment
+	correction[after] = 2 * x - x * x - 1
+
+	# Just before the jump.
+	before = phase > 1 - increment
+	x = (phase[before] - 1) / increment
+	correction[before] = x * x + 2 * x + 1
+
+	return correction
+
+
+# The oscillator functions by waveform name.
+OSCILLATORS: Dict[str, Callable[[numpy.ndarray, float], numpy.ndarray]] = {
+	'sine': _sine,
+	'square': _square,
+	'triangle': _triangle,
+	'bandlimited_saw': _bandlimited_saw,
+}
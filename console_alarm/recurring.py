@@ -0,0 +1,256 @@
+""" Recurring alarms from cron-style schedule expressions.
+
+Summary
+-------
+	A RecurringSchedule compiles an expression like '0 9 * * 1-5' (weekdays
+	at 09:00) or '*/25 9-17 * * mon-fri' (minutes 0, 25 and 50 during work
+	hours) once into bit masks and lookup tables. Finding the next fire
+	time then takes a table lookup for the minute and the hour and a mask
+	test per day, instead of checking every minute until one matches.
+
+Routine Listings
+----------------
+	RecurringSchedule
+		A compiled cron-style schedule.
+
+Notes
+-----
+	The five fields are minute, hour, day of month, month and day of week,
+	as in crontab(5). Every field takes *, numbers, ranges like 1-5, steps
+	like */15 or 9-17/2 and lists of those separated by commas. Months and
+	days of the week can be given by their first three letters, Sunday is
+	0 or 7. If both the day of month and the day of week are restricted, a
+	day matches if either of them does. @hourly, @daily, @midnight, @weekly,
+	@monthly, @yearly and @annually work as well.
+
+	The seconds until the next fire time are counted like
+	console_alarm._calc_secs_to_time counts them: on the local clock face,
+	from the current second, and never for the current minute itself. A
+	daily schedule 'm h * * *' gives the same seconds as
+	_calc_secs_to_time(h, m).
+"""
+
+import datetime
+import time
+from typing import List, Optional, Tuple
+from console_alarm.clock import system_clock
+
+# The shortcuts for often used schedules.
+SHORTCUTS = {
+	'@hourly': '0 * * * *',
+	'@daily': '0 0 * * *',
+	'@midnight': '0 0 * * *',
+	'@weekly': '0 0 * * 0',
+	'@monthly': '0 0 1 * *',
+	'@yearly': '0 0 1 1 *',
+	'@annually': '0 0 1 1 *',
+}
+
+# The name, the smallest and the biggest value of every field.
+_FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day of month', 1, 31), ('month', 1, 12), ('day of week', 0, 7))
+
+# The names that can be used instead of numbers.
+_MONTH_NAMES = {name: number for number, name in enumerate(
+	('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+_DAY_NAMES = {name: number for number, name in enumerate(('sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'))}
+
+# The most days of every month, with the 29th of February.
+_MONTH_DAYS = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+class RecurringSchedule:
+	""" A compiled cron-style schedule.
+
+	Parameters
+	----------
+	expression : str
+		The schedule, see the notes of the module.
+
+	Attributes
+	----------
+	expression : str
+		The schedule as it was passed.
+
+	Raises
+	------
+	ValueError
+		If [expression] is malformed or matches no day at all, like
+		'0 0 30 2 *'.
+
+	Example
+	-------
+	weekdays = RecurringSchedule('0 9 * * 1-5')
+	seconds = weekdays.secs_until()
+	"""
+
+	__slots__ = ('expression', '_minutes', '_hours', '_days', '_months', '_weekdays', '_either_day',
+		'_next_minute', '_next_hour')
+
+	def __init__(self, expression: str, /):
+		self.expression = expression
+
+		fields = SHORTCUTS.get(expression.strip().lower(), expression).split()
+		if len(fields) != 5:
+			raise ValueError("a schedule needs 5 fields, got {!r}".format(expression))
+
+		minutes, hours, days, months, weekdays = (_parse_field(field, *limits) for field, limits in zip(fields, _FIELDS))
+
+		# Sunday is 0 and 7.
+		if weekdays & 1 << 7:
+			weekdays = (weekdays | 1) & ~(1 << 7)
+
+		# Like cron, a day has to match both day fields if one of them
+		# starts with *, else it has to match only one of them.
+		self._either_day = not (fields[2].startswith('*') or fields[4].startswith('*'))
+
+		self._minutes = minutes
+		self._hours = hours
+		self._days = days
+		self._months = months
+		self._weekdays = weekdays
+
+		# The smallest allowed value at or after every value, -1 if there is none.
+		self._next_minute = _next_table(minutes, 60)
+		self._next_hour = _next_table(hours, 24)
+
+		if not self._either_day and not any(months & 1 << month and days & (1 << month_days + 1) - 1
+				for month, month_days in enumerate(_MONTH_DAYS, 1)):
+			raise ValueError("the schedule {!r} never fires".format(expression))
+
+	def __repr__(self) -> str:
+		return "RecurringSchedule({!r})".format(self.expression)
+
+	def matches_day(self, date: datetime.date, /) -> bool:
+		""" Checks if the schedule fires on [date]. """
+
+		return bool(self._months & 1 << date.month) and self._matches_day_of_month(date)
+
+	def next_time(self, year: int, month: int, day: int, hour: int, minute: int, /) -> Tuple[int, int, int, int, int]:
+		""" Returns the first fire time after the given minute.
+
+		Parameters
+		----------
+		year, month, day, hour, minute : int
+			The local time to start from. It is never returned itself.
+
+		Returns
+		-------
+		Tuple[int, int, int, int, int]
+			The year, month, day, hour and minute of the next fire time.
+		"""
+
+		date = datetime.date(year, month, day)
+		if self.matches_day(date):
+			# Later in the current hour.
+			if self._hours & 1 << hour:
+				next_minute = self._next_minute[minute + 1]
+				if next_minute >= 0:
+					return year, month, day, hour, next_minute
+
+			# Later on the current day.
+			next_hour = self._next_hour[hour + 1]
+			if next_hour >= 0:
+				return year, month, day, next_hour, self._next_minute[0]
+
+		return (*self._next_day(date), self._next_hour[0], self._next_minute[0])
+
+	def secs_until(self, now: Optional[time.struct_time] = None, /, *, clock=None) -> int:
+		""" Calculates the seconds until the schedule fires next.
+
+		Parameters
+		----------
+		now : time.struct_time, optional
+			The local time to count from. Defaults to the local time of [clock].
+		clock : SystemClock or VirtualClock, optional
+			The clock to read the time from. Defaults to
+			console_alarm.clock.system_clock.
+
+		Returns
+		-------
+		int
+			Seconds remaining until the next fire time, at least 1.
+
+		Example
+		-------
+		RecurringSchedule('0 9 * * 1-5').secs_until()
+		"""
+
+		if now is None:
+			now = (clock or system_clock).localtime()
+
+		year, month, day, hour, minute = self.next_time(now.tm_year, now.tm_mon, now.tm_mday, now.tm_hour, now.tm_min)
+
+		# Count on the clock face, like _calc_secs_to_time does.
+		days = datetime.date(year, month, day).toordinal() - datetime.date(now.tm_year, now.tm_mon, now.tm_mday).toordinal()
+		return days*86400 + (hour - now.tm_hour)*3600 + (minute - now.tm_min)*60 - now.tm_sec
+
+	def _next_day(self, date: datetime.date, /) -> Tuple[int, int, int]:
+		""" Returns the first day after [date] the schedule fires on. """
+
+		# Only every day of an allowed month has to be tested, leap days
+		# recur at least every 8 years.
+		one_day = datetime.timedelta(days=1)
+		date += one_day
+		while True:
+			if not self._months & 1 << date.month:
+				# Skip to the first day of the next month.
+				date = datetime.date(date.year + date.month // 12, date.month % 12 + 1, 1)
+				continue
+			if self._matches_day_of_month(date):
+				return date.year, date.month, date.day
+			date += one_day
+
+	def _matches_day_of_month(self, date: datetime.date, /) -> bool:
+		""" Checks the day of month and the day of week of [date], not the month. """
+
+		if self._either_day:
+			return bool(self._days & 1 << date.day or self._weekdays & 1 << date.isoweekday() % 7)
+		return bool(self._days & 1 << date.day and self._weekdays & 1 << date.isoweekday() % 7)
+
+
+def _parse_field(field: str, name: str, minimum: int, maximum: int, /) -> int:
+	""" Returns the bit mask of the values allowed by the field [name]. """
+
+	names = _MONTH_NAMES if name == 'month' else _DAY_NAMES if name == 'day of week' else {}
+
+	mask = 0
+	for part in field.lower().split(','):
+		values, _, step = part.partition('/')
+		step = _parse_value(step, 1, maximum, {}) if step else 1
+
+		if values == '*':
+			first, last = minimum, maximum
+		elif '-' in values:
+			first, last = (_parse_value(value, minimum, maximum, names) for value in values.split('-', 1))
+			if first > last:
+				raise ValueError("the range {!r} runs backwards".format(values))
+		else:
+			first = _parse_value(values, minimum, maximum, names)
+			last = maximum if step > 1 else first
+
+		for value in range(first, last + 1, step):
+			mask |= 1 << value
+
+	return mask
+
+
+def _parse_value(value: str, minimum: int, maximum: int, names: dict, /) -> int:
+	""" Returns one value of a field. """
+
+	if value in names:
+		return names[value]
+	if not value.isdecimal() or not minimum <= int(value) <= maximum:
+		raise ValueError("{!r} has to be a number between {} and {}".format(value, minimum, maximum))
+	return int(value)
+
+
+def _next_table(mask: int, size: int, /) -> List[int]:
+	""" Returns the smallest value in [mask] at or after every value up to [size]. """
+
+	table = [-1] * (size + 1)
+	next_value = -1
+	for value in range(size - 1, -1, -1):
+		if mask & 1 << value:
+			next_value = value
+		table[value] = next_value
+	return table
@@ -0,0 +1,238 @@
+""" Loads many alarms at once from a schedule file.
+
+Summary
+-------
+	`console_alarm --from-file schedule.csv` schedules every alarm of a
+	file, or of the standard input with `-`, in one process. Every row is
+	one alarm: one value is a pomodoro in minutes, two or three values are
+	the hour, the minute and optionally the second of an alarm clock.
+
+		# Shift breaks
+		10,30
+		12,0
+		15,15,30
+		25
+
+Routine Listings
+----------------
+	read_alarms
+		Parses alarm rows as a stream.
+
+	schedule_file
+		Schedules every alarm of a file.
+
+	run_file
+		Schedules every alarm of a file and rings them.
+
+Notes
+-----
+	The rows are parsed one at a time while they are read, so the parser
+	needs the same memory for ten rows and for ten million. Only the
+	scheduled timers themselves stay in memory. Blank rows and rows
+	starting with # are skipped. Bad rows are reported and skipped, the
+	rest of the file still gets scheduled.
+
+	run_file rings the alarms on a few threads of their own, so a ringing
+	alarm doesn't hold up the scheduler thread and the alarms after it.
+"""
+
+import concurrent.futures
+import csv
+import sys
+import threading
+import traceback
+from typing import Callable, Iterable, Iterator, Optional, TextIO, Tuple
+from console_alarm import console_alarm
+from console_alarm.clock import system_clock
+from console_alarm.scheduler import AlarmScheduler, TimerHandle
+
+# How many alarms of a file ring at the same time at most.
+MAX_RINGING = 16
+
+
+def read_alarms(lines: Iterable[str], /, *, clock=None,
+		on_error: Optional[Callable[[int, str], None]] = None) -> Iterator[Tuple[int, float]]:
+	""" Parses alarm rows as a stream.
+
+	Parameters
+	----------
+	lines : Iterable[str]
+		The rows, e.g. an open file.
+	clock : SystemClock or VirtualClock, optional
+		The clock the seconds until an alarm clock time are calculated
+		with. Defaults to console_alarm.clock.system_clock.
+	on_error : Callable[[int, str], None], optional
+		Called with the line number and the reason for every bad row.
+		Defaults to printing both to stderr.
+
+	Returns
+	-------
+	Iterator[Tuple[int, float]]
+		The line number of every valid row with the seconds until its
+		alarm rings, counted from the current fraction of a second.
+
+	Example
+	-------
+	for line_number, seconds in read_alarms(open('schedule.csv')):
+		scheduler.schedule(seconds)
+	"""
+
+	if on_error is None:
+		on_error = _print_error
+
+	# csv.reader keeps the line number of the row it returned last.
+	reader = csv.reader(lines)
+	for row in reader:
+		values = [value.strip() for value in row]
+		if not any(values) or values[0].startswith('#'):
+			continue
+
+		try:
+			yield reader.line_num, _to_seconds(values, clock)
+		except (TypeError, ValueError) as error:
+			on_error(reader.line_num, str(error) or "invalid value in {!r}".format(','.join(row)))
+
+
+def schedule_file(lines: Iterable[str], scheduler: AlarmScheduler, /, *, clock=None,
+		on_error: Optional[Callable[[int, str], None]] = None,
+		callback: Optional[Callable[[TimerHandle], None]] = None) -> int:
+	""" Schedules every alarm of a file.
+
+	Parameters
+	----------
+	lines : Iterable[str]
+		The rows, see read_alarms.
+	scheduler : AlarmScheduler
+		The scheduler the alarms are added to.
+	clock : SystemClock or VirtualClock, optional
+		See read_alarms. The alarms are scheduled on this clock as well.
+	on_error : Callable[[int, str], None], optional
+		See read_alarms.
+	callback : Callable[[TimerHandle], None], optional
+		Called when an alarm fires. Defaults to the default callback of
+		[scheduler].
+
+	Returns
+	-------
+	int
+		How many alarms were scheduled.
+	"""
+
+	count = 0
+	for _, seconds in read_alarms(lines, clock=clock, on_error=on_error):
+		scheduler.schedule(seconds, callback)
+		count += 1
+	return count
+
+
+def run_file(path: str, /, *, clock=None, sink: Optional[Callable[[int], None]] = None,
+		sound: Optional[str] = None) -> int:
+	""" Schedules every alarm of a file and rings them.
+
+	Returns when the last alarm has rung.
+
+	Parameters
+	----------
+	path : str
+		The schedule file, '-' for the standard input.
+	clock : SystemClock or VirtualClock, optional
+		See read_alarms. The alarms are scheduled on this clock as well.
+	sink : Callable[[int], None], optional
+		Called with the ring duration in seconds instead of ring.
+	sound : str, optional
+		A WAV file to ring with, see console_alarm.ring.
+
+	Returns
+	-------
+	int
+		How many alarms rang.
+
+	Raises
+	------
+	OSError
+		If the file can't be read.
+	"""
+
+	scheduled = 0
+	rung = 0
+	condition = threading.Condition()
+
+	def ring():
+		nonlocal rung
+
+		# Count a failed ring as well, so the wait for the last one ends.
+		try:
+			if sink is None:
+				console_alarm.ring(5, sound=sound)
+			else:
+				sink(5)
+		except Exception:
+			traceback.print_exc()
+		finally:
+			with condition:
+				rung += 1
+				condition.notify()
+
+	with concurrent.futures.ThreadPoolExecutor(MAX_RINGING, thread_name_prefix='ring') as ringers, \
+			AlarmScheduler(lambda handle: ringers.submit(ring), clock=clock) as scheduler:
+		# Alarms of a slowly streamed file may ring while it is still read.
+		with _open(path) as lines:
+			for _, seconds in read_alarms(lines, clock=clock):
+				with condition:
+					scheduler.schedule(seconds)
+					scheduled += 1
+
+		print("Scheduled {} alarms".format(scheduled))
+
+		with condition:
+			condition.wait_for(lambda: rung == scheduled)
+
+	return scheduled
+
+
+def _to_seconds(values: list, clock, /) -> float:
+	""" Returns the seconds until the alarm of one row rings. """
+
+	if len(values) > 3:
+		raise ValueError("expected 1 to 3 values, got {}".format(len(values)))
+
+	numbers = []
+	for value in values:
+		if not value.isdecimal():
+			raise ValueError("{!r} is not a whole number".format(value))
+		numbers.append(int(value))
+
+	# One value is a pomodoro.
+	if len(numbers) == 1:
+		_check_range(numbers[0], 1, 1439, 'minutes')
+		return numbers[0] * 60
+
+	# Two or three values are an alarm clock time.
+	for number, maximum, name in zip(numbers, (23, 59, 59), ('hour', 'minute', 'second')):
+		_check_range(number, 0, maximum, name)
+	clock = clock or system_clock
+	return console_alarm._calc_alarm_time(*numbers, clock=clock) - clock.time()
+
+
+def _check_range(value: int, minimum: int, maximum: int, name: str, /):
+	""" Checks [value] like console_alarm._is_in_range with a readable message. """
+
+	try:
+		console_alarm._is_in_range(value, minimum, maximum)
+	except ValueError:
+		raise ValueError("{} has to be between {} and {}, got {}".format(name, minimum, maximum, value)) from None
+
+
+def _open(path: str, /) -> TextIO:
+	""" Opens the schedule file or the standard input for '-'. """
+
+	if path == '-':
+		# Don't close the standard input when the file is done.
+		return open(sys.stdin.fileno(), newline='', closefd=False)
+	return open(path, newline='')
+
+
+def _print_error(line_number: int, reason: str, /):
+	""" Reports a bad row on stderr. """
+
+	print("Line {}: {}, skipped".format(line_number, reason), file=sys.stderr)
@@ -0,0 +1,619 @@
+""" A scheduler for many alarms at once.
+
+Summary
+-------
+	Keeps any number of timers in a priority queue and fires them from one
+	background thread. The thread sleeps until the earliest deadline and is
+	only woken early when a new timer becomes the earliest one.
+
+Routine Listings
+----------------
+	AlarmScheduler
+		Schedules, cancels and snoozes timers.
+
+	TimerHandle
+		Handle of a scheduled timer.
+
+Notes
+-----
+	Adding and snoozing a timer costs O(log n). Cancelling only marks the
+	heap entry as stale, stale entries are skipped when they reach the top
+	and the heap is rebuilt when more than half of it is stale.
+
+	Callbacks run one after another on the scheduler thread, so they
+	should return quickly. A slow callback delays the following timers,
+	which shows in their lateness. The default callback only starts the
+	ring and returns.
+
+	Recurring timers from schedule_recurring are pushed again with their
+	next deadline whenever they fire, so they cost one heap entry each.
+
+	A timer with slack may fire up to [slack] seconds before or after its
+	deadline. The heap is ordered by the latest time a timer may fire, so
+	the thread sleeps as long as it can. A second heap, of the timers with
+	slack only, is ordered by the earliest time. Whenever the thread wakes
+	up for a timer, it fires all timers whose window is open, too, so
+	timers close to each other share one wakeup instead of waking the CPU
+	one by one. wakeups and wakeups_saved count how well that works.
+
+	With a VirtualClock the thread doesn't sleep until the next deadline
+	but moves the clock forward to it, so tests run hours of timers in no
+	time.
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import traceback
+from typing import Callable, List, Optional, Tuple, Union
+from console_alarm.clock import VirtualClock, system_clock
+from console_alarm.journal import TimerJournal
+from console_alarm.recurring import RecurringSchedule
+from console_alarm.stats import FireRecord, FireStats, fire_stats
+
+# The heap is rebuilt when it has more stale entries than this and more
+# stale than live entries.
+_MIN_STALE_FOR_REBUILD = 64
+
+
+class TimerHandle:
+	""" Handle of a timer scheduled with an AlarmScheduler.
+
+	Attributes
+	----------
+	id : int
+		The unique number of the timer.
+	deadline : float
+		The monotonic value of the clock of the scheduler at which the timer
+		fires.
+	callback : Callable[[TimerHandle], None]
+		What gets called when the timer fires.
+	cancelled : bool
+		True after the timer got cancelled.
+	fired : bool
+		True after the timer fired. Recurring timers never are.
+	schedule : Optional[RecurringSchedule]
+		The schedule of a recurring timer, None for a one-shot timer.
+	slack : float
+		How many seconds before or after [deadline] the timer may fire.
+	"""
+
+	__slots__ = ('id', 'deadline', 'callback', 'cancelled', 'fired', 'schedule', 'slack', '_scheduler', '_version')
+
+	def __init__(self, scheduler: 'AlarmScheduler', timer_id: int, deadline: float,
+			callback: Callable[['TimerHandle'], None], slack: float = 0.0, /):
+		self.id = timer_id
+		self.deadline = deadline
+		self.callback = callback
+		self.cancelled = False
+		self.fired = False
+		self.schedule = None
+		self.slack = slack
+		self._scheduler = scheduler
+		self._version = 0
+
+	@property
+	def pending(self) -> bool:
+		""" True while the timer waits for its deadline. """
+
+		return not (self.cancelled or self.fired)
+
+	def cancel(self) -> bool:
+		""" Cancels the timer. See AlarmScheduler.cancel. """
+
+		return self._scheduler.cancel(self)
+
+	def snooze(self, seconds: float, /):
+		""" Lets the timer fire again in [seconds]. See AlarmScheduler.snooze. """
+
+		self._scheduler.snooze(self, seconds)
+
+	def __repr__(self) -> str:
+		state = 'cancelled' if self.cancelled else 'fired' if self.fired else 'pending'
+		return "TimerHandle(id={}, deadline={:.3f}, {})".format(self.id, self.deadline, state)
+
+
+class AlarmScheduler:
+	""" Schedules, cancels and snoozes timers fired by one background thread.
+
+	Parameters
+	----------
+	default_callback : Callable[[TimerHandle], None], optional
+		Called for timers that were scheduled without their own callback.
+		If it isn't set, those timers start ringing the alarm for 5
+		seconds.
+	stats : FireStats, optional
+		Where the timing of every fired timer gets recorded. Defaults to
+		console_alarm.stats.fire_stats.
+	journal : TimerJournal, optional
+		Where every change of a timer gets written to, so the timers can
+		be recovered after a restart. See recover.
+	clock : SystemClock or VirtualClock, optional
+		The clock to read the time from and to sleep with. Defaults to
+		console_alarm.clock.system_clock.
+
+	Attributes
+	----------
+	wakeups : int
+		How often the thread woke up and fired timers.
+	wakeups_saved : int
+		How many timers fired early, within their slack, at the wakeup
+		of another timer instead of their own.
+
+	Example
+	-------
+	with AlarmScheduler() as scheduler:
+		handle = scheduler.schedule_at(14, 9)
+		scheduler.snooze(handle, 300)
+	"""
+
+	def __init__(self, default_callback: Optional[Callable[[TimerHandle], None]] = None,
+			stats: Optional[FireStats] = None, journal: Optional[TimerJournal] = None, *, clock=None):
+		self.default_callback = default_callback
+		self.clock = clock or system_clock
+		self.stats = fire_stats if stats is None else stats
+		self.journal = journal
+		self.wakeups = 0
+		self.wakeups_saved = 0
+		self._heap: List[tuple] = []
+		# The entries of the timers with slack, by the earliest time they may fire.
+		self._early: List[tuple] = []
+		self._stale = 0
+		self._ids = itertools.count(1 if journal is None else journal.max_id + 1)
+		self._condition = threading.Condition()
+		self._thread: Optional[threading.Thread] = None
+		self._stopped = False
+
+	def __enter__(self) -> 'AlarmScheduler':
+		self.start()
+		return self
+
+	def __exit__(self, *exc_info):
+		self.stop()
+
+	def __len__(self) -> int:
+		""" Returns how many timers are pending. """
+
+		with self._condition:
+			return len(self._heap) - self._stale
+
+	def start(self):
+		""" Starts the background thread. Does nothing if it already runs. """
+
+		with self._condition:
+			if self._thread is not None and self._thread.is_alive():
+				return
+			self._stopped = False
+			self._thread = threading.Thread(target=self._run, name='AlarmScheduler', daemon=True)
+			self._thread.start()
+
+	def stop(self, wait: bool = True, /):
+		""" Stops the background thread. Pending timers are kept.
+
+		Parameters
+		----------
+		wait : bool, default = True
+			Wait until the thread has finished its current callbacks.
+		"""
+
+		with self._condition:
+			self._stopped = True
+			self._condition.notify()
+			thread = self._thread
+
+		if wait and thread is not None and thread is not threading.current_thread():
+			thread.join()
+
+	def schedule(self, seconds: float, /, callback: Optional[Callable[[TimerHandle], None]] = None, *,
+			slack: float = 0.0) -> TimerHandle:
+		""" Schedules a timer that fires in [seconds].
+
+		Parameters
+		----------
+		seconds : float
+			In how many seconds the timer fires.
+		callback : Callable[[TimerHandle], None], optional
+			Called with the handle when the timer fires. Defaults to the
+			default callback of the scheduler.
+		slack : float, default = 0.0
+			How many seconds before or after its deadline the timer may
+			fire, so it can share a wakeup with other timers.
+
+		Returns
+		-------
+		TimerHandle
+			The handle to cancel or snooze the timer with.
+
+		Raises
+		------
+		ValueError
+			If [seconds] or [slack] is negative or not finite.
+
+		TypeError
+			If [seconds] or [slack] is not int or float.
+
+		Example
+		-------
+		scheduler.schedule(25 * 60, slack=2)
+		"""
+
+		_check_seconds(seconds)
+		_check_seconds(slack)
+
+		with self._condition:
+			handle = TimerHandle(self, next(self._ids), self.clock.monotonic() + seconds,
+				callback or self.default_callback or _ring_alarm, slack)
+			self._push(handle)
+			if self.journal is not None:
+				self.journal.add(handle.id, _to_wall_time(handle.deadline, self.clock))
+			return handle
+
+	def schedule_at(self, hour: int, minutes: int, seconds: int = 0, /,
+			callback: Optional[Callable[[TimerHandle], None]] = None, *, slack: float = 0.0) -> TimerHandle:
+		""" Schedules a timer that fires at the next given time of day.
+
+		Parameters
+		----------
+		hour : int
+			The hour value of the alarm time.
+		minutes : int
+			The minute value of the alarm time.
+		seconds : int, default = 0
+			The seconds of the alarm time.
+		callback : Callable[[TimerHandle], None], optional
+			Called with the handle when the timer fires.
+		slack : float, default = 0.0
+			How many seconds before or after the time the timer may fire.
+
+		Returns
+		-------
+		TimerHandle
+			The handle to cancel or snooze the timer with.
+
+		Raises
+		------
+		ValueError
+			If [hour] isn't between 0 and 23 or [minutes] or [seconds]
+			aren't between 0 and 59.
+
+		TypeError
+			If one of the time parameters is not int.
+
+		See Also
+		--------
+		console_alarm.start_alarm_clock
+
+		Example
+		-------
+		scheduler.schedule_at(14, 9)
+		"""
+
+		from console_alarm import console_alarm
+
+		# Check if parameters are in range.
+		console_alarm._is_in_range(hour, 0, 23)
+		console_alarm._is_in_range(minutes, 0, 59)
+		console_alarm._is_in_range(seconds, 0, 59)
+
+		# Count from the current fraction of a second, like start_alarm_clock,
+		# or the timer fires up to a second late.
+		alarm_time = console_alarm._calc_alarm_time(hour, minutes, seconds, clock=self.clock)
+		return self.schedule(max(alarm_time - self.clock.time(), 0.0), callback=callback, slack=slack)
+
+	def schedule_recurring(self, schedule: Union[str, RecurringSchedule], /,
+			callback: Optional[Callable[[TimerHandle], None]] = None, *, slack: float = 0.0) -> TimerHandle:
+		""" Schedules a timer that fires again and again on a cron-style schedule.
+
+		The timer stays pending after it fired, with its deadline moved to
+		the next fire time, until it gets cancelled. Recurring timers are
+		not written to the journal.
+
+		Parameters
+		----------
+		schedule : str or RecurringSchedule
+			The schedule, e.g. '0 9 * * 1-5' for weekdays at 09:00. See
+			console_alarm.recurring.
+		callback : Callable[[TimerHandle], None], optional
+			Called with the handle every time the timer fires.
+		slack : float, default = 0.0
+			How many seconds before or after every fire time the timer may
+			fire.
+
+		Returns
+		-------
+		TimerHandle
+			The handle to cancel or snooze the timer with.
+
+		Raises
+		------
+		ValueError
+			If [schedule] is malformed or [slack] is negative or not finite.
+
+		Example
+		-------
+		scheduler.schedule_recurring('*/25 9-17 * * mon-fri')
+		"""
+
+		_check_seconds(slack)
+		if isinstance(schedule, str):
+			schedule = RecurringSchedule(schedule)
+
+		with self._condition:
+			handle = TimerHandle(self, next(self._ids), _next_fire(schedule, self.clock.monotonic(), self.clock),
+				callback or self.default_callback or _ring_alarm, slack)
+			handle.schedule = schedule
+			self._push(handle)
+			return handle
+
+	def cancel(self, handle: TimerHandle, /) -> bool:
+		""" Cancels a timer.
+
+		Parameters
+		----------
+		handle : TimerHandle
+			The handle of the timer.
+
+		Returns
+		-------
+		bool
+			True if the timer was pending, False if it already fired or
+			was cancelled before.
+		"""
+
+		with self._condition:
+			if not handle.pending:
+				return False
+
+			handle.cancelled = True
+			self._mark_stale()
+			if self.journal is not None and handle.schedule is None:
+				self.journal.cancel(handle.id)
+			return True
+
+	def snooze(self, handle: TimerHandle, seconds: float, /):
+		""" Lets a timer fire (again) in [seconds].
+
+		Works for pending timers, which get moved, and for fired timers,
+		which get scheduled again.
+
+		Parameters
+		----------
+		handle : TimerHandle
+			The handle of the timer.
+		seconds : float
+			In how many seconds the timer fires.
+
+		Raises
+		------
+		ValueError
+			If the timer was cancelled or [seconds] is negative or not finite.
+
+		TypeError
+			If [seconds] is not int or float.
+		"""
+
+		_check_seconds(seconds)
+
+		with self._condition:
+			if handle.cancelled:
+				raise ValueError
+
+			# The old heap entry of a pending timer becomes stale.
+			if handle.pending:
+				self._mark_stale()
+
+			handle.fired = False
+			handle.deadline = self.clock.monotonic() + seconds
+			handle._version += 1
+			self._push(handle)
+			if self.journal is not None and handle.schedule is None:
+				self.journal.move(handle.id, _to_wall_time(handle.deadline, self.clock))
+
+	def recover(self, callback: Optional[Callable[[TimerHandle], None]] = None, /) -> List[Tuple[int, float]]:
+		""" Schedules the pending timers of the journal again.
+
+		Timers whose deadline passed while nothing was running are not
+		scheduled but returned, and marked as done in the journal. Call
+		it once, right after creating the scheduler. The journal has no
+		slack, so recovered timers fire at their deadline.
+
+		Parameters
+		----------
+		callback : Callable[[TimerHandle], None], optional
+			Called when a recovered timer fires. Defaults to the default
+			callback of the scheduler.
+
+		Returns
+		-------
+		List[Tuple[int, float]]
+			The id and the time.time() deadline of every missed timer.
+
+		Raises
+		------
+		ValueError
+			If the scheduler has no journal.
+		"""
+
+		if self.journal is None:
+			raise ValueError
+
+		upcoming, missed = self.journal.recover(self.clock.time())
+
+		with self._condition:
+			for timer_id, deadline in upcoming:
+				handle = TimerHandle(self, timer_id, _to_monotonic_time(deadline, self.clock),
+					callback or self.default_callback or _ring_alarm)
+				self._push(handle)
+
+		for timer_id, _ in missed:
+			self.journal.done(timer_id)
+
+		return missed
+
+	def pending(self) -> List[TimerHandle]:
+		""" Returns the pending timers ordered by their deadline. """
+
+		with self._condition:
+			return sorted((entry[2] for entry in self._heap if _is_live(entry)),
+				key=lambda handle: (handle.deadline, handle.id))
+
+	def _push(self, handle: TimerHandle, /):
+		""" Pushes [handle] onto the heaps. Needs the lock. """
+
+		heapq.heappush(self._heap, (handle.deadline + handle.slack, handle.id, handle, handle._version))
+		if handle.slack:
+			heapq.heappush(self._early, (handle.deadline - handle.slack, handle.id, handle, handle._version))
+
+		# Only wake the thread if it has to sleep for a shorter time now.
+		if self._heap[0][2] is handle:
+			self._condition.notify()
+
+	def _mark_stale(self):
+		""" Counts a stale heap entry and rebuilds the heap if needed. Needs the lock. """
+
+		self._stale += 1
+		if self._stale > _MIN_STALE_FOR_REBUILD and self._stale * 2 > len(self._heap):
+			self._heap = [entry for entry in self._heap if _is_live(entry)]
+			heapq.heapify(self._heap)
+			self._early = [entry for entry in self._early if _is_live(entry)]
+			heapq.heapify(self._early)
+			self._stale = 0
+
+	def _pop_due(self, due: List[Tuple[TimerHandle, float]], /) -> Optional[float]:
+		""" Moves the due timers with their deadlines from the heap into [due]. Needs the lock.
+
+		Recurring timers are pushed again with their next deadline. If a
+		timer is due, the timers with slack whose window is open are due
+		as well.
+
+		Returns
+		-------
+		Optional[float]
+			0 if there are due timers, else the seconds until the next
+			deadline or None if there is no pending timer.
+		"""
+
+		now = self.clock.monotonic()
+		while self._heap:
+			deadline, _, handle, version = self._heap[0]
+
+			# Skip the entries of cancelled or snoozed timers.
+			if not _is_live(self._heap[0]):
+				heapq.heappop(self._heap)
+				self._stale -= 1
+				continue
+
+			if deadline > now:
+				break
+
+			heapq.heappop(self._heap)
+			self._take(handle, now, due)
+
+		if not due:
+			return self._heap[0][0] - now if self._heap else None
+
+		# Share this wakeup with the timers that may fire already.
+		while self._early and self._early[0][0] <= now:
+			entry = heapq.heappop(self._early)
+			if _is_live(entry):
+				# Its entry on the main heap becomes stale.
+				self._stale += 1
+				self._take(entry[2], now, due)
+				self.wakeups_saved += 1
+
+		self.wakeups += 1
+		return 0
+
+	def _take(self, handle: TimerHandle, now: float, due: List[Tuple[TimerHandle, float]], /):
+		""" Adds [handle] to [due] and marks it fired or pushes its next deadline. Needs the lock. """
+
+		due.append((handle, handle.deadline))
+		if handle.schedule is None:
+			handle.fired = True
+		else:
+			# A timer with slack can fire before its deadline. The fire times
+			# are whole minutes, so counting from a second after the deadline
+			# skips the one that just fired.
+			handle.deadline = _next_fire(handle.schedule, now if now >= handle.deadline else handle.deadline + 1, self.clock)
+			handle._version += 1
+			self._push(handle)
+
+	def _run(self):
+		""" The loop of the background thread. """
+
+		while True:
+			due: List[Tuple[TimerHandle, float]] = []
+			with self._condition:
+				while not self._stopped:
+					timeout = self._pop_due(due)
+					if timeout == 0:
+						break
+					if timeout is not None and isinstance(self.clock, VirtualClock):
+						# Jump to the next deadline instead of sleeping.
+						self.clock.wait(timeout)
+						continue
+					# Longer waits overflow, the thread wakes up and sleeps again instead.
+					self._condition.wait(None if timeout is None else min(timeout, threading.TIMEOUT_MAX))
+
+				if self._stopped:
+					return
+
+			# Run the callbacks without holding the lock, so they can
+			# schedule, cancel and snooze timers.
+			clock_offset = self.clock.time() - self.clock.monotonic()
+			for handle, deadline in due:
+				# Record how late the timer fires, in wall clock time, right
+				# before its callback, so slow callbacks before it count.
+				now = self.clock.monotonic()
+				self.stats.record(FireRecord(deadline + clock_offset, now + clock_offset, now - deadline))
+				if self.journal is not None and handle.schedule is None:
+					self.journal.done(handle.id)
+
+				try:
+					handle.callback(handle)
+				except Exception:
+					traceback.print_exc()
+
+
+def _ring_alarm(handle: TimerHandle, /):
+	""" Starts ringing the alarm for 5 seconds and returns at once, so the next timers aren't held up. """
+
+	from console_alarm import console_alarm
+	console_alarm._start_ring(5)
+
+
+def _next_fire(schedule: RecurringSchedule, now: float, clock=system_clock, /) -> float:
+	""" Returns the monotonic value of [clock] at the next fire time of [schedule] after [now]. """
+
+	# The schedule counts whole seconds from the current local time.
+	wall_time = _to_wall_time(now, clock)
+	return now - wall_time % 1 + schedule.secs_until(clock.localtime(wall_time))
+
+
+def _to_wall_time(deadline: float, clock=system_clock, /) -> float:
+	""" Converts a monotonic value of [clock] into a wall clock value. """
+
+	return deadline + clock.time() - clock.monotonic()
+
+
+def _to_monotonic_time(deadline: float, clock=system_clock, /) -> float:
+	""" Converts a wall clock value of [clock] into a monotonic value. """
+
+	return deadline - clock.time() + clock.monotonic()
+
+
+def _is_live(entry: tuple, /) -> bool:
+	""" Checks if a heap entry still belongs to a pending timer. """
+
+	handle = entry[2]
+	return handle.pending and handle._version == entry[3]
+
+
+def _check_seconds(seconds: float, /):
+	""" Checks if [seconds] is a finite, non-negative number. """
+
+	if not isinstance(seconds, (int, float)) or isinstance(seconds, bool):
+		raise TypeError
+	if not 0 <= seconds < math.inf:
+		raise ValueError
@@ -0,0 +1,201 @@
+""" An on-disk cache of rendered alarm sounds.
+
+Summary
+-------
+	`console_alarm --build-sound-cache` renders a bank of notes and the
+	alarm pattern in every waveform, with a pool of processes and writes
+	each buffer to its own .npy file. Later processes map those files into
+	memory instead of synthesizing the sounds again, so even a cold
+	process has its sounds at once.
+
+Routine Listings
+----------------
+	build
+		Renders the sound bank into the cache in parallel.
+
+	load_note
+		Maps a cached note into memory.
+
+	load_ring_pattern
+		Maps a cached alarm pattern into memory.
+
+	cache_directory
+		Returns the directory of the current cache format.
+
+Notes
+-----
+	The files live in $XDG_CACHE_HOME/console_alarm/v<FORMAT_VERSION>,
+	~/.cache if XDG_CACHE_HOME isn't set. Bump FORMAT_VERSION whenever the
+	rendered samples or the file layout change: the old directory is then
+	ignored and removed by the next build.
+
+	Every file is written to a temporary name and renamed, so a reader
+	never maps a half written buffer. Missing or broken files just return
+	None, the caller renders the sound itself then.
+"""
+
+import os
+import shutil
+from typing import Iterable, List, Optional, Tuple
+
+# The version of the cached samples and files.
+FORMAT_VERSION = 2
+
+# The notes of the bank: the equal-tempered scale from C-4 to C-6.
+BANK_FREQUENCIES = tuple(round(261.626 * 2 ** (step / 12), 3) for step in range(25))
+
+
+def cache_directory(root: Optional[str] = None, /) -> str:
+	""" Returns the directory of the current cache format.
+
+	Parameters
+	----------
+	root : str, optional
+		The directory all cache formats live in. Defaults to
+		$XDG_CACHE_HOME/console_alarm.
+	"""
+
+	if root is None:
+		cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+		root = os.path.join(cache_home, 'console_alarm')
+	return os.path.join(root, 'v{}'.format(FORMAT_VERSION))
+
+
+def build(frequencies: Iterable[float] = BANK_FREQUENCIES, waveforms: Optional[Iterable[str]] = None,
+		sample_rates: Optional[Iterable[int]] = None, /, *, root: Optional[str] = None,
+		workers: Optional[int] = None) -> int:
+	""" Renders the sound bank into the cache in parallel.
+
+	Parameters
+	----------
+	frequencies : Iterable[float], default = BANK_FREQUENCIES
+		The notes to render.
+	waveforms : Iterable[str], optional
+		The waveforms to render every note in. Defaults to
+		synthesis.WAVEFORMS.
+	sample_rates : Iterable[int], optional
+		The sample rates to render. Defaults to synthesis.SAMPLE_RATE.
+	root : str, optional
+		See cache_directory.
+	workers : int, optional
+		How many processes render at once. Defaults to the number of CPUs.
+
+	Returns
+	-------
+	int
+		How many sounds were written.
+
+	Example
+	-------
+	build()
+	"""
+
+	import concurrent.futures
+	from console_alarm import audio, synthesis
+
+	waveforms = synthesis.WAVEFORMS if waveforms is None else tuple(waveforms)
+	sample_rates = (synthesis.SAMPLE_RATE,) if sample_rates is None else tuple(sample_rates)
+
+	directory = cache_directory(root)
+	os.makedirs(directory, exist_ok=True)
+	_remove_old_versions(os.path.dirname(directory))
+
+	# One job per buffer: every note in every waveform and the alarm patterns.
+	jobs: List[Tuple] = [(directory, 'note', frequency, waveform, sample_rate)
+		for sample_rate in sample_rates for waveform in waveforms for frequency in frequencies]
+	jobs += [(directory, 'ring', (audio.NOTE_C4, audio.NOTE_G4), waveform, sample_rate)
+		for sample_rate in sample_rates for waveform in waveforms]
+
+	with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+		return sum(executor.map(_render_job, jobs, chunksize=max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))))
+
+
+def load_note(frequency: float, sample_rate: int, waveform: str = 'sawtooth', /, *,
+		root: Optional[str] = None) -> Optional['numpy.ndarray']:
+	""" Maps a cached note into memory.
+
+	Returns
+	-------
+	Optional[numpy.ndarray]
+		The read-only int16 samples, backed by the cache file, or None if
+		the note isn't cached.
+	"""
+
+	return _load(os.path.join(cache_directory(root), _note_file_name(frequency, waveform, sample_rate)), sample_rate)
+
+
+def load_ring_pattern(low_frequency: float, high_frequency: float, sample_rate: int, waveform: str = 'sawtooth',
+		/, *, root: Optional[str] = None) -> Optional['numpy.ndarray']:
+	""" Maps a cached alarm pattern into memory.
+
+	Returns
+	-------
+	Optional[numpy.ndarray]
+		The read-only int16 samples, backed by the cache file, or None if
+		the pattern isn't cached.
+	"""
+
+	file_name = _ring_file_name(low_frequency, high_frequency, waveform, sample_rate)
+	return _load(os.path.join(cache_directory(root), file_name), sample_rate)
+
+
+def _note_file_name(frequency: float, waveform: str, sample_rate: int, /) -> str:
+	""" Returns the file name of a note, keyed by all that changes its samples. """
+
+	return 'note-{}-{:.3f}-{}.npy'.format(waveform, frequency, sample_rate)
+
+
+def _ring_file_name(low_frequency: float, high_frequency: float, waveform: str, sample_rate: int, /) -> str:
+	""" Returns the file name of an alarm pattern. """
+
+	return 'ring-{}-{:.3f}-{:.3f}-{}.npy'.format(waveform, low_frequency, high_frequency, sample_rate)
+
+
+def _render_job(job: tuple, /) -> int:
+	""" Renders one buffer of the bank into its file. Runs in a worker process. """
+
+	import numpy
+	from console_alarm import synthesis
+
+	directory, kind, frequency, waveform, sample_rate = job
+	if kind == 'ring':
+		samples = synthesis.render_ring_pattern(*frequency, sample_rate, waveform)
+		path = os.path.join(directory, _ring_file_name(*frequency, waveform, sample_rate))
+	else:
+		samples = synthesis.render_note(frequency, sample_rate, waveform)
+		path = os.path.join(directory, _note_file_name(frequency, waveform, sample_rate))
+
+	# Write under a temporary name, so readers never map half a file.
+	temporary_path = '{}.{}.tmp'.format(path, os.getpid())
+	with open(temporary_path, 'wb') as sound_file:
+		numpy.save(sound_file, samples)
+	os.replace(temporary_path, path)
+	return 1
+
+
+def _load(path: str, sample_rate: int, /) -> Optional['numpy.ndarray']:
+	""" Maps a cache file read-only, None if it is missing or broken. """
+
+	if not os.path.exists(path):
+		return None
+
+	import numpy
+
+	try:
+		samples = numpy.load(path, mmap_mode='r', allow_pickle=False)
+	except (OSError, ValueError):
+		return None
+
+	# Only trust buffers in the layout the mixer plays.
+	if samples.dtype != numpy.int16 or samples.ndim != 1 or len(samples) != sample_rate:
+		return None
+	return samples
+
+
+def _remove_old_versions(root: str, /):
+	""" Removes the cache directories of other format versions. """
+
+	current = 'v{}'.format(FORMAT_VERSION)
+	for name in os.listdir(root):
+		if name != current and name.startswith('v') and name[1:].isdecimal():
+			shutil.rmtree(os.path.join(root, name), ignore_errors=True)
@@ -0,0 +1,183 @@
+""" Records how accurately the alarms fired.
+
+Summary
+-------
+	Every alarm that fires or gets missed adds a FireRecord to a FireStats
+	collector: when it was supposed to fire, when the waiting thread woke
+	up, how late that was and how long it took until the first audio
+	sample played. The collector gives percentiles and histograms of those
+	numbers, so scheduling regressions on loaded hosts become visible.
+
+Routine Listings
+----------------
+	FireRecord
+		The timing of one alarm.
+
+	FireStats
+		Collects FireRecords and summarizes them.
+
+	fire_stats
+		The collector the alarm functions record into by default.
+"""
+
+import collections
+import math
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# The upper bounds of the histogram buckets in milliseconds.
+HISTOGRAM_BOUNDS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 500, 1000, math.inf)
+
+# How many records a collector keeps by default.
+MAX_RECORDS = 10000
+
+
+class FireRecord(NamedTuple):
+	""" The timing of one alarm.
+
+	Attributes
+	----------
+	scheduled : float
+		The time.time() value the alarm was supposed to fire at.
+	woke : Optional[float]
+		The time.time() value the waiting thread woke up at. None if the
+		alarm was missed.
+	lateness : Optional[float]
+		How many seconds after [scheduled] the thread woke up.
+	audio_latency : Optional[float]
+		How many seconds after [scheduled] the first audio sample played.
+		None if the alarm didn't play a sound.
+	"""
+
+	scheduled: float
+	woke: Optional[float]
+	lateness: Optional[float]
+	audio_latency: Optional[float] = None
+
+	@property
+	def missed(self) -> bool:
+		""" True if the alarm was missed. """
+
+		return self.woke is None
+
+
+class FireStats:
+	""" Collects FireRecords and summarizes them.
+
+	Parameters
+	----------
+	max_records : int, default = MAX_RECORDS
+		How many records are kept. The oldest ones are dropped first.
+
+	Example
+	-------
+	print(fire_stats.format())
+	"""
+
+	def __init__(self, max_records: int = MAX_RECORDS):
+		self._records = collections.deque(maxlen=max_records)
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._records)
+
+	def record(self, record: FireRecord, /):
+		""" Adds [record] to the collector. """
+
+		with self._lock:
+			self._records.append(record)
+
+	def records(self) -> List[FireRecord]:
+		""" Returns a copy of the records, oldest first. """
+
+		with self._lock:
+			return list(self._records)
+
+	def clear(self):
+		""" Drops every record. """
+
+		with self._lock:
+			self._records.clear()
+
+	def values(self, field: str = 'lateness', /) -> List[float]:
+		""" Returns the sorted values of [field] of the fired alarms.
+
+		Parameters
+		----------
+		field : str, default = 'lateness'
+			'lateness' or 'audio_latency'.
+		"""
+
+		return sorted(value for value in (getattr(record, field) for record in self.records()) if value is not None)
+
+	def percentile(self, percent: float, field: str = 'lateness', /) -> Optional[float]:
+		""" Returns the [percent] percentile of [field] in seconds.
+
+		Uses the nearest rank, so the result is always a recorded value.
+		None if there is no value.
+		"""
+
+		return _percentile(self.values(field), percent)
+
+	def histogram(self, field: str = 'lateness', /,
+			bounds_ms: Sequence[float] = HISTOGRAM_BOUNDS_MS) -> List[Tuple[float, int]]:
+		""" Counts the values of [field] per bucket.
+
+		Returns
+		-------
+		List[Tuple[float, int]]
+			The upper bound of each bucket in milliseconds with the number
+			of values that are smaller or equal and bigger than the bound
+			before.
+		"""
+
+		counts = [0] * len(bounds_ms)
+		for value in self.values(field):
+			for index, bound in enumerate(bounds_ms):
+				if value * 1000 <= bound:
+					counts[index] += 1
+					break
+		return list(zip(bounds_ms, counts))
+
+	def summary(self) -> Dict[str, Optional[float]]:
+		""" Returns the counts and the percentiles of the records in milliseconds. """
+
+		records = self.records()
+		summary: Dict[str, Optional[float]] = {
+			'fired': sum(1 for record in records if not record.missed),
+			'missed': sum(1 for record in records if record.missed),
+		}
+		for field in ('lateness', 'audio_latency'):
+			values = self.values(field)
+			for percent in (50, 90, 99, 100):
+				value = _percentile(values, percent)
+				key = '{}_{}_ms'.format(field, 'max' if percent == 100 else 'p{}'.format(percent))
+				summary[key] = None if value is None else value * 1000
+		return summary
+
+	def format(self) -> str:
+		""" Returns the summary and the lateness histogram as readable text. """
+
+		summary = self.summary()
+		lines = ["Alarms: {} fired, {} missed".format(summary['fired'], summary['missed'])]
+		for field, label in (('lateness', 'Lateness'), ('audio_latency', 'First audio')):
+			if summary[field + '_max_ms'] is None:
+				continue
+			lines.append("{}: p50 {:.3f} ms, p90 {:.3f} ms, p99 {:.3f} ms, max {:.3f} ms".format(
+				label, *(summary['{}_{}_ms'.format(field, key)] for key in ('p50', 'p90', 'p99', 'max'))))
+		for bound, count in self.histogram():
+			if count:
+				lines.append("  <= {:>6} ms: {}".format(bound, count))
+		return "\n".join(lines)
+
+
+def _percentile(values: List[float], percent: float, /) -> Optional[float]:
+	""" Returns the nearest rank [percent] percentile of the sorted [values]. """
+
+	if not values:
+		return None
+	return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+# The collector the alarm functions record into by default.
+fire_stats = FireStats()
@@ -0,0 +1,314 @@
+""" Vectorized waveform synthesis for the alarm sounds.
+
+Summary
+-------
+	Renders the sample arrays of the alarm notes with whole-array NumPy
+	operations instead of per-sample Python loops. Rendered notes are kept
+	in a bounded LRU cache, so ringing the alarm more than once doesn't
+	synthesize the same note again.
+
+Routine Listings
+----------------
+	render_note
+		Returns the int16 samples of a note.
+
+	render_ring_pattern
+		Returns the int16 samples of one second of the alarm sound.
+
+	render_wavetable
+		Returns the int16 samples of a few whole periods of a note.
+
+	wavetable_size
+		Returns how many periods and samples the wavetable of a note has.
+
+	clear_note_cache
+		Drops every cached note and ring pattern.
+
+Notes
+-----
+	The returned arrays are shared between all callers through the cache,
+	so they are marked read-only. Copy them before changing samples.
+
+	A note is periodic, so the mixer can also loop a wavetable of a few
+	periods instead of a second of samples. The periods are chosen so that
+	they fill a whole number of samples with the pitch off by at most
+	WAVETABLE_TOLERANCE_CENTS, which makes the loop phase-clean and takes
+	a few hundred samples instead of [sample_rate]. The ring pattern can be
+	built from the wavetables as well, so no second-long notes are
+	rendered and cached for it.
+"""
+
+import functools
+import math
+from typing import Tuple
+import numpy
+from console_alarm import oscillators
+
+# Sample rate the alarm sounds are rendered with.
+SAMPLE_RATE = 44100
+
+# How many rendered notes are kept in memory.
+NOTE_CACHE_SIZE = 32
+
+# The waveforms render_note knows about. 'sawtooth' is the original,
+# aliasing one, the others come from console_alarm.oscillators.
+WAVEFORMS = ('sawtooth', 'sine', 'square', 'triangle', 'bandlimited_saw')
+
+# The peak of the rendered waves, a quarter of the int16 range.
+AMPLITUDE = 8192
+
+# How long each note of the ring pattern sounds in milliseconds.
+RING_NOTE_MS = 25
+
+# How often the two notes alternate before the pause of the pattern.
+RING_NOTE_PAIRS = 10
+
+# How far the pitch of a looped wavetable may be off, in cents.
+WAVETABLE_TOLERANCE_CENTS = 1.0
+
+# The most periods a wavetable may hold to reach that pitch.
+WAVETABLE_MAX_PERIODS = 64
+
+
+def render_note(frequency: float, sample_rate: int = SAMPLE_RATE, waveform: str = 'sawtooth',
+		duration: float = 1.0, /) -> numpy.ndarray:
+	""" Returns the int16 samples of a note.
+
+	Parameters
+	----------
+	frequency : float
+		The frequency of the note e.g. 440 for A and 880 for A'.
+	sample_rate : int, default = SAMPLE_RATE
+		How many samples are rendered per second.
+	waveform : str, default = 'sawtooth'
+		The shape of the wave. Has to be one of WAVEFORMS.
+	duration : float, default = 1.0
+		The length of the note in seconds.
+
+	Returns
+	-------
+	numpy.ndarray
+		A read-only int16 array with the samples of the note.
+
+	Raises
+	------
+	ValueError
+		If [waveform] is unknown or [frequency], [sample_rate] or
+		[duration] aren't positive.
+
+	Example
+	-------
+	render_note(440.0)
+	"""
+
+	# Check if the parameters make sense.
+	if waveform not in WAVEFORMS:
+		raise ValueError
+	if not (frequency > 0 and sample_rate > 0 and duration > 0):
+		raise ValueError
+
+	# Normalize the key, so 440 and 440.0 share one cache entry.
+	return _render_note_cached(float(frequency), int(sample_rate), waveform, float(duration))
+
+
+def render_ring_pattern(low_frequency: float, high_frequency: float, sample_rate: int = SAMPLE_RATE,
+		waveform: str = 'sawtooth', /, *, wavetable: bool = False) -> numpy.ndarray:
+	""" Returns the int16 samples of one second of the alarm sound.
+
+	The pattern alternates [RING_NOTE_PAIRS] times between the high and the
+	low note, each sounding for [RING_NOTE_MS] milliseconds, and stays
+	silent for the rest of the second. Every note starts at the beginning
+	of its wave, like a freshly started Sound would.
+
+	Parameters
+	----------
+	low_frequency : float
+		The frequency of the low note.
+	high_frequency : float
+		The frequency of the high note.
+	sample_rate : int, default = SAMPLE_RATE
+		How many samples are rendered per second.
+	waveform : str, default = 'sawtooth'
+		The shape of the wave of both notes. Has to be one of WAVEFORMS.
+	wavetable : bool, default = False
+		Repeat the wavetables of the notes instead of cutting them from
+		second-long notes, which are then neither rendered nor cached.
+
+	Returns
+	-------
+	numpy.ndarray
+		A read-only int16 array with [sample_rate] samples.
+
+	Raises
+	------
+	ValueError
+		If [waveform] is unknown or one of the other parameters isn't
+		positive.
+
+	Example
+	-------
+	render_ring_pattern(261.626, 391.995)
+	"""
+
+	# Check if the parameters make sense.
+	if waveform not in WAVEFORMS:
+		raise ValueError
+	if not (low_frequency > 0 and high_frequency > 0 and sample_rate > 0):
+		raise ValueError
+
+	return _render_ring_pattern_cached(float(low_frequency), float(high_frequency), int(sample_rate), waveform,
+		bool(wavetable))
+
+
+def render_wavetable(frequency: float, sample_rate: int = SAMPLE_RATE, waveform: str = 'sawtooth', /) -> numpy.ndarray:
+	""" Returns the int16 samples of a few whole periods of a note.
+
+	Looping the samples, e.g. with Sound.play(-1), plays the note for as
+	long as needed without a click at the loop point.
+
+	Parameters
+	----------
+	frequency : float
+		The frequency of the note e.g. 440 for A and 880 for A'.
+	sample_rate : int, default = SAMPLE_RATE
+		How many samples are played per second.
+	waveform : str, default = 'sawtooth'
+		The shape of the wave. Has to be one of WAVEFORMS.
+
+	Returns
+	-------
+	numpy.ndarray
+		A read-only int16 array with the samples of the periods, see
+		wavetable_size for how many.
+
+	Raises
+	------
+	ValueError
+		If [waveform] is unknown or [frequency] or [sample_rate] aren't
+		positive.
+
+	Example
+	-------
+	render_wavetable(440.0)
+	"""
+
+	# Check if the parameters make sense.
+	if waveform not in WAVEFORMS:
+		raise ValueError
+	if not (frequency > 0 and sample_rate > 0):
+		raise ValueError
+
+	return _render_wavetable_cached(float(frequency), int(sample_rate), waveform)
+
+
+def wavetable_size(frequency: float, sample_rate: int = SAMPLE_RATE, /) -> Tuple[int, int]:
+	""" Returns how many periods and samples the wavetable of a note has.
+
+	The fewest periods whose length rounded to whole samples keeps the
+	pitch within WAVETABLE_TOLERANCE_CENTS are used. If no number of
+	periods up to WAVETABLE_MAX_PERIODS does, the most accurate one is.
+
+	Returns
+	-------
+	Tuple[int, int]
+		The number of periods and the number of samples.
+	"""
+
+	frames = sample_rate / frequency
+	best = None
+	for periods in range(1, WAVETABLE_MAX_PERIODS + 1):
+		samples = max(1, round(periods * frames))
+
+		# The pitch of the loop is off by the rounding of its length.
+		cents = abs(1200 * math.log2(periods * frames / samples))
+		if cents <= WAVETABLE_TOLERANCE_CENTS:
+			return periods, samples
+		if best is None or cents < best[0]:
+			best = (cents, periods, samples)
+
+	return best[1], best[2]
+
+
+def clear_note_cache():
+	""" Drops every cached note, ring pattern and wavetable. """
+
+	_render_note_cached.cache_clear()
+	_render_ring_pattern_cached.cache_clear()
+	_render_wavetable_cached.cache_clear()
+
+
+@functools.lru_cache(maxsize=NOTE_CACHE_SIZE)
+def _render_note_cached(frequency: float, sample_rate: int, waveform: str, duration: float, /) -> numpy.ndarray:
+	""" Renders a note. The arguments are the cache key of the note. """
+
+	# How many samples the note has.
+	sample_count = round(sample_rate * duration)
+
+	if waveform == 'sawtooth':
+		# The sample indices as floats, so the math below stays in float64.
+		indices = numpy.arange(sample_count, dtype=numpy.float64)
+
+		# How many sound frames are there per wave
+		frames = sample_rate / frequency
+
+		# Calculate the sawtooth for all samples at once.
+		samples = (16384 * (indices % frames) / frames - 8192).astype(numpy.int16)
+	else:
+		samples = _to_int16(oscillators.generate(waveform, oscillators.phases(frequency, sample_rate, sample_count),
+			frequency / sample_rate))
+
+	# The array is shared through the cache, so nobody may change it.
+	samples.flags.writeable = False
+	return samples
+
+
+@functools.lru_cache(maxsize=NOTE_CACHE_SIZE)
+def _render_ring_pattern_cached(low_frequency: float, high_frequency: float, sample_rate: int, waveform: str,
+		wavetable: bool, /) -> numpy.ndarray:
+	""" Renders a ring pattern. The arguments are the cache key of the pattern. """
+
+	# One second of silence we mix the notes into.
+	pattern = numpy.zeros(sample_rate, dtype=numpy.int16)
+
+	# The notes we alternate between.
+	render = render_wavetable if wavetable else render_note
+	notes = (
+		render(high_frequency, sample_rate, waveform),
+		render(low_frequency, sample_rate, waveform),
+	)
+
+	# Put every note at its sample position. The positions are rounded from
+	# milliseconds, so the pattern doesn't drift over the second.
+	for index in range(RING_NOTE_PAIRS * 2):
+		start = round(sample_rate * index * RING_NOTE_MS / 1000)
+		end = round(sample_rate * (index + 1) * RING_NOTE_MS / 1000)
+		# A wavetable is repeated from its start, like a note starts at the beginning of its wave.
+		pattern[start:end] = numpy.resize(notes[index % 2], end - start)
+
+	pattern.flags.writeable = False
+	return pattern
+
+
+@functools.lru_cache(maxsize=NOTE_CACHE_SIZE)
+def _render_wavetable_cached(frequency: float, sample_rate: int, waveform: str, /) -> numpy.ndarray:
+	""" Renders a wavetable. The arguments are the cache key of the wavetable. """
+
+	periods, sample_count = wavetable_size(frequency, sample_rate)
+
+	# Stretch the period a tiny bit, so the periods fill the samples exactly.
+	frames = sample_count / periods
+
+	indices = numpy.arange(sample_count, dtype=numpy.float64)
+	if waveform == 'sawtooth':
+		samples = (16384 * (indices % frames) / frames - 8192).astype(numpy.int16)
+	else:
+		samples = _to_int16(oscillators.generate(waveform, (indices / frames) % 1.0, 1 / frames))
+
+	samples.flags.writeable = False
+	return samples
+
+
+def _to_int16(samples: numpy.ndarray, /) -> numpy.ndarray:
+	""" Scales oscillator samples between -1 and 1 to AMPLITUDE and rounds them to int16. """
+
+	return numpy.round(samples * AMPLITUDE).astype(numpy.int16)
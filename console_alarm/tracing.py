@@ -0,0 +1,245 @@
+""" Timed spans of the alarm lifecycle.
+
+Summary
+-------
+	The alarm functions wrap their phases in spans: the wait for the alarm
+	time, the start of the mixer, the synthesis of the sounds and the
+	ring. Every span sends a begin and an end event to the registered
+	handlers. Without a handler a span does nothing but one check, so the
+	spans stay in the code for good.
+
+Routine Listings
+----------------
+	span
+		Times a phase of the alarm.
+
+	add_handler
+		Registers a function that gets every event.
+
+	remove_handler
+		Unregisters a handler.
+
+	ChromeTraceExporter
+		Collects the events and writes them as Chrome trace JSON.
+
+	TraceEvent
+		The begin or the end of a span.
+
+Notes
+-----
+	The spans are named 'wait', 'mixer_init', 'synthesis' and 'ring'. The
+	JSON of the ChromeTraceExporter opens in chrome://tracing and in
+	https://ui.perfetto.dev, with one track per thread.
+
+	Handlers are called in the thread of the span, while the alarm runs.
+	They should be quick and must not raise. The spans of one thread have
+	to nest, which the coroutines of one event loop don't, so
+	console_alarm.async_alarm isn't traced.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, TextIO, Tuple, Union
+
+# The phases of the events, as in the Chrome trace format.
+BEGIN = 'B'
+END = 'E'
+
+# The category of all spans in the trace.
+CATEGORY = 'console_alarm'
+
+
+class TraceEvent(NamedTuple):
+	""" The begin or the end of a span.
+
+	Attributes
+	----------
+	phase : str
+		BEGIN or END.
+	name : str
+		The name of the span, e.g. 'wait'.
+	timestamp : float
+		The time.perf_counter() value of the event.
+	thread_id : int
+		The threading.get_ident() value of the thread of the span.
+	args : dict
+		What the span was started with, e.g. the frequency of a note.
+		Empty for END.
+	"""
+
+	phase: str
+	name: str
+	timestamp: float
+	thread_id: int
+	args: dict
+
+
+# A tuple, so spans can read it without a lock while handlers change.
+_handlers: Tuple[Callable[[TraceEvent], None], ...] = ()
+_handlers_lock = threading.Lock()
+
+
+class _Span:
+	""" Sends the begin and the end event of one span. """
+
+	__slots__ = ('_name', '_args', '_handlers')
+
+	def __init__(self, name: str, args: dict, handlers: tuple, /):
+		self._name = name
+		self._args = args
+		# The end goes to the same handlers as the begin, even if they change in between.
+		self._handlers = handlers
+
+	def __enter__(self):
+		_send(self._handlers, TraceEvent(BEGIN, self._name, time.perf_counter(), threading.get_ident(), self._args))
+		return self
+
+	def __exit__(self, *exc_info):
+		_send(self._handlers, TraceEvent(END, self._name, time.perf_counter(), threading.get_ident(), {}))
+
+
+class _NoSpan:
+	""" The span while nobody listens. """
+
+	__slots__ = ()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, /, **args) -> Union[_Span, _NoSpan]:
+	""" Times a phase of the alarm.
+
+	Parameters
+	----------
+	name : str
+		The name of the phase.
+	**args
+		Details of the phase for the begin event, e.g. frequency=440.
+
+	Returns
+	-------
+	context manager
+		Sends the begin event on enter and the end event on exit.
+
+	Example
+	-------
+	with span('synthesis', frequency=440):
+		render_note(440)
+	"""
+
+	handlers = _handlers
+	if not handlers:
+		return _NO_SPAN
+	return _Span(name, args, handlers)
+
+
+def add_handler(handler: Callable[[TraceEvent], None], /):
+	""" Registers [handler], it gets every TraceEvent from now on. """
+
+	global _handlers
+
+	with _handlers_lock:
+		_handlers = _handlers + (handler,)
+
+
+def remove_handler(handler: Callable[[TraceEvent], None], /):
+	""" Unregisters [handler]. Does nothing if it isn't registered. """
+
+	global _handlers
+
+	with _handlers_lock:
+		_handlers = tuple(registered for registered in _handlers if registered != handler)
+
+
+def _send(handlers: tuple, event: TraceEvent, /):
+	""" Gives [event] to every handler. """
+
+	for handler in handlers:
+		handler(event)
+
+
+class ChromeTraceExporter:
+	""" Collects the events and writes them as Chrome trace JSON.
+
+	Used as a context manager, it registers itself on enter and writes
+	[path] on exit.
+
+	Parameters
+	----------
+	path : str, optional
+		The file to write on exit.
+
+	Example
+	-------
+	with ChromeTraceExporter('alarm.trace.json'):
+		start_pomodoro(1)
+	"""
+
+	def __init__(self, path: Optional[str] = None):
+		self.path = path
+		self._events: List[dict] = []
+		self._thread_names: Dict[int, str] = {}
+		self._lock = threading.Lock()
+		self._pid = os.getpid()
+
+	def __enter__(self) -> 'ChromeTraceExporter':
+		add_handler(self)
+		return self
+
+	def __exit__(self, *exc_info):
+		remove_handler(self)
+		if self.path is not None:
+			self.write(self.path)
+
+	def __call__(self, event: TraceEvent, /):
+		""" Keeps [event] as a Chrome trace event. """
+
+		trace_event = {
+			'name': event.name,
+			'cat': CATEGORY,
+			'ph': event.phase,
+			# Chrome wants microseconds.
+			'ts': round(event.timestamp * 1e6, 3),
+			'pid': self._pid,
+			'tid': event.thread_id,
+		}
+		if event.args:
+			trace_event['args'] = event.args
+
+		with self._lock:
+			self._events.append(trace_event)
+			if event.thread_id not in self._thread_names:
+				self._thread_names[event.thread_id] = threading.current_thread().name
+
+	def trace(self) -> dict:
+		""" Returns the collected events as a Chrome trace object. """
+
+		with self._lock:
+			# Name the tracks after the threads.
+			names = [{'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': thread_id, 'args': {'name': name}}
+				for thread_id, name in self._thread_names.items()]
+			return {'traceEvents': names + self._events, 'displayTimeUnit': 'ms'}
+
+	def write(self, file: Union[str, TextIO], /):
+		""" Writes the trace to [file], a path or an open text file.
+
+		Raises
+		------
+		OSError
+			If the file can't be written.
+		"""
+
+		if isinstance(file, str):
+			with open(file, 'w') as opened:
+				json.dump(self.trace(), opened)
+		else:
+			json.dump(self.trace(), file)
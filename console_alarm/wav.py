@@ -0,0 +1,191 @@
+""" Streams alarm sounds from WAV files.
+
+Summary
+-------
+	A WavStream reads a WAV file in chunks of a fixed number of frames and
+	converts every chunk into the format of the mixer: 16 bit signed mono
+	at the mixer's sample rate. Only one chunk is decoded at a time, so a
+	recording of hours needs as little memory as one of seconds.
+
+Routine Listings
+----------------
+	WavStream
+		Reads a WAV file chunk by chunk in the format of the mixer.
+
+Notes
+-----
+	Uncompressed PCM files with 8, 16, 24 or 32 bit samples and any number
+	of channels are supported, that is everything the wave module reads.
+	The channels are mixed down by averaging them and the sample rate is
+	converted by linear interpolation, which keeps its position between
+	the chunks, so there are no clicks at the chunk borders.
+"""
+
+import wave
+from typing import Iterator, Optional
+
+# How many frames of the file are read at once.
+CHUNK_FRAMES = 8192
+
+
+class WavStream:
+	""" Reads a WAV file chunk by chunk in the format of the mixer.
+
+	Parameters
+	----------
+	path : str
+		The WAV file.
+	sample_rate : int
+		The sample rate of the mixer the chunks are converted to.
+	chunk_frames : int, default = CHUNK_FRAMES
+		How many frames of the file are read at once.
+
+	Raises
+	------
+	OSError
+		If the file can't be opened.
+	wave.Error
+		If the file isn't an uncompressed WAV file.
+	EOFError
+		If the header of the file is cut off.
+	ValueError
+		If the file has no samples or an unsupported sample width.
+
+	Example
+	-------
+	with WavStream('alarm.wav', 44100) as stream:
+		for chunk in stream.chunks():
+			play(chunk)
+	"""
+
+	def __init__(self, path: str, sample_rate: int, chunk_frames: int = CHUNK_FRAMES):
+		self.path = path
+		self.sample_rate = sample_rate
+		self.chunk_frames = chunk_frames
+		self._file = wave.open(path, 'rb')
+
+		try:
+			self.channels = self._file.getnchannels()
+			self.sample_width = self._file.getsampwidth()
+			self.file_rate = self._file.getframerate()
+			self.frames = self._file.getnframes()
+
+			if self.sample_width not in (1, 2, 3, 4):
+				raise ValueError("{} has {} byte samples".format(path, self.sample_width))
+			if self.frames == 0 or self.file_rate == 0:
+				raise ValueError("{} has no samples".format(path))
+		except BaseException:
+			self._file.close()
+			raise
+
+	def __enter__(self) -> 'WavStream':
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	@property
+	def chunk_seconds(self) -> float:
+		""" How many seconds of sound one chunk holds. """
+
+		return self.chunk_frames / self.file_rate
+
+	def close(self):
+		""" Closes the file. """
+
+		self._file.close()
+
+	def chunks(self, loop: bool = False, /) -> Iterator['numpy.ndarray']:
+		""" Returns the converted chunks of the file, from its start.
+
+		Parameters
+		----------
+		loop : bool, default = False
+			Start over at the end of the file, forever.
+
+		Returns
+		-------
+		Iterator[numpy.ndarray]
+			int16 mono arrays at [sample_rate]. Every chunk is a new array,
+			the caller can keep it as long as it needs.
+
+		Raises
+		------
+		EOFError
+			If [loop] is set and the file has no samples, e.g. a header
+			whose data chunk is cut off. Raised by the first next call.
+		"""
+
+		import numpy
+
+		resampler = _Resampler(self.file_rate, self.sample_rate)
+		while True:
+			self._file.rewind()
+			empty = True
+			while True:
+				data = self._file.readframes(self.chunk_frames)
+				if not data:
+					break
+
+				chunk = resampler.convert(_to_mono(numpy, data, self.sample_width, self.channels))
+				if len(chunk):
+					empty = False
+					yield numpy.clip(numpy.round(chunk), -32768, 32767).astype(numpy.int16)
+
+			if not loop:
+				return
+			# Rewinding an empty file would never yield anything.
+			if empty:
+				raise EOFError("{} has no samples".format(self.path))
+
+
+class _Resampler:
+	""" Converts the sample rate of consecutive chunks by linear interpolation. """
+
+	def __init__(self, from_rate: int, to_rate: int, /):
+		self.step = from_rate / to_rate
+		self.position = 0.0
+		self.last_sample: Optional[float] = None
+
+	def convert(self, samples: 'numpy.ndarray', /) -> 'numpy.ndarray':
+		""" Returns [samples] at the new sample rate, continuing the chunk before. """
+
+		import numpy
+
+		if self.step == 1:
+			return samples
+
+		# Put the last sample of the chunk before in front, to interpolate across the border.
+		if self.last_sample is not None:
+			samples = numpy.concatenate(((self.last_sample,), samples))
+		self.last_sample = samples[-1]
+
+		last_index = len(samples) - 1
+		if self.position > last_index:
+			self.position -= last_index
+			return samples[:0]
+
+		count = int((last_index - self.position) // self.step) + 1
+		positions = self.position + self.step * numpy.arange(count)
+
+		# The next chunk starts one sample before its first new sample.
+		self.position += self.step * count - last_index
+		return numpy.interp(positions, numpy.arange(len(samples)), samples)
+
+
+def _to_mono(numpy, data: bytes, sample_width: int, channels: int, /) -> 'numpy.ndarray':
+	""" Decodes little endian PCM frames into float64 mono samples in the int16 range. """
+
+	if sample_width == 1:
+		# 8 bit samples are unsigned.
+		samples = (numpy.frombuffer(data, dtype=numpy.uint8).astype(numpy.float64) - 128) * 256
+	elif sample_width == 2:
+		samples = numpy.frombuffer(data, dtype='<i2').astype(numpy.float64)
+	elif sample_width == 3:
+		# Keep the upper two bytes of every 24 bit sample.
+		samples = numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, 3)[:, 1:].copy().view('<i2')[:, 0]
+		samples = samples.astype(numpy.float64)
+	else:
+		samples = numpy.frombuffer(data, dtype='<i4').astype(numpy.float64) / 65536
+
+	return samples.reshape(-1, channels).mean(axis=1)
@@ -1,12 +1,20 @@
 import unittest
 import time
 import sys
+import os
 import io
+import subprocess
+from pathlib import Path
+from unittest import mock
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
 
 sys.path.insert(0, "..")
+from console_alarm import audio
 from console_alarm import console_alarm
-
-short_test = False
+from console_alarm.clock import VirtualClock, system_clock
+from console_alarm.stats import FireStats, fire_stats
 
 
 def output_contains_help(text: str) -> bool:
@@ -23,6 +31,20 @@ def clean_console_redirect():
     sys.stdout = sys.__stdout__
 
 
+def local_clock(hour: int, minute: int, second: int = 0) -> VirtualClock:
+    return VirtualClock(time.mktime((2024, 3, 12, hour, minute, second, 0, 0, -1)))
+
+
+class RingSink:
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self.rings = []
+
+    def __call__(self, seconds: int):
+        self.rings.append((self.clock.time(), seconds))
+
+
 class PomodoroTestCase(unittest.TestCase):
 
     def test_start_pomodoro_with_to_few_seconds(self):
@@ -51,18 +73,18 @@ class PomodoroTestCase(unittest.TestCase):
                 with self.assertRaises(TypeError):
                     console_alarm.start_pomodoro(1, some_types[type_index])
 
-    @unittest.skipIf(short_test, "Skipped long test")
     def test_start_pomodoro_for_some_minute(self):
-        minutes = [1, 2]
+        minutes = [1, 2, 1439]
         for minute_index in range(len(minutes)):
             with self.subTest(minute_index=minute_index):
-                start_time: float = time.time()
-                console_alarm.start_pomodoro(minutes[minute_index])
-                duration: float = time.time() - start_time
-                with self.subTest():
-                    self.assertGreater(duration, 60*(minute_index+1), "Pomodoro started to fast.")
-                with self.subTest():
-                    self.assertLess(duration, 60*(minute_index+1)+6, "Pomodoro ended to late.")
+                clock = local_clock(14, 9, 42)
+                sink = RingSink(clock)
+                start_time: float = clock.time()
+                get_console_redirect()
+                lateness = console_alarm.start_pomodoro(minutes[minute_index], clock=clock, sink=sink)
+                clean_console_redirect()
+                self.assertEqual(sink.rings, [(start_time + 60*minutes[minute_index], 5)])
+                self.assertEqual(lateness, 0)
 
 
 class TestAlarmClock(unittest.TestCase):
@@ -103,14 +125,243 @@ class TestAlarmClock(unittest.TestCase):
                             wrong_values[value_index][1] if wrong_parameter == 2 else 2,
                         )
 
-    @unittest.skipIf(short_test, "Skipped long test")
     def test_start_alarm_clock_for_one_minute(self):
-        start_time: float = time.time()
-        alarm_time = time.localtime(start_time+60)
-        console_alarm.start_alarm_clock(alarm_time.tm_hour, alarm_time.tm_min, alarm_time.tm_sec)
-        duration = time.time() - start_time
-        self.assertGreater(duration, 60)
-        self.assertLess(duration, 66)
+        clock = local_clock(14, 9, 42)
+        sink = RingSink(clock)
+        start_time: float = clock.time()
+        get_console_redirect()
+        console_alarm.start_alarm_clock(14, 10, 42, clock=clock, sink=sink)
+        clean_console_redirect()
+        self.assertEqual(sink.rings, [(start_time + 60, 5)])
+        self.assertEqual(clock.sleeps, [60])
+
+    def test_start_alarm_clock_across_midnight(self):
+        clock = local_clock(23, 59, 30)
+        sink = RingSink(clock)
+        start_time: float = clock.time()
+        get_console_redirect()
+        console_alarm.start_alarm_clock(0, 0, 10, clock=clock, sink=sink)
+        clean_console_redirect()
+        self.assertEqual(sink.rings, [(start_time + 40, 5)])
+        self.assertEqual(clock.localtime()[3:6], (0, 0, 10))
+
+    def test_start_alarm_clock_for_current_time_waits_a_day(self):
+        clock = local_clock(14, 9)
+        sink = RingSink(clock)
+        start_time: float = clock.time()
+        get_console_redirect()
+        console_alarm.start_alarm_clock(14, 9, clock=clock, sink=sink)
+        clean_console_redirect()
+        self.assertEqual(sink.rings, [(start_time + 24*3600, 5)])
+        self.assertEqual(len(clock.sleeps), 24*60)
+
+    def test_start_alarm_clock_records_stats(self):
+        clock = local_clock(14, 9, 42)
+        stats = FireStats()
+        get_console_redirect()
+        console_alarm.start_alarm_clock(14, 10, 42, clock=clock, sink=RingSink(clock), stats=stats)
+        clock.suspend_at(clock.monotonic() + 10, 3600)
+        console_alarm.start_alarm_clock(14, 12, clock=clock, sink=RingSink(clock), stats=stats)
+        clean_console_redirect()
+        fired, missed = stats.records()
+        self.assertEqual(fired.scheduled, local_clock(14, 10, 42).time())
+        self.assertEqual((fired.woke, fired.lateness, fired.audio_latency), (fired.scheduled, 0, 0))
+        self.assertTrue(missed.missed)
+        self.assertEqual(stats.summary()['missed'], 1)
+
+    def test_start_alarm_clock_misses_alarm_during_suspend(self):
+        clock = local_clock(14, 0)
+        clock.suspend_at(120, 3600)
+        sink = RingSink(clock)
+        console_redirect: io.StringIO = get_console_redirect()
+        lateness = console_alarm.start_alarm_clock(14, 10, clock=clock, sink=sink)
+        clean_console_redirect()
+        self.assertIsNone(lateness)
+        self.assertEqual(sink.rings, [])
+        self.assertIn('"event":"missed"', console_redirect.getvalue())
+        self.assertIn('"rung":false', console_redirect.getvalue())
+
+    def test_start_alarm_clock_survives_short_suspend(self):
+        clock = local_clock(14, 0)
+        clock.suspend_at(120, 300)
+        sink = RingSink(clock)
+        start_time: float = clock.time()
+        get_console_redirect()
+        console_alarm.start_alarm_clock(14, 10, clock=clock, sink=sink)
+        clean_console_redirect()
+        self.assertEqual(sink.rings, [(start_time + 600, 5)])
+        self.assertEqual(clock.monotonic(), 300)
+
+    def test_start_alarm_clock_notices_resume_at_once(self):
+        clock = local_clock(14, 0)
+        clock.suspend_at(90, 3600)
+        get_console_redirect()
+        lateness = console_alarm.start_alarm_clock(14, 10, clock=clock, sink=RingSink(clock))
+        clean_console_redirect()
+        self.assertIsNone(lateness)
+        self.assertEqual(clock.monotonic(), 90)
+
+    def test_start_alarm_clock_rings_missed_alarm_late(self):
+        clock = local_clock(14, 0)
+        clock.suspend_at(120, 3600)
+        sink = RingSink(clock)
+        stats = FireStats()
+        start_time: float = clock.time()
+        console_redirect: io.StringIO = get_console_redirect()
+        lateness = console_alarm.start_alarm_clock(14, 10, clock=clock, sink=sink, stats=stats,
+                                                   missed=console_alarm.MISSED_RING)
+        clean_console_redirect()
+        self.assertEqual(lateness, 3120)
+        self.assertEqual(sink.rings, [(start_time + 3720, 5)])
+        self.assertEqual(stats.summary()['missed'], 0)
+        self.assertIn('"lateness":3120.0,"rung":true}\n{"event":"fired"', console_redirect.getvalue())
+
+    def test_start_alarm_clock_rings_missed_alarm_within_grace(self):
+        graces = [(300, 110), (60, None)]
+        for grace_index in range(len(graces)):
+            with self.subTest(grace_index=grace_index):
+                clock = local_clock(14, 0)
+                clock.suspend_at(590, 120)
+                sink = RingSink(clock)
+                get_console_redirect()
+                lateness = console_alarm.start_alarm_clock(14, 10, clock=clock, sink=sink,
+                                                           missed=console_alarm.MISSED_GRACE,
+                                                           grace=graces[grace_index][0])
+                clean_console_redirect()
+                self.assertEqual(lateness, graces[grace_index][1])
+                self.assertEqual(len(sink.rings), 0 if lateness is None else 1)
+
+    def test_start_alarm_clock_with_wrong_policy(self):
+        with self.assertRaises(ValueError):
+            console_alarm.start_alarm_clock(14, 10, clock=local_clock(14, 0), sink=print, missed='later')
+
+
+class TestWaitUntil(unittest.TestCase):
+
+    def test_wait_until_fires_on_time(self):
+        console_redirect: io.StringIO = get_console_redirect()
+        alarm_time: float = time.time() + 0.05
+        lateness = console_alarm._wait_until(alarm_time)
+        wake_time: float = time.time()
+        clean_console_redirect()
+        self.assertIn('{"event":"tick","remaining":0}', console_redirect.getvalue())
+        self.assertGreaterEqual(lateness, 0)
+        self.assertLess(lateness, 0.01)
+        self.assertGreaterEqual(wake_time, alarm_time - 0.01)
+
+    def test_wait_until_with_fractional_alarm_time(self):
+        clock = VirtualClock(1000.25)
+        get_console_redirect()
+        lateness = console_alarm._wait_until(1130.5, clock=clock)
+        clean_console_redirect()
+        self.assertEqual(lateness, 0)
+        self.assertEqual(clock.time(), 1130.5)
+        self.assertEqual(clock.sleeps, [60, 60, 10.25])
+
+    def test_wait_until_follows_clock_jump_before_alarm(self):
+        clock = VirtualClock(1000)
+        clock.suspend_at(60, 100)
+        get_console_redirect()
+        lateness = console_alarm._wait_until(1300, clock=clock)
+        clean_console_redirect()
+        self.assertEqual(lateness, 0)
+        self.assertEqual(clock.time(), 1300)
+        self.assertEqual(clock.monotonic(), 200)
+
+    def test_wait_until_detects_clock_jump_over_alarm(self):
+        clock = VirtualClock(1000)
+        clock.suspend_at(30, 3600)
+        console_redirect: io.StringIO = get_console_redirect()
+        lateness = console_alarm._wait_until(1100, clock=clock)
+        clean_console_redirect()
+        self.assertIsNone(lateness)
+        self.assertIn('"event":"missed"', console_redirect.getvalue())
+
+    def test_virtual_boot_clock_counts_suspends(self):
+        clock = VirtualClock(1000)
+        clock.suspend_at(10, 100)
+        clock.suspend_at(500, 5)
+        clock.wait_boottime(60)
+        self.assertEqual((clock.monotonic(), clock.boottime(), clock.time()), (10, 110, 1110))
+        clock.wait_boottime(30)
+        self.assertEqual((clock.monotonic(), clock.boottime(), clock.time()), (40, 140, 1140))
+        clock.wait(470)
+        self.assertEqual((clock.monotonic(), clock.boottime(), clock.time()), (510, 615, 1615))
+
+    def test_system_boot_clock(self):
+        boot_time = system_clock.boottime()
+        system_clock.wait_boottime(0.02)
+        self.assertGreaterEqual(system_clock.boottime() - boot_time, 0.02)
+        self.assertGreaterEqual(system_clock.boottime() - system_clock.monotonic(), -0.01)
+
+    def test_calc_alarm_time(self):
+        clock = local_clock(14, 9, 42)
+        alarm_time = console_alarm._calc_alarm_time(14, 11, 40, clock=clock)
+        self.assertEqual(alarm_time, clock.time() + 118)
+
+    def test_calc_secs_to_time_with_clock(self):
+        clock = local_clock(20, 6)
+        self.assertEqual(console_alarm._calc_secs_to_time(19, 6, clock=clock), 23*3600)
+        self.assertEqual(console_alarm._calc_secs_to_time(20, 6, clock=clock), 24*3600)
+        self.assertEqual(console_alarm._calc_secs_to_time(15, 9, 5, clock=local_clock(14, 9, 10)), 3595)
+
+
+class TestCalcSecsToTimes(unittest.TestCase):
+
+    def test_matches_the_scalar_function(self):
+        import numpy
+        hours, minutes, seconds = numpy.meshgrid(numpy.arange(24), numpy.arange(61), numpy.arange(0, 61, 10),
+                                                 indexing='ij')
+        # Around midnight, around the hour and in the middle of the day.
+        for now in ((0, 0, 0), (23, 59, 59), (14, 9, 0), (14, 9, 30), (7, 0, 1)):
+            now = local_clock(*now).localtime()
+            with self.subTest(now=now[3:6]):
+                expected = [console_alarm._calc_secs_to_time(int(hour), int(minute), int(second), now=now)
+                            for hour, minute, second in zip(hours.ravel(), minutes.ravel(), seconds.ravel())]
+                self.assertEqual(console_alarm.calc_secs_to_times(hours, minutes, seconds, now=now).ravel().tolist(),
+                                 expected)
+
+    def test_current_time_waits_a_day(self):
+        now = local_clock(14, 9).localtime()
+        self.assertEqual(console_alarm.calc_secs_to_times([14, 14], [9, 10], now=now).tolist(), [86400, 60])
+
+    def test_scalars(self):
+        now = local_clock(14, 9).localtime()
+        seconds = console_alarm.calc_secs_to_times(9, 30, now=now)
+        self.assertEqual(seconds.shape, ())
+        self.assertEqual(int(seconds), console_alarm._calc_secs_to_time(9, 30, now=now))
+        self.assertEqual(int(console_alarm.calc_secs_to_times(14, 9, now=now)), 86400)
+
+    def test_reads_the_clock_once(self):
+        clock = local_clock(23, 59, 30)
+        self.assertEqual(console_alarm.calc_secs_to_times([0], [0], clock=clock).tolist(), [30])
+        self.assertEqual(console_alarm.calc_alarm_times([0, 0], [0, 1], clock=clock).tolist(),
+                         [clock.time() + 30, clock.time() + 90])
+
+    def test_wrong_values(self):
+        for hours, minutes, seconds in (([24], [0], 0), ([-1], [0], 0), ([0], [61], 0), ([0], [0], [61])):
+            with self.subTest(hours=hours, minutes=minutes, seconds=seconds):
+                with self.assertRaises(ValueError):
+                    console_alarm.calc_secs_to_times(hours, minutes, seconds)
+        with self.assertRaises(TypeError):
+            console_alarm.calc_secs_to_times([1.5], [0])
+        with self.assertRaises(TypeError):
+            console_alarm.calc_secs_to_times(["1"], [0])
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_import_does_not_load_audio_stack(self):
+        loaded = subprocess.run(
+            [sys.executable, "-c",
+             "import sys; import console_alarm.command_line, console_alarm.scheduler, console_alarm.async_alarm; "
+             "print(' '.join(m for m in sys.modules if m.split('.')[0] in ('pygame', 'numpy')))"],
+            cwd=str(Path(__file__).resolve().parent.parent), capture_output=True, text=True, check=True).stdout
+        self.assertEqual(loaded.strip(), "")
+
+    def test_prewarm_loads_audio_stack(self):
+        console_alarm.prewarm()
+        self.assertIn("pygame", sys.modules)
 
 
 class TestRing(unittest.TestCase):
@@ -141,14 +392,13 @@ class TestRing(unittest.TestCase):
                     console_alarm.ring(out_of_range_values[value_index])
 
     def test_ring_with_correct_values(self):
+        clock = VirtualClock()
         console_redirect: io.StringIO = get_console_redirect()
-        start_time: float = time.time()
-        console_alarm.ring(1)
-        duration: float = time.time() - start_time
+        with mock.patch.object(audio.default_engine(), 'clock', clock):
+            console_alarm.ring(1)
         clean_console_redirect()
         self.assertTrue("Wake up!!! <3" in console_redirect.getvalue())
-        self.assertGreaterEqual(duration, 1)
-        self.assertLessEqual(duration, 1.5)
+        self.assertEqual(clock.sleeps, [1])
 
 
 class TestConsoleScriptEntryPoint(unittest.TestCase):
@@ -218,30 +468,60 @@ class TestConsoleScriptEntryPoint(unittest.TestCase):
                 with self.assertRaises(TypeError):
                     console_alarm.console_script_entry_point(["", "10", "10"], some_parameters[parameter_index])
 
-    @unittest.skipIf(short_test, "Skipped long tests.")
     def test_with_correct_parameter_one_second_index(self):
+        clock = local_clock(14, 9, 42)
+        start_time: float = clock.time()
         console_redirect: io.StringIO = get_console_redirect()
-        start_time: float = time.time()
-        console_alarm.console_script_entry_point(["", "1"])
-        duration: float = time.time() - start_time
+        with mock.patch.object(audio.default_engine(), 'clock', clock):
+            console_alarm.console_script_entry_point(["", "1"], clock=clock)
         clean_console_redirect()
         self.assertTrue("Wake up!!! <3" in console_redirect.getvalue())
-        self.assertLessEqual(duration, 66)
-        self.assertGreaterEqual(duration, 60)
+        self.assertEqual(clock.time(), start_time + 60 + 5)
+
+    def test_with_stats_flag(self):
+        clock = local_clock(14, 9, 42)
+        fire_stats.clear()
+        console_redirect: io.StringIO = get_console_redirect()
+        console_alarm.console_script_entry_point(["", "--stats", "1"], clock=clock, sink=RingSink(clock))
+        clean_console_redirect()
+        self.assertIn("Alarms: 1 fired, 0 missed", console_redirect.getvalue())
+        self.assertIn("Lateness: p50 0.000 ms", console_redirect.getvalue())
+
+    def test_with_missed_policy(self):
+        arguments = [(["--missed", "ring"], 1), (["--grace", "10"], 0), (["--missed", "grace", "--grace", "70"], 1),
+                     ([], 0)]
+        for argument_index in range(len(arguments)):
+            with self.subTest(argument_index=argument_index):
+                clock = local_clock(14, 0)
+                clock.suspend_at(590, 3600)
+                sink = RingSink(clock)
+                get_console_redirect()
+                console_alarm.console_script_entry_point([""] + arguments[argument_index][0] + ["14", "10"],
+                                                         clock=clock, sink=sink)
+                clean_console_redirect()
+                self.assertEqual(len(sink.rings), arguments[argument_index][1])
+
+    def test_with_wrong_missed_policy(self):
+        wrong_arguments = [["--missed", "later"], ["--grace", "soon"]]
+        for argument_index in range(len(wrong_arguments)):
+            with self.subTest(argument_index=argument_index):
+                error = io.StringIO()
+                sink = RingSink(local_clock(14, 0))
+                with mock.patch.object(sys, 'stderr', error):
+                    console_alarm.console_script_entry_point([""] + wrong_arguments[argument_index] + ["14", "10"],
+                                                             sink=sink)
+                self.assertNotEqual(error.getvalue(), "")
+                self.assertEqual(sink.rings, [])
 
-    @unittest.skipIf(short_test, "Skipped long tests.")
     def test_with_correct_parameter_one_third_index(self):
+        clock = local_clock(14, 9, 42)
+        sink = RingSink(clock)
         console_redirect: io.StringIO = get_console_redirect()
-        start_time: float = time.time()
-        alarm_time = time.localtime(start_time+60)
-        console_alarm.console_script_entry_point(["", "{}".format(alarm_time.tm_hour), "{}".format(alarm_time.tm_min)])
-        duration: float = time.time() - start_time
+        console_alarm.console_script_entry_point(["", "14", "10"], clock=clock, sink=sink)
         clean_console_redirect()
-        self.assertTrue("Wake up!!! <3" in console_redirect.getvalue())
-        self.assertLessEqual(duration, 66)
-        self.assertGreaterEqual(duration, 1)
-        self.assertLessEqual(time.localtime().tm_sec, 6)
-        self.assertGreaterEqual(time.localtime().tm_sec, 0)
+        self.assertIn('{"event":"tick","remaining":18}', console_redirect.getvalue())
+        self.assertEqual(len(sink.rings), 1)
+        self.assertEqual(clock.localtime(sink.rings[0][0])[3:6], (14, 10, 0))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,127 @@
+import unittest
+import asyncio
+import time
+import sys
+import os
+import io
+from unittest import mock
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+from console_alarm import async_alarm
+from console_alarm.countdown import SilentCountdown
+from console_alarm.stats import FireStats
+
+
+def get_console_redirect() -> io.StringIO:
+    console_redirect = io.StringIO()
+    sys.stdout = console_redirect
+    return console_redirect
+
+
+def clean_console_redirect():
+    sys.stdout = sys.__stdout__
+
+
+class TestAsyncAlarm(unittest.IsolatedAsyncioTestCase):
+
+    def tearDown(self):
+        clean_console_redirect()
+
+    async def test_async_start_alarm_clock_with_wrong_values(self):
+        with self.assertRaises(ValueError):
+            await async_alarm.async_start_alarm_clock(24, 0)
+        with self.assertRaises(TypeError):
+            await async_alarm.async_start_alarm_clock(1, "1")
+        with self.assertRaises(ValueError):
+            await async_alarm.async_start_pomodoro(0)
+        with self.assertRaises(ValueError):
+            await async_alarm.async_ring(61)
+
+    async def test_async_wait_until_fires_on_time(self):
+        get_console_redirect()
+        alarm_time = time.time() + 0.05
+        lateness = await async_alarm._async_wait_until(alarm_time)
+        self.assertGreaterEqual(time.time(), alarm_time - 0.01)
+        self.assertLess(lateness, 0.01)
+
+    async def test_async_ring_is_cancellable(self):
+        get_console_redirect()
+        start_time = time.monotonic()
+        task = asyncio.create_task(async_alarm.async_ring(5))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertLess(time.monotonic() - start_time, 1)
+
+    async def test_cancel_while_the_sound_starts(self):
+        pattern = mock.Mock()
+
+        def slow_start_ring(seconds, countdown):
+            time.sleep(0.1)
+            return pattern
+
+        with mock.patch.object(async_alarm.console_alarm, '_start_ring', slow_start_ring):
+            task = asyncio.create_task(async_alarm.async_ring(5))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            pattern.stop.assert_not_called()
+            await asyncio.sleep(0.2)
+        pattern.stop.assert_called_once_with()
+
+    async def test_countdown_is_passed_through(self):
+        countdown = SilentCountdown()
+        with mock.patch.object(async_alarm, '_async_wait_until', return_value=0.0) as wait_until, \
+                mock.patch.object(async_alarm, 'async_ring') as ring, \
+                mock.patch.object(async_alarm, 'fire_stats', FireStats()), \
+                mock.patch.object(sys, 'stdout', io.StringIO()) as printed:
+            self.assertEqual(await async_alarm.async_start_pomodoro(1, countdown=countdown), 0.0)
+        self.assertIs(wait_until.call_args.args[1], countdown)
+        self.assertIs(ring.call_args.kwargs['countdown'], countdown)
+        self.assertEqual(printed.getvalue(), "")
+
+
+class TestAsyncAlarmLoad(unittest.TestCase):
+
+    def test_many_concurrent_alarms_do_not_starve_the_loop(self):
+        max_lag = 0.0
+
+        async def heartbeat():
+            nonlocal max_lag
+            loop = asyncio.get_running_loop()
+            while True:
+                before = loop.time()
+                await asyncio.sleep(0.01)
+                max_lag = max(max_lag, loop.time() - before - 0.01)
+
+        async def many_alarms() -> list:
+            # Starting the 10000 tasks takes a while, then the alarms go off
+            # over 100 ms, like the alarms of many users.
+            start_time = time.time() + 0.3
+            countdown = SilentCountdown()
+            alarms = [asyncio.create_task(async_alarm._async_wait_until(start_time + index / 100000, countdown))
+                      for index in range(10000)]
+
+            # Watch the loop once all the alarms wait on their timers.
+            await asyncio.sleep(0)
+            beats = asyncio.create_task(heartbeat())
+            latenesses = await asyncio.gather(*alarms)
+            beats.cancel()
+            return latenesses
+
+        latenesses = asyncio.run(many_alarms())
+
+        self.assertEqual(len(latenesses), 10000)
+        self.assertTrue(all(lateness is not None for lateness in latenesses))
+        # Every timer fires within 50 ms and the loop never stalls longer.
+        self.assertLess(max(latenesses), 0.05)
+        self.assertLess(max_lag, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
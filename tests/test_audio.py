@@ -0,0 +1,104 @@
+import unittest
+import threading
+import time
+import sys
+import os
+from unittest import mock
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+from console_alarm import audio
+from console_alarm import console_alarm
+from console_alarm.clock import VirtualClock
+
+
+class TestAudioEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.engine = audio.AudioEngine(clock=self.clock)
+
+    def tearDown(self):
+        self.engine.shutdown()
+
+    def test_start_initializes_only_the_mixer_once(self):
+        pygame, _ = audio._import_audio()
+        with mock.patch.object(pygame.mixer, 'init', wraps=pygame.mixer.init) as mixer_init, \
+                mock.patch.object(pygame, 'init') as pygame_init:
+            self.engine.start()
+            self.engine.start()
+            self.engine.ring(1)
+        self.assertEqual(mixer_init.call_count, 1)
+        pygame_init.assert_not_called()
+        self.assertTrue(self.engine.running)
+        self.assertEqual(pygame.mixer.get_init(), (44100, -16, 1))
+
+    def test_ring_reuses_sounds(self):
+        first = self.engine.start_ring(1)
+        self.engine.stop()
+        second = self.engine.start_ring(1)
+        self.engine.stop()
+        self.assertIs(first, second)
+        self.assertIs(self.engine.note(440), self.engine.note(440))
+
+    def test_ring_duration(self):
+        self.engine.ring(1)
+        self.engine.ring(3)
+        self.assertEqual(self.clock.sleeps, [1, 3])
+
+    def test_ring_stops_early(self):
+        engine = audio.AudioEngine()
+        threading.Timer(0.05, engine.stop).start()
+        start_time = time.monotonic()
+        engine.ring(5)
+        self.assertLess(time.monotonic() - start_time, 0.5)
+
+    def test_shutdown_and_restart(self):
+        self.engine.start()
+        self.engine.shutdown()
+        self.assertFalse(self.engine.running)
+        self.engine.ring(1)
+        self.assertTrue(self.engine.running)
+
+    def test_ring_with_wrong_values(self):
+        with self.assertRaises(ValueError):
+            self.engine.ring(0)
+        with self.assertRaises(TypeError):
+            self.engine.ring(1.5)
+
+
+class TestWavetableEngine(unittest.TestCase):
+
+    def test_notes_are_wavetables(self):
+        from console_alarm import synthesis
+        with audio.AudioEngine(wavetable=True) as engine:
+            note = engine.note(440)
+            self.assertEqual(len(note.get_raw()), synthesis.render_wavetable(440).nbytes)
+            self.assertLess(len(note.get_raw()), 1024)
+            note.play(-1)
+            note.stop()
+
+    def test_ring_pattern_is_built_from_wavetables(self):
+        from console_alarm import synthesis
+        synthesis.clear_note_cache()
+        with mock.patch.object(audio.sound_cache, 'load_ring_pattern', return_value=None), \
+                audio.AudioEngine(8000, wavetable=True) as engine:
+            self.assertEqual(engine._ring_samples.tolist(),
+                             synthesis.render_ring_pattern(audio.NOTE_C4, audio.NOTE_G4, 8000, wavetable=True).tolist())
+        self.assertEqual(synthesis._render_note_cached.cache_info().currsize, 0)
+
+
+class TestDefaultEngine(unittest.TestCase):
+
+    def test_ring_uses_default_engine(self):
+        self.assertIs(audio.default_engine(), audio.default_engine())
+        with mock.patch.object(audio.default_engine(), 'ring') as engine_ring, \
+                mock.patch('sys.stdout'):
+            console_alarm.ring(3)
+        engine_ring.assert_called_once_with(3, on_start=None, sound=None)
+
+
+if __name__ == '__main__':
+    unittest.main()
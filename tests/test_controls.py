@@ -0,0 +1,155 @@
+import unittest
+import io
+import os
+import signal
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from unittest import mock
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+from console_alarm import audio
+from console_alarm import console_alarm
+from console_alarm import controls
+from console_alarm.clock import VirtualClock
+from console_alarm.controls import DISMISS, SNOOZE, RingControls
+from console_alarm.stats import FireStats
+
+# How fast a key or a signal has to stop the alarm, with room for slow machines.
+STOP_LATENCY = 0.2
+
+
+class KeyboardTestCase(unittest.TestCase):
+
+    def setUp(self):
+        read_fd, self.write_fd = os.pipe()
+        self.input_file = os.fdopen(read_fd, 'rb', buffering=0)
+        self.stopped = threading.Event()
+        self.controls = RingControls(self.input_file, signals=False)
+
+    def tearDown(self):
+        self.controls.close()
+        self.input_file.close()
+        os.close(self.write_fd)
+
+    def press(self, key: bytes) -> float:
+        self.controls.start(self.stopped.set)
+        pressed = time.monotonic()
+        os.write(self.write_fd, key)
+        self.assertTrue(self.stopped.wait(5))
+        return time.monotonic() - pressed
+
+    def test_any_key_dismisses(self):
+        for key in (b'\n', b' ', b'q'):
+            with self.subTest(key=key):
+                self.stopped.clear()
+                self.assertLess(self.press(key), STOP_LATENCY)
+                self.assertEqual(self.controls.action, DISMISS)
+
+    def test_s_snoozes(self):
+        self.press(b's')
+        self.assertEqual(self.controls.action, SNOOZE)
+
+    def test_close_without_key(self):
+        self.controls.start(self.stopped.set)
+        self.controls.close()
+        self.assertIsNone(self.controls.action)
+        self.assertFalse(self.stopped.is_set())
+
+    def test_closed_input_is_ignored(self):
+        self.controls.start(self.stopped.set)
+        os.close(self.write_fd)
+        self.write_fd = os.open(os.devnull, os.O_WRONLY)
+        self.assertFalse(self.stopped.wait(0.1))
+        self.assertIsNone(self.controls.action)
+
+    def test_waiting_needs_no_cpu(self):
+        self.controls.start(self.stopped.set)
+        cpu_time = time.process_time()
+        time.sleep(0.1)
+        self.assertLess(time.process_time() - cpu_time, 0.02)
+
+
+@unittest.skipUnless(controls.SIGNAL_ACTIONS, "the os has no SIGUSR1 and SIGUSR2")
+class SignalTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.stopped = threading.Event()
+        self.controls = RingControls(signals=True)
+        self.controls.input_file = None
+
+    def tearDown(self):
+        self.controls.close()
+
+    def test_signals(self):
+        for signal_number, action in ((signal.SIGUSR1, DISMISS), (signal.SIGUSR2, SNOOZE)):
+            with self.subTest(signal_number=signal_number):
+                self.stopped.clear()
+                self.controls.start(self.stopped.set)
+                sent = time.monotonic()
+                os.kill(os.getpid(), signal_number)
+                self.assertTrue(self.stopped.wait(5))
+                self.assertLess(time.monotonic() - sent, STOP_LATENCY)
+                self.assertEqual(self.controls.action, action)
+
+    def test_handlers_are_restored(self):
+        handler = signal.getsignal(signal.SIGUSR1)
+        self.controls.start(self.stopped.set)
+        self.assertIsNot(signal.getsignal(signal.SIGUSR1), handler)
+        self.controls.close()
+        self.assertIs(signal.getsignal(signal.SIGUSR1), handler)
+
+    def test_signal_stops_the_ringing_alarm(self):
+        engine = audio.AudioEngine()
+        sent = []
+
+        def on_start():
+            sent.append(time.monotonic())
+            os.kill(os.getpid(), signal.SIGUSR1)
+
+        try:
+            with mock.patch.object(audio, '_default_engine', engine), redirect_stdout(io.StringIO()):
+                action = console_alarm.ring(10, on_start=on_start, controls=self.controls)
+            self.assertEqual(action, DISMISS)
+            self.assertLess(time.monotonic() - sent[0], STOP_LATENCY)
+        finally:
+            engine.shutdown()
+
+
+class SnoozeTestCase(unittest.TestCase):
+
+    def test_snooze_sets_the_alarm_again(self):
+        clock = VirtualClock(1000)
+        rings = []
+
+        def sink(seconds: int):
+            rings.append(clock.time())
+            return SNOOZE if len(rings) == 1 else None
+
+        stats = FireStats()
+        with redirect_stdout(io.StringIO()) as output:
+            console_alarm.start_pomodoro(10, clock=clock, sink=sink, stats=stats,
+                                         controls=RingControls(snooze_minutes=3, signals=False))
+        self.assertEqual(rings, [1600, 1780])
+        self.assertEqual(len(stats), 2)
+        self.assertIn("Snoozed for 3 minutes", output.getvalue())
+
+    def test_dismiss_ends_the_alarm(self):
+        clock = VirtualClock(1000)
+        rings = []
+
+        def sink(seconds: int):
+            rings.append(clock.time())
+            return DISMISS
+
+        with redirect_stdout(io.StringIO()):
+            console_alarm.start_pomodoro(10, clock=clock, sink=sink, stats=FireStats())
+        self.assertEqual(rings, [1600])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import unittest
+import io
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+from console_alarm import console_alarm
+from console_alarm.clock import VirtualClock
+from console_alarm.controls import RingControls, SNOOZE
+from console_alarm.countdown import JsonCountdown, SilentCountdown, TerminalCountdown, countdown_for
+from console_alarm.stats import FireStats
+
+
+class FakeTerminal(io.StringIO):
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def isatty(self):
+        return True
+
+    def write(self, text):
+        self.writes.append(text)
+        return super().write(text)
+
+
+def local_clock(hour: int, minute: int, second: int = 0) -> VirtualClock:
+    return VirtualClock(time.mktime((2024, 3, 12, hour, minute, second, 0, 0, -1)))
+
+
+class TestTerminalCountdown(unittest.TestCase):
+
+    def setUp(self):
+        self.terminal = FakeTerminal()
+        self.countdown = TerminalCountdown(self.terminal)
+
+    def test_redraws_only_changed_characters(self):
+        for remaining_seconds in (130, 129, 120, 119.2, 3600):
+            self.countdown.tick(remaining_seconds)
+        self.assertEqual(self.terminal.writes, [
+            "Alarm starts in 00:02:10",
+            "\b\b09",
+            "\b0",
+            "\b\b\b\b\b\b\b1:00:00",
+        ])
+
+    def test_one_write_per_tick(self):
+        for remaining_seconds in range(3600, 0, -1):
+            self.countdown.tick(remaining_seconds)
+        self.assertEqual(len(self.terminal.writes), 3600)
+        self.assertNotIn("\n", self.terminal.getvalue())
+
+    def test_fired_ends_the_line(self):
+        self.countdown.tick(5)
+        self.countdown.fired(0)
+        self.countdown.close()
+        self.assertEqual(self.terminal.getvalue(), "Alarm starts in 00:00:05\n")
+
+    def test_missed(self):
+        self.countdown.tick(5)
+        self.countdown.missed(1000.0, 3120, True)
+        self.countdown.missed(1000.0, 3120, False)
+        self.assertEqual(self.terminal.getvalue(), "Alarm starts in 00:00:05\n"
+                                                   "Missed alarm by 3120 seconds, ringing now\n"
+                                                   "Missed alarm! 1000.0 4120.0\n")
+
+    def test_message_ends_the_line(self):
+        self.countdown.tick(5)
+        self.countdown.message("Snoozed for 3 minutes")
+        self.assertEqual(self.terminal.getvalue(), "Alarm starts in 00:00:05\nSnoozed for 3 minutes\n")
+
+    def test_wrong_refresh(self):
+        for refresh in (0, -1):
+            with self.subTest(refresh=refresh):
+                with self.assertRaises(ValueError):
+                    TerminalCountdown(refresh=refresh)
+
+    def test_refresh_sets_the_wake_ups(self):
+        clock = VirtualClock(1000)
+        countdown = TerminalCountdown(self.terminal, refresh=0.5)
+        console_alarm._wait_until(1002, clock=clock, countdown=countdown)
+        self.assertEqual(clock.sleeps, [0.5] * 4)
+        self.assertEqual(self.terminal.writes, ["Alarm starts in 00:00:02", "\b1"])
+
+
+class TestJsonCountdown(unittest.TestCase):
+
+    def test_events(self):
+        output = io.StringIO()
+        clock = local_clock(14, 0)
+        clock.suspend_at(150, 3600)
+        console_alarm.start_alarm_clock(14, 10, clock=clock, sink=lambda seconds: None, stats=FireStats(),
+                                        missed=console_alarm.MISSED_RING, countdown=JsonCountdown(output))
+        lines = output.getvalue().splitlines()
+        self.assertNotIn(" ", output.getvalue())
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'event': 'scheduled', 'alarm_time': clock.time() - 3150},
+            {'event': 'tick', 'remaining': 600},
+            {'event': 'tick', 'remaining': 540},
+            {'event': 'tick', 'remaining': 480},
+            {'event': 'missed', 'alarm_time': clock.time() - 3150, 'lateness': 3150.0, 'rung': True},
+            {'event': 'fired', 'lateness': 3150.0},
+        ])
+
+    def test_missed_alarm_is_not_fired(self):
+        output = io.StringIO()
+        clock = local_clock(14, 0)
+        clock.suspend_at(30, 3600)
+        console_alarm.start_alarm_clock(14, 10, clock=clock, sink=lambda seconds: None, stats=FireStats(),
+                                        countdown=JsonCountdown(output))
+        events = [json.loads(line)['event'] for line in output.getvalue().splitlines()]
+        self.assertEqual(events, ['scheduled', 'tick', 'missed'])
+
+    def test_messages_are_events(self):
+        output = io.StringIO()
+        clock = local_clock(14, 9, 58)
+        actions = [SNOOZE, None]
+        with mock.patch.object(sys, 'stdout', io.StringIO()) as printed:
+            console_alarm.start_alarm_clock(14, 10, clock=clock, sink=lambda seconds: actions.pop(0),
+                                            stats=FireStats(), controls=RingControls(snooze_minutes=3, signals=False),
+                                            countdown=JsonCountdown(output))
+        self.assertEqual(printed.getvalue(), "")
+        events = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertIn({'event': 'message', 'text': "Snoozed for 3 minutes"}, events)
+
+    def test_ring_messages_are_events(self):
+        output = io.StringIO()
+        with mock.patch.object(console_alarm.audio, 'default_engine') as default_engine, \
+                mock.patch.object(sys, 'stdout', io.StringIO()) as printed:
+            console_alarm.ring(1, countdown=JsonCountdown(output))
+        default_engine().ring.assert_called_once()
+        self.assertEqual(printed.getvalue(), "")
+        self.assertEqual(json.loads(output.getvalue()), {'event': 'message', 'text': "Wake up!!! <3"})
+
+
+class TestSilentCountdown(unittest.TestCase):
+
+    def test_shows_nothing(self):
+        clock = VirtualClock(1000)
+        with mock.patch.object(sys, 'stdout', io.StringIO()) as printed:
+            console_alarm._wait_until(1002, clock=clock, countdown=SilentCountdown())
+        self.assertEqual(printed.getvalue(), "")
+        self.assertEqual(clock.sleeps, [2])
+
+
+class TestCountdownFor(unittest.TestCase):
+
+    def test_picks_by_terminal(self):
+        self.assertIsInstance(countdown_for(FakeTerminal()), TerminalCountdown)
+        self.assertIsInstance(countdown_for(io.StringIO()), JsonCountdown)
+        self.assertEqual(countdown_for(FakeTerminal(), refresh=0.25).interval, 0.25)
+
+    def test_defaults_to_the_standard_output(self):
+        with mock.patch.object(sys, 'stdout', FakeTerminal()):
+            self.assertIsInstance(countdown_for(), TerminalCountdown)
+
+    def test_command_line_refresh(self):
+        clock = local_clock(14, 9, 58)
+        terminal = FakeTerminal()
+        with mock.patch.object(sys, 'stdout', terminal):
+            console_alarm.console_script_entry_point(["", "--refresh", "0.5", "14", "10"], clock=clock,
+                                                     sink=lambda seconds: None)
+        self.assertEqual(clock.sleeps, [0.5] * 4)
+
+    def test_command_line_with_wrong_refresh(self):
+        for refresh in ("0", "soon"):
+            with self.subTest(refresh=refresh):
+                error = io.StringIO()
+                with mock.patch.object(sys, 'stderr', error):
+                    console_alarm.console_script_entry_point(["", "--refresh", refresh, "14", "10"],
+                                                             sink=lambda seconds: None)
+                self.assertNotEqual(error.getvalue(), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
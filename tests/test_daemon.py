@@ -0,0 +1,171 @@
+import unittest
+import io
+import os
+import tempfile
+import threading
+import sys
+from contextlib import redirect_stdout, redirect_stderr
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+from console_alarm import console_alarm
+from console_alarm.daemon import AlarmDaemon, DaemonClient
+from console_alarm.scheduler import AlarmScheduler
+from console_alarm.stats import FireStats
+
+
+class DaemonTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, 'alarm.sock')
+        self.fired = []
+        self.fired_event = threading.Event()
+        self.scheduler = AlarmScheduler(self.on_fire, stats=FireStats())
+        self.daemon = AlarmDaemon(self.socket_path, self.scheduler)
+        # Poll often, so the shutdown in tearDown is quick.
+        self.thread = threading.Thread(target=self.daemon.serve_forever, args=(0.01,), daemon=True)
+        self.thread.start()
+        self.client = DaemonClient(self.socket_path)
+
+    def on_fire(self, handle):
+        self.fired.append(handle)
+        self.fired_event.set()
+
+    def tearDown(self):
+        self.client.close()
+        self.daemon.shutdown()
+        self.thread.join(2)
+        self.daemon.close()
+        self.directory.cleanup()
+
+
+class TestAlarmDaemon(DaemonTestCase):
+
+    def test_add_list_cancel(self):
+        first = self.client.add(600)
+        second = self.client.add_at(14, 9)
+        self.assertTrue(first['ok'])
+        self.assertTrue(second['ok'])
+        self.assertEqual(sorted(alarm['id'] for alarm in self.client.list()), sorted([first['id'], second['id']]))
+
+        self.assertEqual(self.client.cancel(first['id']), {'ok': True, 'cancelled': True})
+        self.assertEqual(self.client.cancel(first['id']), {'ok': True, 'cancelled': False})
+        self.assertEqual([alarm['id'] for alarm in self.client.list()], [second['id']])
+
+    def test_snooze_moves_the_alarm(self):
+        added = self.client.add(600)
+        snoozed = self.client.snooze(added['id'], 60)
+        self.assertTrue(snoozed['ok'])
+        self.assertAlmostEqual(snoozed['at'], added['at'] - 540, delta=1)
+        self.assertAlmostEqual(self.client.list()[0]['at'], snoozed['at'], delta=0.01)
+
+    def test_add_with_slack(self):
+        added = self.client.add(600, slack=2)
+        self.assertTrue(added['ok'])
+        self.assertEqual(self.scheduler.pending()[0].slack, 2)
+        self.assertFalse(self.client.add(600, slack=-2)['ok'])
+
+    def test_alarm_fires_in_the_daemon(self):
+        added = self.client.add(0.02)
+        self.assertTrue(self.fired_event.wait(2))
+        self.assertEqual([handle.id for handle in self.fired], [added['id']])
+
+    def test_batch_gets_one_answer_per_command(self):
+        answers = self.client.batch([{'cmd': 'add', 'in': 600}] * 100 + [{'cmd': 'list'}])
+        self.assertEqual(len(answers), 101)
+        self.assertTrue(all(answer['ok'] for answer in answers))
+        self.assertEqual(len(answers[-1]['alarms']), 100)
+        self.assertEqual(len(self.scheduler), 100)
+
+    def test_errors_are_answered(self):
+        self.assertFalse(self.client.cancel(12345)['ok'])
+        self.assertFalse(self.client.request({'cmd': 'unknown'})['ok'])
+        self.assertFalse(self.client.request({'cmd': 'add'})['ok'])
+        self.assertFalse(self.client.request({'cmd': 'add', 'in': -1})['ok'])
+        self.assertFalse(self.client.add_at(25, 0)['ok'])
+
+    def test_malformed_time_of_day_is_answered(self):
+        for at in ([14, 9, 0, "oops"], [14], [14, 9.5], [True, 9], "14:09", 14):
+            with self.subTest(at=at):
+                self.assertFalse(self.client.request({'cmd': 'add', 'at': at})['ok'])
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertTrue(self.client.request({'cmd': 'add', 'at': [14, 9, 30]})['ok'])
+
+    def test_unreasonable_seconds_are_answered(self):
+        for seconds in (1e12, float('inf'), float('nan'), True, "5"):
+            with self.subTest(seconds=seconds):
+                self.assertFalse(self.client.request({'cmd': 'add', 'in': seconds})['ok'])
+                self.assertFalse(self.client.request({'cmd': 'add', 'in': 5, 'slack': seconds})['ok'])
+        self.assertFalse(self.client.snooze(self.client.add(600)['id'], float('inf'))['ok'])
+
+        # The scheduler thread still fires alarms.
+        added = self.client.add(0.02)
+        self.assertTrue(self.fired_event.wait(2))
+        self.assertEqual([handle.id for handle in self.fired], [added['id']])
+        self.assertFalse(self.client.request([1, 2])[0]['ok'])
+
+        # The connection still works afterwards.
+        self.assertEqual(self.client.request({'cmd': 'ping'}), {'ok': True})
+
+    def test_second_daemon_on_the_same_socket_fails(self):
+        with self.assertRaises(OSError):
+            AlarmDaemon(self.socket_path, AlarmScheduler())
+
+    def test_stale_socket_is_replaced(self):
+        path = os.path.join(self.directory.name, 'stale.sock')
+        with AlarmDaemon(path, AlarmScheduler()):
+            pass
+        open(path, 'w').close()
+        with AlarmDaemon(path, AlarmScheduler()) as daemon:
+            self.assertTrue(os.path.exists(daemon.socket_path))
+        self.assertFalse(os.path.exists(path))
+
+
+class TestDaemonCommandLine(DaemonTestCase):
+
+    def run_script(self, *arguments):
+        output, errors = io.StringIO(), io.StringIO()
+        with redirect_stdout(output), redirect_stderr(errors):
+            console_alarm.console_script_entry_point(['console_alarm', *arguments, '--socket', self.socket_path])
+        return output.getvalue(), errors.getvalue()
+
+    def test_add_list_snooze_cancel(self):
+        output, _ = self.run_script('add', '25')
+        self.assertTrue(output.startswith("Alarm 1 rings at"))
+        self.run_script('add', '14', '09')
+        self.assertEqual(len(self.scheduler), 2)
+
+        output, _ = self.run_script('list')
+        self.assertEqual(len(output.splitlines()), 2)
+
+        output, _ = self.run_script('snooze', '1', '5')
+        self.assertTrue(output.startswith("Alarm 1 rings at"))
+
+        output, _ = self.run_script('cancel', '1')
+        self.assertEqual(output, "Cancelled\n")
+        self.assertEqual(len(self.scheduler), 1)
+
+        output, _ = self.run_script('cancel', '1')
+        self.assertEqual(output, "Nothing to cancel\n")
+
+        _, errors = self.run_script('cancel', '99')
+        self.assertTrue(errors.startswith("Error:"))
+
+    def test_malformed_commands_print_the_help(self):
+        output, _ = self.run_script('snooze', '1')
+        self.assertIn("Small alarm function for your console.", output)
+        output, _ = self.run_script('frobnicate')
+        self.assertIn("Small alarm function for your console.", output)
+
+    def test_missing_daemon_is_reported(self):
+        output, errors = io.StringIO(), io.StringIO()
+        with redirect_stdout(output), redirect_stderr(errors):
+            console_alarm.console_script_entry_point(
+                ['console_alarm', 'list', '--socket', os.path.join(self.directory.name, 'none.sock')])
+        self.assertIn("No console_alarm daemon is running", errors.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import tempfile
+import threading
+import time
+import sys
+import os
+
+sys.path.insert(0, "..")
+from console_alarm import journal
+from console_alarm.journal import TimerJournal
+from console_alarm.scheduler import AlarmScheduler
+from console_alarm.stats import FireStats
+
+
+class TestTimerJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "timers.journal")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replay_after_reopen(self):
+        with TimerJournal(self.path) as timer_journal:
+            timer_journal.add(1, 100.0)
+            timer_journal.add(2, 200.0)
+            timer_journal.add(3, 300.0)
+            timer_journal.move(1, 400.0)
+            timer_journal.cancel(2)
+        with TimerJournal(self.path) as timer_journal:
+            self.assertEqual(timer_journal.pending(), [(3, 300.0), (1, 400.0)])
+            self.assertEqual(timer_journal.max_id, 3)
+
+    def test_recover_splits_missed_timers(self):
+        with TimerJournal(self.path) as timer_journal:
+            timer_journal.add(1, 100.0)
+            timer_journal.add(2, 200.0)
+            upcoming, missed = timer_journal.recover(150.0)
+        self.assertEqual(upcoming, [(2, 200.0)])
+        self.assertEqual(missed, [(1, 100.0)])
+
+    def test_torn_record_is_ignored(self):
+        with TimerJournal(self.path) as timer_journal:
+            timer_journal.add(1, 100.0)
+            timer_journal.add(2, 200.0)
+        with open(self.path, 'r+b') as journal_file:
+            journal_file.truncate(os.path.getsize(self.path) - 3)
+        with TimerJournal(self.path) as timer_journal:
+            self.assertEqual(timer_journal.pending(), [(1, 100.0)])
+            timer_journal.add(3, 300.0)
+        with TimerJournal(self.path) as timer_journal:
+            self.assertEqual(timer_journal.pending(), [(1, 100.0), (3, 300.0)])
+
+    def test_not_a_journal(self):
+        with open(self.path, 'wb') as journal_file:
+            journal_file.write(b'something else')
+        with self.assertRaises(ValueError):
+            TimerJournal(self.path)
+
+    def test_compaction(self):
+        with TimerJournal(self.path) as timer_journal:
+            for timer_id in range(1, 3001):
+                timer_journal.add(timer_id, float(timer_id))
+                if timer_id > 10:
+                    timer_journal.done(timer_id)
+            self.assertLess(os.path.getsize(self.path), 2100 * journal._RECORD.size)
+            timer_journal.compact()
+            # The live timers and the biggest id.
+            self.assertEqual(os.path.getsize(self.path), len(journal.MAGIC) + 11 * journal._RECORD.size)
+            timer_journal.add(5000, 5000.0)
+        with TimerJournal(self.path) as timer_journal:
+            self.assertEqual(len(timer_journal), 11)
+
+    @unittest.skipIf(os.name != 'posix', "needs POSIX file modes")
+    def test_compaction_keeps_the_file_private(self):
+        with TimerJournal(self.path) as timer_journal:
+            timer_journal.add(1, 1.0)
+            timer_journal.compact()
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_max_id_survives_done_timers_and_compaction(self):
+        with TimerJournal(self.path) as timer_journal:
+            timer_journal.add(1, 1.0)
+            timer_journal.add(7, 7.0)
+            timer_journal.done(7)
+            self.assertEqual(timer_journal.max_id, 7)
+        with TimerJournal(self.path) as timer_journal:
+            self.assertEqual(timer_journal.max_id, 7)
+            timer_journal.done(1)
+            timer_journal.compact()
+            self.assertEqual(len(timer_journal), 0)
+        with TimerJournal(self.path) as timer_journal:
+            self.assertEqual(timer_journal.max_id, 7)
+
+
+class TestSchedulerWithJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "timers.journal")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_scheduler_restores_pending_timers(self):
+        with TimerJournal(self.path) as timer_journal:
+            scheduler = AlarmScheduler(lambda handle: None, FireStats(), timer_journal)
+            kept = scheduler.schedule(3600)
+            scheduler.cancel(scheduler.schedule(3600))
+            scheduler.snooze(scheduler.schedule(3600), 7200)
+            timer_journal.add(99, time.time() - 10)
+
+        fired = threading.Event()
+        with TimerJournal(self.path) as timer_journal:
+            scheduler = AlarmScheduler(lambda handle: fired.set(), FireStats(), timer_journal)
+            missed = scheduler.recover()
+            self.assertEqual([timer[0] for timer in missed], [99])
+            self.assertEqual([handle.id for handle in scheduler.pending()], [kept.id, 3])
+            self.assertAlmostEqual(scheduler.pending()[0].deadline, kept.deadline, delta=0.01)
+            self.assertGreater(scheduler.schedule(0.01).id, 99)
+            with scheduler:
+                self.assertTrue(fired.wait(2))
+            self.assertEqual(len(timer_journal), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
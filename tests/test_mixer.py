@@ -0,0 +1,173 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+import numpy
+from console_alarm import audio
+from console_alarm.clock import VirtualClock
+from console_alarm.mixer import SoftwareMixer
+
+
+def constant(value: int, length: int = 100) -> numpy.ndarray:
+    return numpy.full(length, value, dtype=numpy.int16)
+
+
+class TestSoftwareMixer(unittest.TestCase):
+
+    def setUp(self):
+        # No headroom, so the sums are easy to check.
+        self.mixer = SoftwareMixer(block_frames=64, max_voices=4, headroom_db=0.0)
+
+    def test_silence_without_voices(self):
+        block = self.mixer.mix()
+        self.assertEqual(block.dtype.name, 'int16')
+        self.assertEqual(len(block), 64)
+        self.assertFalse(block.any())
+
+    def test_sums_the_voices_with_their_volume(self):
+        samples = constant(1000)
+        self.mixer.add(samples)
+        self.mixer.add(samples, volume=0.5)
+        self.mixer.add(constant(-200))
+        numpy.testing.assert_allclose(self.mixer.mix(), 1300, atol=1)
+
+    def test_headroom(self):
+        mixer = SoftwareMixer(block_frames=64, headroom_db=-6.0)
+        mixer.add(constant(10000))
+        numpy.testing.assert_allclose(mixer.mix(), 10000 * 10 ** (-6 / 20), atol=1)
+
+    def test_loops_short_buffers(self):
+        samples = numpy.arange(10, dtype=numpy.int16) * 100
+        self.mixer.add(samples)
+        numpy.testing.assert_allclose(self.mixer.mix(), numpy.tile(samples, 7)[:64], atol=1)
+        numpy.testing.assert_allclose(self.mixer.mix(), numpy.tile(samples, 14)[64:128], atol=1)
+
+    def test_soft_clipping(self):
+        mixer = SoftwareMixer(block_frames=64, max_voices=48)
+        samples = numpy.linspace(-32767, 32767, 64).astype(numpy.int16)
+        for _ in range(48):
+            mixer.add(samples)
+        block = mixer.mix().astype(numpy.int32)
+        self.assertGreater(mixer.clipped_samples, 0)
+        # The peaks are bent, not wrapped around.
+        self.assertTrue(numpy.all(numpy.diff(block) >= 0))
+        self.assertLessEqual(block.max(), 32767)
+        self.assertGreaterEqual(block.min(), -32767)
+
+    def test_quiet_voices_are_not_clipped(self):
+        self.mixer.add(constant(20000))
+        self.mixer.mix()
+        self.assertEqual(self.mixer.clipped_samples, 0)
+
+    def test_voice_ends_after_its_frames(self):
+        voice = self.mixer.add(constant(1000), frames=80)
+        self.assertTrue(numpy.all(self.mixer.mix() > 0))
+        block = self.mixer.mix()
+        self.assertTrue(numpy.all(block[:16] > 0))
+        self.assertFalse(block[16:].any())
+        self.assertTrue(voice.finished.is_set())
+        self.assertEqual(len(self.mixer), 0)
+
+    def test_stop(self):
+        voice = self.mixer.add(constant(1000))
+        voice.stop()
+        voice.stop()
+        self.assertTrue(voice.finished.is_set())
+        self.assertFalse(self.mixer.mix().any())
+
+    def test_lowest_priority_is_replaced(self):
+        voices = [self.mixer.add(constant(1), priority=priority) for priority in (2, 0, 0, 1)]
+        new = self.mixer.add(constant(1), priority=1)
+        self.assertTrue(voices[1].finished.is_set())
+        self.assertFalse(any(voice.finished.is_set() for voice in voices[2:] + [voices[0], new]))
+        self.assertEqual(len(self.mixer), 4)
+        self.assertEqual(self.mixer.dropped_voices, 1)
+
+    def test_less_important_voice_is_dropped(self):
+        voices = [self.mixer.add(constant(1), priority=1) for _ in range(4)]
+        new = self.mixer.add(constant(1), priority=0)
+        self.assertTrue(new.finished.is_set())
+        self.assertFalse(any(voice.finished.is_set() for voice in voices))
+        self.assertEqual(self.mixer.dropped_voices, 1)
+
+    def test_clear(self):
+        voices = [self.mixer.add(constant(1)) for _ in range(3)]
+        self.mixer.clear()
+        self.assertTrue(all(voice.finished.is_set() for voice in voices))
+        self.assertEqual(len(self.mixer), 0)
+
+    def test_wrong_values(self):
+        for arguments in ({'block_frames': 0}, {'max_voices': 0}, {'headroom_db': 3.0}, {'knee': 1.0}):
+            with self.subTest(arguments=arguments):
+                with self.assertRaises(ValueError):
+                    SoftwareMixer(**arguments)
+        for samples, volume in ((constant(1, 0), 1.0), (numpy.zeros((2, 2), dtype=numpy.int16), 1.0),
+                                (constant(1), -0.5)):
+            with self.subTest(shape=samples.shape, volume=volume):
+                with self.assertRaises(ValueError):
+                    self.mixer.add(samples, volume=volume)
+
+
+class TestMixingEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = audio.AudioEngine(mixing=True)
+
+    def tearDown(self):
+        self.engine.shutdown()
+
+    def test_alarms_ring_at_the_same_time(self):
+        first = self.engine.start_ring(5)
+        second = self.engine.start_ring(5, volume=0.5, priority=1)
+        self.assertEqual(len(self.engine._mixer), 2)
+        self.assertEqual(second.volume, 0.5)
+
+        # Stopping one alarm leaves the other one ringing.
+        first.stop()
+        self.assertFalse(second.finished.is_set())
+        self.assertEqual(len(self.engine._mixer), 1)
+
+        # The mixed stream plays on its own channel as soon as the feeder runs.
+        deadline = time.monotonic() + 1.0
+        while not self.engine._pygame.mixer.get_busy() and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertTrue(self.engine._pygame.mixer.get_busy())
+
+        self.engine.stop()
+        self.assertTrue(second.finished.is_set())
+
+    def test_rings_from_many_threads(self):
+        self.engine.clock = VirtualClock()
+        threads = [threading.Thread(target=self.engine.ring, args=(1,)) for _ in range(24)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(len(self.engine._mixer), 0)
+
+    def test_shutdown_ends_the_voices_and_the_feeder(self):
+        voice = self.engine.start_ring(5)
+        self.engine.shutdown()
+        self.assertTrue(voice.finished.is_set())
+        self.assertIsNone(self.engine._feeder)
+
+        # The engine rings again after a shutdown.
+        self.engine.start_ring(1).stop()
+
+    def test_configure_default_engine(self):
+        try:
+            self.assertTrue(audio.configure_default_engine(mixing=True).mixing)
+        finally:
+            audio.default_engine().shutdown()
+            audio._default_engine = None
+
+
+if __name__ == '__main__':
+    unittest.main()
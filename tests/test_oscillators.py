@@ -0,0 +1,161 @@
+import unittest
+import io
+import os
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import mock
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+import numpy
+from console_alarm import audio
+from console_alarm import console_alarm
+from console_alarm import oscillators
+from console_alarm import synthesis
+from console_alarm.clock import VirtualClock
+
+
+def alias_ratio(samples: numpy.ndarray, frequency: int) -> float:
+    # One second of samples puts every whole frequency into its own bin.
+    power = numpy.abs(numpy.fft.rfft(samples)) ** 2
+    harmonics = numpy.zeros(len(power), dtype=bool)
+    harmonics[0] = True
+    harmonics[frequency::frequency] = True
+    return power[~harmonics].sum() / power.sum()
+
+
+class TestOscillators(unittest.TestCase):
+
+    def test_samples_stay_in_range(self):
+        for sample_rate in oscillators.SAMPLE_RATES:
+            for waveform in oscillators.OSCILLATORS:
+                with self.subTest(sample_rate=sample_rate, waveform=waveform):
+                    samples = oscillators.generate(waveform, oscillators.phases(1237, sample_rate, sample_rate),
+                                                   1237 / sample_rate)
+                    self.assertEqual(len(samples), sample_rate)
+                    self.assertLessEqual(numpy.abs(samples).max(), 1.0 + 1e-9)
+
+    def test_fundamental_frequency(self):
+        for sample_rate in oscillators.SAMPLE_RATES:
+            for waveform in oscillators.OSCILLATORS:
+                with self.subTest(sample_rate=sample_rate, waveform=waveform):
+                    samples = oscillators.generate(waveform, oscillators.phases(440, sample_rate, sample_rate),
+                                                   440 / sample_rate)
+                    self.assertEqual(numpy.argmax(numpy.abs(numpy.fft.rfft(samples))), 440)
+
+    def test_polyblep_reduces_aliasing(self):
+        naive = {'bandlimited_saw': lambda phase: 2 * phase - 1,
+                 'square': lambda phase: numpy.where(phase < 0.5, 1.0, -1.0)}
+        for sample_rate in oscillators.SAMPLE_RATES:
+            # A high note, so many harmonics fold back below the Nyquist frequency.
+            frequency = 1237 if sample_rate < 20000 else 3001
+            phase = oscillators.phases(frequency, sample_rate, sample_rate)
+            for waveform in naive:
+                with self.subTest(sample_rate=sample_rate, waveform=waveform):
+                    band_limited = alias_ratio(oscillators.generate(waveform, phase, frequency / sample_rate), frequency)
+                    self.assertLess(band_limited, alias_ratio(naive[waveform](phase), frequency) / 10)
+
+    def test_polyblep_only_touches_the_jump(self):
+        increment = 0.01
+        phase = numpy.linspace(0, 1, 1001, endpoint=False)
+        correction = oscillators._poly_blep(phase, increment)
+        near_jump = (phase < increment) | (phase > 1 - increment)
+        self.assertTrue(numpy.all(correction[~near_jump] == 0))
+        self.assertAlmostEqual(correction[0], -1.0)
+        self.assertLessEqual(numpy.abs(correction).max(), 1.0)
+
+    def test_phases_do_not_drift(self):
+        phase = oscillators.phases(261.626, 44100, 441000)
+        self.assertAlmostEqual(phase[-1], (441000 - 1) * 261.626 / 44100 % 1.0, places=9)
+        self.assertTrue(numpy.all((phase >= 0) & (phase < 1)))
+
+    def test_unknown_waveform(self):
+        with self.assertRaises(ValueError):
+            oscillators.generate('noise', oscillators.phases(440, 8000, 10), 440 / 8000)
+
+
+class TestWaveformSynthesis(unittest.TestCase):
+
+    def setUp(self):
+        synthesis.clear_note_cache()
+
+    def test_render_note_in_every_waveform(self):
+        for sample_rate in oscillators.SAMPLE_RATES:
+            for waveform in synthesis.WAVEFORMS:
+                with self.subTest(sample_rate=sample_rate, waveform=waveform):
+                    samples = synthesis.render_note(440, sample_rate, waveform)
+                    self.assertEqual(samples.dtype.name, 'int16')
+                    self.assertEqual(len(samples), sample_rate)
+                    self.assertLessEqual(numpy.abs(samples.astype(numpy.int32)).max(), synthesis.AMPLITUDE)
+
+    def test_ring_pattern_in_a_waveform(self):
+        pattern = synthesis.render_ring_pattern(audio.NOTE_C4, audio.NOTE_G4, 16000, 'sine')
+        self.assertEqual(len(pattern), 16000)
+        with self.assertRaises(ValueError):
+            synthesis.render_ring_pattern(audio.NOTE_C4, audio.NOTE_G4, 16000, 'noise')
+
+    def test_wavetable_loops_cleanly(self):
+        for waveform in ('sine', 'triangle'):
+            with self.subTest(waveform=waveform):
+                table = synthesis.render_wavetable(440, 8000, waveform).astype(numpy.int32)
+                looped = numpy.concatenate((table, table))
+                # No step at the loop point is bigger than a step inside the table.
+                self.assertLessEqual(abs(looped[len(table)] - looped[len(table) - 1]),
+                                     numpy.abs(numpy.diff(table)).max())
+
+
+class TestWaveformEngine(unittest.TestCase):
+
+    def tearDown(self):
+        audio.default_engine().shutdown()
+        audio._default_engine = None
+
+    def test_engine_renders_its_waveform(self):
+        engine = audio.AudioEngine(8000, waveform='square')
+        try:
+            with mock.patch.object(audio.sound_cache, 'load_note', return_value=None), \
+                    mock.patch.object(synthesis, 'render_note', wraps=synthesis.render_note) as render_note:
+                engine.note(440)
+            render_note.assert_any_call(440, 8000, 'square')
+        finally:
+            engine.shutdown()
+
+    def test_configure_default_engine(self):
+        engine = audio.configure_default_engine(16000, 'triangle')
+        self.assertIs(audio.default_engine(), engine)
+        self.assertEqual((engine.sample_rate, engine.waveform), (16000, 'triangle'))
+
+        self.assertTrue(audio.configure_default_engine(16000, 'triangle', wavetable=True).wavetable)
+
+        for arguments in ((16000, 'noise'), (0, 'sine'), (-8000, 'sine')):
+            with self.subTest(arguments=arguments):
+                with self.assertRaises(ValueError):
+                    audio.configure_default_engine(*arguments)
+
+    def test_command_line_options(self):
+        sink = mock.Mock()
+        with redirect_stdout(io.StringIO()):
+            console_alarm.console_script_entry_point(['console_alarm', '--waveform', 'sine', '--sample-rate', '8000',
+                                                      '1'], clock=VirtualClock(), sink=sink)
+        sink.assert_called_once()
+        self.assertEqual((audio.default_engine().sample_rate, audio.default_engine().waveform), (8000, 'sine'))
+
+    def test_command_line_wavetable(self):
+        with redirect_stdout(io.StringIO()):
+            console_alarm.console_script_entry_point(['console_alarm', '--wavetable', '1'], clock=VirtualClock(),
+                                                     sink=mock.Mock())
+        self.assertTrue(audio.default_engine().wavetable)
+
+    def test_command_line_with_wrong_values(self):
+        for arguments in (['--waveform', 'noise'], ['--sample-rate', 'fast'], ['--sample-rate', '0']):
+            with self.subTest(arguments=arguments):
+                error = io.StringIO()
+                with redirect_stderr(error):
+                    console_alarm.console_script_entry_point(['console_alarm'] + arguments + ['1'], sink=mock.Mock())
+                self.assertNotEqual(error.getvalue(), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
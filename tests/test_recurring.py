@@ -0,0 +1,130 @@
+import unittest
+import datetime
+import random
+import threading
+import time
+import sys
+from unittest import mock
+
+sys.path.insert(0, "..")
+from console_alarm import console_alarm
+from console_alarm import scheduler as scheduler_module
+from console_alarm.recurring import RecurringSchedule
+from console_alarm.scheduler import AlarmScheduler
+from console_alarm.stats import FireStats
+
+
+def local_time(year, month, day, hour, minute, second=0) -> time.struct_time:
+    return time.localtime(time.mktime((year, month, day, hour, minute, second, 0, 0, -1)))
+
+
+class TestRecurringSchedule(unittest.TestCase):
+
+    def test_next_time(self):
+        cases = [
+            # Friday 09:00 to Monday 09:00.
+            ('0 9 * * 1-5', (2024, 3, 15, 9, 0), (2024, 3, 18, 9, 0)),
+            ('0 9 * * mon-fri', (2024, 3, 15, 8, 59), (2024, 3, 15, 9, 0)),
+            ('*/25 9-17 * * *', (2024, 3, 12, 9, 25), (2024, 3, 12, 9, 50)),
+            ('*/25 9-17 * * *', (2024, 3, 12, 17, 50), (2024, 3, 13, 9, 0)),
+            ('30 8,12 * * *', (2024, 3, 12, 8, 30), (2024, 3, 12, 12, 30)),
+            ('0 0 1 * *', (2024, 12, 15, 0, 0), (2025, 1, 1, 0, 0)),
+            ('0 0 29 2 *', (2024, 3, 1, 0, 0), (2028, 2, 29, 0, 0)),
+            ('0 12 * jun *', (2024, 3, 12, 0, 0), (2024, 6, 1, 12, 0)),
+            # Both days restricted: the 13th or a Friday.
+            ('0 0 13 * fri', (2024, 3, 13, 0, 0), (2024, 3, 15, 0, 0)),
+            ('0 0 * * 7', (2024, 3, 12, 0, 0), (2024, 3, 17, 0, 0)),
+            ('@weekly', (2024, 3, 12, 0, 0), (2024, 3, 17, 0, 0)),
+            ('@hourly', (2024, 12, 31, 23, 0), (2025, 1, 1, 0, 0)),
+        ]
+        for expression, now, expected in cases:
+            with self.subTest(expression=expression, now=now):
+                self.assertEqual(RecurringSchedule(expression).next_time(*now), expected)
+
+    def test_matches_like_a_minute_by_minute_scan(self):
+        # The expressions with the minutes, hours and a day check written out by hand.
+        references = {
+            '*/7 */5 * * *': (range(0, 60, 7), range(0, 24, 5), lambda day: True),
+            '15 3 */10 * *': ([15], [3], lambda day: day.day in (1, 11, 21, 31)),
+            '0 0 * * 2,4': ([0], [0], lambda day: day.isoweekday() in (2, 4)),
+            '5 4 1,15 * sun': ([5], [4], lambda day: day.day in (1, 15) or day.isoweekday() == 7),
+            '45 23 28-31 * *': ([45], [23], lambda day: day.day >= 28),
+        }
+        rng = random.Random(7)
+        for expression, (minutes, hours, day_matches) in references.items():
+            schedule = RecurringSchedule(expression)
+            for _ in range(5):
+                start = datetime.datetime(2024, rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 23),
+                                          rng.randint(0, 59))
+
+                # Scan minute by minute on the clock face.
+                moment = start + datetime.timedelta(minutes=1)
+                while not (moment.minute in minutes and moment.hour in hours and day_matches(moment)):
+                    moment += datetime.timedelta(minutes=1)
+
+                with self.subTest(expression=expression, start=start):
+                    self.assertEqual(schedule.next_time(*start.timetuple()[:5]), moment.timetuple()[:5])
+
+    def test_daily_schedule_matches_calc_secs_to_time(self):
+        rng = random.Random(3)
+        for _ in range(500):
+            hour, minute = rng.randint(0, 23), rng.randint(0, 59)
+            now = local_time(2024, 3, 12, rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59))
+            with self.subTest(hour=hour, minute=minute, now=now[:6]):
+                self.assertEqual(RecurringSchedule('{} {} * * *'.format(minute, hour)).secs_until(now),
+                                 console_alarm._calc_secs_to_time(hour, minute, now=now))
+
+    def test_current_minute_is_never_returned(self):
+        self.assertEqual(RecurringSchedule('9 14 * * *').secs_until(local_time(2024, 3, 12, 14, 9, 30)), 86400 - 30)
+        self.assertEqual(RecurringSchedule('* * * * *').secs_until(local_time(2024, 3, 12, 14, 9, 30)), 30)
+
+    def test_invalid_expressions(self):
+        for expression in ['', '* * * *', '60 * * * *', '* 24 * * *', '* * 0 * *', '* * * 13 *', '* * * * 8',
+                           '5-1 * * * *', '*/0 * * * *', 'x * * * *', '0 0 30 2 *', '0 0 31 4,6 *']:
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    RecurringSchedule(expression)
+
+
+class TestScheduleRecurring(unittest.TestCase):
+
+    def test_recurring_timer_fires_until_cancelled(self):
+        fired = []
+        three_times = threading.Event()
+
+        def on_fire(handle):
+            fired.append(handle.deadline)
+            if len(fired) == 3:
+                handle.cancel()
+                three_times.set()
+
+        # Let the schedule fire every 20 ms instead of every minute.
+        with mock.patch.object(scheduler_module, '_next_fire', lambda schedule, now, clock: now + 0.02):
+            with AlarmScheduler(on_fire, stats=FireStats()) as scheduler:
+                handle = scheduler.schedule_recurring('* * * * *')
+                self.assertTrue(three_times.wait(2))
+                time.sleep(0.05)
+
+        self.assertEqual(len(fired), 3)
+        self.assertTrue(handle.cancelled)
+        self.assertFalse(handle.fired)
+        self.assertEqual(len(scheduler), 0)
+
+    def test_deadline_is_the_next_fire_time(self):
+        with AlarmScheduler(lambda handle: None, stats=FireStats()) as scheduler:
+            handle = scheduler.schedule_recurring('* * * * *')
+            seconds = handle.deadline - time.monotonic()
+            self.assertTrue(handle.pending)
+            self.assertGreater(seconds, 0)
+            self.assertLessEqual(seconds, 60)
+            self.assertAlmostEqual(round(time.time() + seconds) % 60, 0)
+            self.assertAlmostEqual(time.time() + seconds, round(time.time() + seconds), delta=0.05)
+            handle.cancel()
+
+    def test_invalid_schedule(self):
+        with self.assertRaises(ValueError):
+            AlarmScheduler().schedule_recurring('every day')
+
+
+if __name__ == '__main__':
+    unittest.main()
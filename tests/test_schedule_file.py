@@ -0,0 +1,141 @@
+import unittest
+import io
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+import sys
+from contextlib import redirect_stdout, redirect_stderr
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+from console_alarm import console_alarm
+from console_alarm import schedule_file as schedule_file_module
+from console_alarm.clock import VirtualClock
+from console_alarm.schedule_file import read_alarms, schedule_file
+from console_alarm.scheduler import AlarmScheduler
+from console_alarm.stats import FireStats
+
+
+def local_clock(hour: int, minute: int, second: int = 0) -> VirtualClock:
+    return VirtualClock(time.mktime((2024, 3, 12, hour, minute, second, 0, 0, -1)))
+
+
+class TestReadAlarms(unittest.TestCase):
+
+    def read(self, text, clock=None):
+        errors = []
+        alarms = list(read_alarms(io.StringIO(text), clock=clock or local_clock(12, 0),
+                                  on_error=lambda line, reason: errors.append(line)))
+        return alarms, errors
+
+    def test_valid_rows(self):
+        alarms, errors = self.read("25\n14,9\n 12 , 1 , 30 \n")
+        self.assertEqual(alarms, [(1, 1500), (2, 2 * 3600 + 9 * 60), (3, 90)])
+        self.assertEqual(errors, [])
+
+    def test_fraction_of_the_current_second_counts(self):
+        clock = VirtualClock(local_clock(14, 9).time() + 0.75)
+        alarms, _ = self.read("14,10\n", clock)
+        self.assertEqual(alarms, [(1, 59.25)])
+
+    def test_blank_and_comment_rows_are_skipped(self):
+        alarms, errors = self.read("# breaks\n\n,\n5\n")
+        self.assertEqual(alarms, [(4, 300)])
+        self.assertEqual(errors, [])
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        alarms, errors = self.read("0\n1440\n24,0\n12,60\n12,0,60\nabc\n-5\n1,2,3,4\n1.5\n10\n")
+        self.assertEqual(alarms, [(10, 600)])
+        self.assertEqual(errors, list(range(1, 10)))
+
+    def test_errors_go_to_stderr_by_default(self):
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            self.assertEqual(list(read_alarms(io.StringIO("5\n25,0\n"))), [(1, 300)])
+        self.assertEqual(errors.getvalue(), "Line 2: hour has to be between 0 and 23, got 25, skipped\n")
+
+    def test_memory_stays_flat(self):
+        def rows(count):
+            for index in range(count):
+                yield "{},{},{}\n".format(index % 24, index % 60, index % 60)
+
+        tracemalloc.start()
+        try:
+            for count in (1000, 4000):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                for _ in read_alarms(rows(count), clock=local_clock(12, 0)):
+                    pass
+                peak = tracemalloc.get_traced_memory()[1] - before
+                self.assertLess(peak, 64 * 1024)
+        finally:
+            tracemalloc.stop()
+
+    def test_schedule_file_uses_one_scheduler(self):
+        scheduler = AlarmScheduler(lambda handle: None, stats=FireStats())
+        self.assertEqual(schedule_file(io.StringIO("5\n10\nbad\n"), scheduler, on_error=lambda *_: None), 2)
+        self.assertEqual(len(scheduler), 2)
+
+
+class TestFromFileCommandLine(unittest.TestCase):
+
+    def test_alarms_of_the_file_ring(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schedule.csv")
+            with open(path, "w") as schedule:
+                schedule.write("14,9\nnope\n14,9,0\n")
+
+            rings = []
+            output, errors = io.StringIO(), io.StringIO()
+            with redirect_stdout(output), redirect_stderr(errors):
+                console_alarm.console_script_entry_point(['console_alarm', '--from-file', path],
+                                                         clock=local_clock(14, 8, 59), sink=rings.append)
+
+        self.assertEqual(rings, [5, 5])
+        self.assertIn("Scheduled 2 alarms", output.getvalue())
+        self.assertIn("Line 2:", errors.getvalue())
+
+    def test_failing_ring_does_not_hang(self):
+        def broken_sink(seconds):
+            raise RuntimeError("no audio device")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schedule.csv")
+            with open(path, "w") as schedule:
+                schedule.write("14,9\n")
+
+            errors = io.StringIO()
+            with redirect_stdout(io.StringIO()), redirect_stderr(errors):
+                rung = schedule_file_module.run_file(path, clock=local_clock(14, 8, 59), sink=broken_sink)
+
+        self.assertEqual(rung, 1)
+        self.assertIn("no audio device", errors.getvalue())
+
+    def test_alarms_ring_at_the_same_time(self):
+        # Both rings have to run at once to pass the barrier.
+        barrier = threading.Barrier(2, timeout=2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schedule.csv")
+            with open(path, "w") as schedule:
+                schedule.write("14,9\n14,9\n")
+
+            with redirect_stdout(io.StringIO()):
+                rung = schedule_file_module.run_file(path, clock=local_clock(14, 8, 59),
+                                                     sink=lambda seconds: barrier.wait())
+
+        self.assertEqual(rung, 2)
+        self.assertFalse(barrier.broken)
+
+    def test_missing_file_is_reported(self):
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            console_alarm.console_script_entry_point(['console_alarm', '--from-file', '/nonexistent/schedule.csv'])
+        self.assertIn("Can't read /nonexistent/schedule.csv", errors.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+import unittest
+import threading
+import time
+import sys
+from unittest import mock
+
+sys.path.insert(0, "..")
+from console_alarm.clock import VirtualClock
+from console_alarm.scheduler import AlarmScheduler
+from console_alarm.stats import FireStats
+
+
+class FiredTimers:
+
+    def __init__(self, expected: int, clock=time):
+        self.handles = []
+        self.times = []
+        self.expected = expected
+        self.clock = clock
+        self.done = threading.Event()
+
+    def __call__(self, handle):
+        self.handles.append(handle)
+        self.times.append(self.clock.monotonic())
+        if len(self.handles) >= self.expected:
+            self.done.set()
+
+
+class TestAlarmScheduler(unittest.TestCase):
+
+    def test_timers_fire_in_deadline_order(self):
+        fired = FiredTimers(3)
+        with AlarmScheduler(fired) as scheduler:
+            late = scheduler.schedule(0.09)
+            early = scheduler.schedule(0.03)
+            middle = scheduler.schedule(0.06)
+            self.assertTrue(fired.done.wait(2))
+        self.assertEqual(fired.handles, [early, middle, late])
+        for handle, fire_time in zip(fired.handles, fired.times):
+            with self.subTest(handle=handle):
+                self.assertTrue(handle.fired)
+                self.assertGreaterEqual(fire_time, handle.deadline)
+                self.assertLess(fire_time - handle.deadline, 0.05)
+
+    def test_cancel(self):
+        fired = FiredTimers(1)
+        with AlarmScheduler(fired) as scheduler:
+            cancelled = scheduler.schedule(0.02)
+            kept = scheduler.schedule(0.05)
+            self.assertTrue(scheduler.cancel(cancelled))
+            self.assertFalse(cancelled.cancel())
+            self.assertEqual(len(scheduler), 1)
+            self.assertTrue(fired.done.wait(2))
+        self.assertEqual(fired.handles, [kept])
+        self.assertFalse(cancelled.fired)
+
+    def test_snooze_pending_and_fired_timer(self):
+        fired = FiredTimers(2)
+        with AlarmScheduler(fired) as scheduler:
+            first = scheduler.schedule(10)
+            first.snooze(0.02)
+            self.assertEqual(len(scheduler), 1)
+            time.sleep(0.1)
+            first.snooze(0.02)
+            self.assertTrue(fired.done.wait(2))
+        self.assertEqual(fired.handles, [first, first])
+
+    def test_snooze_cancelled_timer(self):
+        scheduler = AlarmScheduler(lambda handle: None)
+        handle = scheduler.schedule(10)
+        handle.cancel()
+        with self.assertRaises(ValueError):
+            scheduler.snooze(handle, 1)
+
+    def test_schedule_with_wrong_values(self):
+        scheduler = AlarmScheduler(lambda handle: None)
+        with self.assertRaises(ValueError):
+            scheduler.schedule(-1)
+        wrong_types = ["a", None, [], True]
+        for type_index in range(len(wrong_types)):
+            with self.subTest(type_index=type_index):
+                with self.assertRaises(TypeError):
+                    scheduler.schedule(wrong_types[type_index])
+        with self.assertRaises(ValueError):
+            scheduler.schedule_at(24, 0)
+
+    def test_schedule_with_non_finite_values(self):
+        scheduler = AlarmScheduler(lambda handle: None)
+        for seconds in (float('inf'), float('nan')):
+            with self.subTest(seconds=seconds):
+                with self.assertRaises(ValueError):
+                    scheduler.schedule(seconds)
+                with self.assertRaises(ValueError):
+                    scheduler.schedule(1, slack=seconds)
+        self.assertEqual(len(scheduler), 0)
+
+    def test_far_timer_does_not_stop_the_thread(self):
+        fired = FiredTimers(1)
+        with AlarmScheduler(fired, stats=FireStats()) as scheduler:
+            scheduler.schedule(1e12)
+            time.sleep(0.05)
+            near = scheduler.schedule(0.02)
+            self.assertTrue(fired.done.wait(2))
+        self.assertEqual(fired.handles, [near])
+
+    def test_virtual_clock_jumps_to_the_deadlines(self):
+        fired = FiredTimers(2)
+        clock = VirtualClock(1000)
+        stats = FireStats()
+        scheduler = AlarmScheduler(fired, stats=stats, clock=clock)
+        day = scheduler.schedule(86400)
+        hour = scheduler.schedule(3600)
+        with scheduler:
+            self.assertTrue(fired.done.wait(2))
+        self.assertEqual(fired.handles, [hour, day])
+        self.assertEqual(clock.sleeps, [3600, 82800])
+        self.assertEqual([record.lateness for record in stats.records()], [0, 0])
+
+    def test_slow_callback_shows_in_the_lateness_of_the_next_timer(self):
+        fired = FiredTimers(2)
+        clock = VirtualClock(1000)
+
+        def slow(handle):
+            clock.advance(0.1)
+            fired(handle)
+
+        stats = FireStats()
+        scheduler = AlarmScheduler(slow, stats=stats, clock=clock)
+        scheduler.schedule(0)
+        scheduler.schedule(0)
+        with scheduler:
+            self.assertTrue(fired.done.wait(2))
+        self.assertAlmostEqual(stats.records()[1].lateness, 0.1)
+
+    def test_default_callback_does_not_block(self):
+        fired = threading.Event()
+        with mock.patch('console_alarm.console_alarm._start_ring', side_effect=lambda seconds: fired.set()) as start:
+            with AlarmScheduler(stats=FireStats()) as scheduler:
+                scheduler.schedule(0)
+                self.assertTrue(fired.wait(2))
+        start.assert_called_once_with(5)
+
+    def test_schedule_at_counts_from_the_fraction_of_the_second(self):
+        clock = VirtualClock(time.mktime((2024, 3, 12, 14, 9, 0, 0, 0, -1)) + 0.75)
+        scheduler = AlarmScheduler(stats=FireStats(), clock=clock)
+        handle = scheduler.schedule_at(14, 10)
+        self.assertAlmostEqual(handle.deadline - clock.monotonic(), 59.25)
+
+    def test_many_timers_and_heap_rebuild(self):
+        fired = FiredTimers(1000)
+        scheduler = AlarmScheduler(fired)
+        handles = [scheduler.schedule(0.05 + index / 100000) for index in range(5000)]
+        for handle in handles[1000:]:
+            handle.cancel()
+        self.assertEqual(len(scheduler), 1000)
+        self.assertLess(len(scheduler._heap), 5000)
+        self.assertEqual(scheduler.pending(), handles[:1000])
+        with scheduler:
+            self.assertTrue(fired.done.wait(5))
+        self.assertEqual(fired.handles, handles[:1000])
+
+
+class TestTimerSlack(unittest.TestCase):
+
+    def test_close_timers_share_a_wakeup(self):
+        fired = FiredTimers(2)
+        with AlarmScheduler(fired, stats=FireStats()) as scheduler:
+            first = scheduler.schedule(0.05)
+            second = scheduler.schedule(0.1, slack=0.07)
+            self.assertTrue(fired.done.wait(2))
+        self.assertEqual(fired.handles, [first, second])
+        self.assertLess(fired.times[1], second.deadline)
+        self.assertEqual((scheduler.wakeups, scheduler.wakeups_saved), (1, 1))
+        self.assertEqual(len(scheduler), 0)
+
+    def test_distant_timers_wake_up_on_their_own(self):
+        clock = VirtualClock(1000)
+        fired = FiredTimers(2, clock)
+        with AlarmScheduler(fired, stats=FireStats(), clock=clock) as scheduler:
+            scheduler.schedule(0.02)
+            second = scheduler.schedule(0.15, slack=0.05)
+            self.assertTrue(fired.done.wait(2))
+        self.assertEqual((scheduler.wakeups, scheduler.wakeups_saved), (2, 0))
+        # Alone, a timer waits until the end of its window.
+        self.assertAlmostEqual(fired.times[1], second.deadline + second.slack)
+
+    def test_cancelled_timer_with_slack_does_not_fire(self):
+        fired = FiredTimers(1)
+        with AlarmScheduler(fired, stats=FireStats()) as scheduler:
+            first = scheduler.schedule(0.05)
+            scheduler.schedule(0.08, slack=0.05).cancel()
+            self.assertTrue(fired.done.wait(2))
+            time.sleep(0.1)
+        self.assertEqual(fired.handles, [first])
+        self.assertEqual(scheduler.wakeups_saved, 0)
+
+    def test_early_recurring_timer_moves_to_its_next_fire_time(self):
+        scheduler = AlarmScheduler(lambda handle: None, stats=FireStats())
+        recurring = scheduler.schedule_recurring('* * * * *', slack=60)
+        first_deadline = recurring.deadline
+        scheduler.schedule(0)
+        due = []
+        with scheduler._condition:
+            self.assertEqual(scheduler._pop_due(due), 0)
+        self.assertIn(recurring, [handle for handle, _ in due])
+        self.assertAlmostEqual(recurring.deadline - first_deadline, 60, delta=1)
+        self.assertEqual(len(scheduler), 1)
+
+    def test_wrong_slack(self):
+        scheduler = AlarmScheduler(lambda handle: None)
+        with self.assertRaises(ValueError):
+            scheduler.schedule(1, slack=-1)
+        with self.assertRaises(TypeError):
+            scheduler.schedule(1, slack="2")
+        with self.assertRaises(ValueError):
+            scheduler.schedule_recurring('* * * * *', slack=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import io
+import os
+import tempfile
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+import numpy
+from console_alarm import audio
+from console_alarm import console_alarm
+from console_alarm import sound_cache
+from console_alarm import synthesis
+
+
+class TestSoundCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.directory.name, 'console_alarm')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_build_and_load(self):
+        self.assertEqual(sound_cache.build((440.0, 880.0), None, (8000, 44100), root=self.root, workers=2),
+                         2 * 3 * len(synthesis.WAVEFORMS))
+
+        note = sound_cache.load_note(440.0, 44100, root=self.root)
+        self.assertIsInstance(note, numpy.memmap)
+        self.assertFalse(note.flags.writeable)
+        numpy.testing.assert_array_equal(note, synthesis.render_note(440.0, 44100))
+        numpy.testing.assert_array_equal(sound_cache.load_note(880.0, 8000, root=self.root),
+                                         synthesis.render_note(880.0, 8000))
+        numpy.testing.assert_array_equal(sound_cache.load_ring_pattern(audio.NOTE_C4, audio.NOTE_G4, 8000,
+                                                                       root=self.root),
+                                         synthesis.render_ring_pattern(audio.NOTE_C4, audio.NOTE_G4, 8000))
+        numpy.testing.assert_array_equal(sound_cache.load_ring_pattern(audio.NOTE_C4, audio.NOTE_G4, 8000, 'sine',
+                                                                       root=self.root),
+                                         synthesis.render_ring_pattern(audio.NOTE_C4, audio.NOTE_G4, 8000, 'sine'))
+
+    def test_missing_sounds(self):
+        self.assertIsNone(sound_cache.load_note(440.0, 44100, root=self.root))
+        sound_cache.build((440.0,), ('sawtooth',), (8000,), root=self.root, workers=1)
+        self.assertIsNone(sound_cache.load_note(440.0, 44100, root=self.root))
+        self.assertIsNone(sound_cache.load_note(441.0, 8000, root=self.root))
+        self.assertIsNone(sound_cache.load_note(440.0, 8000, 'square', root=self.root))
+
+    def test_broken_files_are_ignored(self):
+        sound_cache.build((440.0,), None, (8000,), root=self.root, workers=1)
+        path = os.path.join(sound_cache.cache_directory(self.root), sound_cache._note_file_name(440.0, 'sawtooth', 8000))
+
+        with open(path, 'wb') as sound_file:
+            sound_file.write(b'garbage')
+        self.assertIsNone(sound_cache.load_note(440.0, 8000, root=self.root))
+
+        numpy.save(path, numpy.zeros(100, dtype=numpy.float32))
+        self.assertIsNone(sound_cache.load_note(440.0, 8000, root=self.root))
+
+    def test_format_version_invalidates_the_cache(self):
+        old_directory = os.path.join(self.root, 'v0')
+        os.makedirs(old_directory)
+        with mock.patch.object(sound_cache, 'FORMAT_VERSION', sound_cache.FORMAT_VERSION + 100):
+            sound_cache.build((440.0,), None, (8000,), root=self.root, workers=1)
+            self.assertIsNotNone(sound_cache.load_note(440.0, 8000, root=self.root))
+        self.assertFalse(os.path.exists(old_directory))
+        self.assertIsNone(sound_cache.load_note(440.0, 8000, root=self.root))
+
+        sound_cache.build((440.0,), None, (8000,), root=self.root, workers=1)
+        self.assertEqual(os.listdir(self.root), ['v{}'.format(sound_cache.FORMAT_VERSION)])
+
+    def test_engine_maps_the_cache(self):
+        with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.directory.name}):
+            sound_cache.build((440.0,), workers=1)
+            engine = audio.AudioEngine()
+            try:
+                with mock.patch.object(synthesis, 'render_ring_pattern') as render_ring_pattern, \
+                        mock.patch.object(synthesis, 'render_note') as render_note:
+                    engine.start()
+                    engine.note(440.0)
+                render_ring_pattern.assert_not_called()
+                render_note.assert_not_called()
+            finally:
+                engine.shutdown()
+
+    def test_command_line(self):
+        output = io.StringIO()
+        with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.directory.name}), redirect_stdout(output):
+            console_alarm.console_script_entry_point(['console_alarm', '--build-sound-cache'])
+        self.assertEqual(output.getvalue(), "Rendered {} sounds into {}\n".format(
+            (len(sound_cache.BANK_FREQUENCIES) + 1) * len(synthesis.WAVEFORMS), sound_cache.cache_directory(self.root)))
+        self.assertIsNotNone(sound_cache.load_note(sound_cache.BANK_FREQUENCIES[0], synthesis.SAMPLE_RATE,
+                                                   root=self.root))
+
+    def test_import_does_not_load_the_process_pool(self):
+        loaded = subprocess.run(
+            [sys.executable, "-c", "import sys; import console_alarm.sound_cache; print('concurrent.futures' in sys.modules)"],
+            cwd=str(Path(__file__).resolve().parent.parent), capture_output=True, text=True, check=True).stdout
+        self.assertEqual(loaded.strip(), "False")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+
+sys.path.insert(0, "..")
+from console_alarm.stats import FireRecord, FireStats
+
+
+def stats_with_latenesses(latenesses: list) -> FireStats:
+    stats = FireStats()
+    for index, lateness in enumerate(latenesses):
+        stats.record(FireRecord(index, index + lateness, lateness, lateness + 0.01))
+    return stats
+
+
+class TestFireStats(unittest.TestCase):
+
+    def test_percentiles(self):
+        stats = stats_with_latenesses([index / 1000 for index in range(1, 101)])
+        self.assertEqual(stats.percentile(50), 0.05)
+        self.assertEqual(stats.percentile(99), 0.099)
+        self.assertEqual(stats.percentile(100), 0.1)
+        self.assertAlmostEqual(stats.percentile(50, 'audio_latency'), 0.06)
+
+    def test_empty_stats(self):
+        stats = FireStats()
+        self.assertIsNone(stats.percentile(50))
+        self.assertEqual(stats.summary()['fired'], 0)
+        self.assertEqual(stats.format(), "Alarms: 0 fired, 0 missed")
+
+    def test_histogram(self):
+        stats = stats_with_latenesses([0.00005, 0.0003, 0.003, 0.003, 2])
+        histogram = dict(stats.histogram())
+        self.assertEqual(histogram[0.1], 1)
+        self.assertEqual(histogram[0.5], 1)
+        self.assertEqual(histogram[5], 2)
+        self.assertEqual(histogram[float('inf')], 1)
+        self.assertEqual(sum(histogram.values()), 5)
+
+    def test_missed_records(self):
+        stats = stats_with_latenesses([0.001])
+        stats.record(FireRecord(10, None, None))
+        summary = stats.summary()
+        self.assertEqual((summary['fired'], summary['missed']), (1, 1))
+        self.assertEqual(stats.values(), [0.001])
+
+    def test_records_are_bounded(self):
+        stats = FireStats(10)
+        for index in range(100):
+            stats.record(FireRecord(index, index, 0))
+        self.assertEqual(len(stats), 10)
+        self.assertEqual(stats.records()[0].scheduled, 90)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import sys
+
+sys.path.insert(0, "..")
+from console_alarm import synthesis
+
+
+def legacy_sawtooth(frequency: float) -> list:
+    frames = 44100/frequency
+    return [int(16384 * (x % frames) / frames - 8192) for x in range(0, 44100)]
+
+
+class TestRenderNote(unittest.TestCase):
+
+    def setUp(self):
+        synthesis.clear_note_cache()
+
+    def test_render_note_matches_legacy_sawtooth(self):
+        frequencies = [261.626, 391.995, 440, 1]
+        for frequency_index in range(len(frequencies)):
+            with self.subTest(frequency_index=frequency_index):
+                samples = synthesis.render_note(frequencies[frequency_index])
+                self.assertEqual(samples.dtype.name, 'int16')
+                self.assertEqual(samples.tolist(), legacy_sawtooth(frequencies[frequency_index]))
+
+    def test_render_note_duration_and_sample_rate(self):
+        self.assertEqual(len(synthesis.render_note(440, 8000, 'sawtooth', 0.5)), 4000)
+
+    def test_render_note_is_cached_and_read_only(self):
+        first = synthesis.render_note(440)
+        second = synthesis.render_note(440.0, 44100, 'sawtooth', 1.0)
+        self.assertIs(first, second)
+        with self.assertRaises(ValueError):
+            first[0] = 1
+
+    def test_render_note_with_wrong_values(self):
+        wrong_arguments = [(0,), (-1,), (440, 0), (440, 44100, 'noise'), (440, 44100, 'sawtooth', 0)]
+        for argument_index in range(len(wrong_arguments)):
+            with self.subTest(argument_index=argument_index):
+                with self.assertRaises(ValueError):
+                    synthesis.render_note(*wrong_arguments[argument_index])
+
+    def test_cache_is_bounded(self):
+        for frequency in range(1, synthesis.NOTE_CACHE_SIZE + 10):
+            synthesis.render_note(frequency, 8000, 'sawtooth', 0.01)
+        self.assertEqual(synthesis._render_note_cached.cache_info().currsize, synthesis.NOTE_CACHE_SIZE)
+
+
+class TestRenderRingPattern(unittest.TestCase):
+
+    def test_ring_pattern_layout(self):
+        pattern = synthesis.render_ring_pattern(261.626, 391.995)
+        high = synthesis.render_note(391.995)
+        low = synthesis.render_note(261.626)
+        self.assertEqual(len(pattern), 44100)
+        self.assertEqual(pattern[:1102].tolist(), high[:1102].tolist())
+        self.assertEqual(pattern[1102:2205].tolist(), low[:1103].tolist())
+        self.assertFalse(pattern[22050:].any())
+
+    def test_ring_pattern_from_wavetables(self):
+        import numpy
+        synthesis.clear_note_cache()
+        pattern = synthesis.render_ring_pattern(261.626, 391.995, wavetable=True)
+        # No second-long notes were rendered for it.
+        self.assertEqual(synthesis._render_note_cached.cache_info().currsize, 0)
+        self.assertEqual(len(pattern), 44100)
+        self.assertEqual(pattern[:1102].tolist(), numpy.resize(synthesis.render_wavetable(391.995), 1102).tolist())
+        self.assertEqual(pattern[1102:2205].tolist(), numpy.resize(synthesis.render_wavetable(261.626), 1103).tolist())
+        self.assertFalse(pattern[22050:].any())
+        self.assertIsNot(pattern, synthesis.render_ring_pattern(261.626, 391.995))
+
+    def test_ring_pattern_with_wrong_values(self):
+        wrong_arguments = [(0, 1), (1, 0), (1, 1, 0)]
+        for argument_index in range(len(wrong_arguments)):
+            with self.subTest(argument_index=argument_index):
+                with self.assertRaises(ValueError):
+                    synthesis.render_ring_pattern(*wrong_arguments[argument_index])
+
+
+class TestRenderWavetable(unittest.TestCase):
+
+    def setUp(self):
+        synthesis.clear_note_cache()
+
+    def test_wavetable_is_small(self):
+        for frequency in (110, 261.626, 391.995, 440, 1000, 2000):
+            with self.subTest(frequency=frequency):
+                self.assertLess(synthesis.render_wavetable(frequency).nbytes, 1024)
+
+    def test_looped_wavetable_keeps_the_frequency(self):
+        import numpy
+        for frequency in (261.626, 391.995, 440, 1000):
+            with self.subTest(frequency=frequency):
+                table = synthesis.render_wavetable(frequency)
+
+                # Loop the table for ten seconds and count the periods by the
+                # drops of the sawtooth, including the ones at the loop points.
+                looped = numpy.tile(table, 10 * 44100 // len(table) + 1)[:10 * 44100]
+                periods = numpy.count_nonzero(numpy.diff(looped.astype(numpy.int32)) < -8192)
+                measured = periods / 10
+                self.assertLess(abs(1200 * numpy.log2(measured / frequency)), 2)
+
+                # The exact pitch of the loop.
+                table_periods, samples = synthesis.wavetable_size(frequency)
+                self.assertEqual(samples, len(table))
+                exact = table_periods * 44100 / samples
+                self.assertLessEqual(abs(1200 * numpy.log2(exact / frequency)), synthesis.WAVETABLE_TOLERANCE_CENTS)
+
+    def test_loop_point_is_phase_clean(self):
+        import numpy
+        table = synthesis.render_wavetable(440).astype(numpy.int32)
+        steps = numpy.diff(numpy.concatenate((table, table[:1])))
+        rising = steps[steps > 0]
+
+        # Across the loop point the wave rises or drops like anywhere else.
+        self.assertLessEqual(rising.max() - rising.min(), 2)
+        self.assertEqual(numpy.count_nonzero(steps < 0), synthesis.wavetable_size(440)[0])
+
+    def test_wavetable_with_wrong_values(self):
+        for arguments in ((0,), (-1,), (440, 0), (440, 44100, 'noise')):
+            with self.subTest(arguments=arguments):
+                with self.assertRaises(ValueError):
+                    synthesis.render_wavetable(*arguments)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import io
+import json
+import os
+import sys
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+from console_alarm import audio
+from console_alarm import console_alarm
+from console_alarm import tracing
+from console_alarm.clock import VirtualClock
+from console_alarm.countdown import JsonCountdown
+from console_alarm.stats import FireStats, fire_stats
+
+
+def span_names(events: list) -> list:
+    return [(event.phase, event.name) for event in events]
+
+
+class TracingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        tracing.add_handler(self.events.append)
+
+    def tearDown(self):
+        tracing.remove_handler(self.events.append)
+
+
+class TestSpans(TracingTestCase):
+
+    def test_begin_and_end(self):
+        with tracing.span('synthesis', frequency=440):
+            pass
+        begin, end = self.events
+        self.assertEqual((begin.phase, begin.name, begin.args), (tracing.BEGIN, 'synthesis', {'frequency': 440}))
+        self.assertEqual((end.phase, end.name, end.args), (tracing.END, 'synthesis', {}))
+        self.assertLessEqual(begin.timestamp, end.timestamp)
+        self.assertEqual(begin.thread_id, end.thread_id)
+
+    def test_end_on_error(self):
+        with self.assertRaises(KeyError):
+            with tracing.span('ring'):
+                raise KeyError
+        self.assertEqual(span_names(self.events), [('B', 'ring'), ('E', 'ring')])
+
+    def test_removed_handler_gets_the_end(self):
+        with tracing.span('wait'):
+            tracing.remove_handler(self.events.append)
+        self.assertEqual(span_names(self.events), [('B', 'wait'), ('E', 'wait')])
+
+    def test_disabled(self):
+        tracing.remove_handler(self.events.append)
+        self.assertIs(tracing.span('wait'), tracing.span('ring', seconds=5))
+        with tracing.span('wait'):
+            pass
+        self.assertEqual(self.events, [])
+
+
+class TestInstrumentation(TracingTestCase):
+
+    def test_wait(self):
+        console_alarm.start_pomodoro(1, clock=VirtualClock(1000), sink=lambda seconds: None, stats=FireStats(),
+                                     countdown=JsonCountdown(io.StringIO()))
+        self.assertEqual(span_names(self.events), [('B', 'wait'), ('E', 'wait')])
+        self.assertEqual(self.events[0].args, {'alarm_time': 1060, 'missed': console_alarm.MISSED_DROP})
+
+    def test_engine(self):
+        engine = audio.AudioEngine(8000, clock=VirtualClock())
+        try:
+            with redirect_stdout(io.StringIO()):
+                engine.ring(1)
+                engine.note(440)
+        finally:
+            engine.shutdown()
+        self.assertEqual(span_names(self.events), [
+            ('B', 'ring'),
+            ('B', 'mixer_init'), ('E', 'mixer_init'),
+            ('B', 'synthesis'), ('E', 'synthesis'),
+            ('E', 'ring'),
+            ('B', 'synthesis'), ('E', 'synthesis'),
+        ])
+        self.assertEqual(self.events[-2].args['frequency'], 440)
+
+
+class TestChromeTraceExporter(unittest.TestCase):
+
+    def test_trace(self):
+        with tracing.ChromeTraceExporter() as exporter:
+            with tracing.span('ring', seconds=5):
+                pass
+        with tracing.span('ring'):
+            pass
+
+        output = io.StringIO()
+        exporter.write(output)
+        events = json.loads(output.getvalue())['traceEvents']
+        self.assertEqual([event['ph'] for event in events], ['M', 'B', 'E'])
+        self.assertEqual(events[0]['args']['name'], 'MainThread')
+        self.assertEqual(events[1]['args'], {'seconds': 5})
+        self.assertEqual({event['tid'] for event in events}, {events[0]['tid']})
+        self.assertEqual({event['pid'] for event in events}, {os.getpid()})
+        self.assertGreaterEqual(events[2]['ts'], events[1]['ts'])
+
+    def test_command_line(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'alarm.json')
+            with redirect_stdout(io.StringIO()):
+                console_alarm.console_script_entry_point(["", "1", "--trace", path], clock=VirtualClock(),
+                                                         sink=lambda seconds: None)
+            with open(path) as file:
+                events = json.load(file)['traceEvents']
+        self.assertIn('wait', [event['name'] for event in events])
+
+    def test_command_line_with_stats(self):
+        fire_stats.clear()
+        with tempfile.TemporaryDirectory() as directory:
+            output = io.StringIO()
+            with redirect_stdout(output):
+                console_alarm.console_script_entry_point(["", "--stats", "--trace", os.path.join(directory, 'a.json'),
+                                                          "1"], clock=VirtualClock(), sink=lambda seconds: None)
+        self.assertIn("Alarms: 1 fired, 0 missed", output.getvalue())
+
+    def test_command_line_with_unwritable_file(self):
+        error = io.StringIO()
+        with redirect_stdout(io.StringIO()), redirect_stderr(error):
+            console_alarm.console_script_entry_point(["", "1", "--trace", "/nonexistent/alarm.json"],
+                                                     clock=VirtualClock(), sink=lambda seconds: None)
+        self.assertIn("Can't write the trace", error.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
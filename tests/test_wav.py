@@ -0,0 +1,189 @@
+import unittest
+import io
+import os
+import tempfile
+import tracemalloc
+import wave
+import sys
+from contextlib import redirect_stderr
+from unittest import mock
+
+# The tests don't need a real sound device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, "..")
+import numpy
+from console_alarm import audio
+from console_alarm.clock import VirtualClock
+from console_alarm.wav import WavStream
+
+
+def write_wav(path, samples, sample_rate, sample_width=2):
+    """ Writes int16 range float samples, shaped (frames, channels), into a WAV file. """
+
+    samples = numpy.asarray(samples, dtype=numpy.float64)
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    if sample_width == 1:
+        data = (samples / 256 + 128).astype(numpy.uint8).tobytes()
+    elif sample_width == 2:
+        data = samples.astype('<i2').tobytes()
+    elif sample_width == 3:
+        data = (samples.astype('<i4') * 256).view(numpy.uint8).reshape(-1, 4)[:, :3].tobytes()
+    else:
+        data = (samples.astype('<i4') * 65536).tobytes()
+
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(samples.shape[1])
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(data)
+
+
+def sine(frequency, seconds, sample_rate):
+    return 10000 * numpy.sin(2 * numpy.pi * frequency * numpy.arange(round(seconds * sample_rate)) / sample_rate)
+
+
+class WavTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+
+class TestWavStream(WavTestCase):
+
+    def test_sample_widths(self):
+        samples = sine(440, 0.1, 44100)
+        for sample_width in (1, 2, 3, 4):
+            with self.subTest(sample_width=sample_width):
+                write_wav(self.path('tone.wav'), samples, 44100, sample_width)
+                with WavStream(self.path('tone.wav'), 44100, 1000) as stream:
+                    streamed = numpy.concatenate(list(stream.chunks()))
+                self.assertEqual(streamed.dtype, numpy.int16)
+                self.assertEqual(len(streamed), len(samples))
+                numpy.testing.assert_allclose(streamed, samples, atol=300 if sample_width == 1 else 2)
+
+    def test_stereo_is_mixed_down(self):
+        left = sine(440, 0.1, 8000)
+        write_wav(self.path('stereo.wav'), numpy.stack((left, -left / 2), axis=1), 8000)
+        with WavStream(self.path('stereo.wav'), 8000) as stream:
+            numpy.testing.assert_allclose(numpy.concatenate(list(stream.chunks())), left / 4, atol=1)
+
+    def test_resampling_across_chunks(self):
+        write_wav(self.path('tone.wav'), sine(440, 1, 22050), 22050)
+        expected = sine(440, 1, 44100)
+        with WavStream(self.path('tone.wav'), 44100, 999) as stream:
+            streamed = numpy.concatenate(list(stream.chunks()))
+
+        # Every sample of the file but the last gets two output samples.
+        self.assertEqual(len(streamed), 2 * 22050 - 1)
+        numpy.testing.assert_allclose(streamed, expected[:len(streamed)], atol=10000 * (2 * numpy.pi * 440 / 22050) ** 2)
+
+        write_wav(self.path('tone.wav'), sine(440, 1, 48000), 48000)
+        with WavStream(self.path('tone.wav'), 44100, 1000) as stream:
+            streamed = numpy.concatenate(list(stream.chunks()))
+        self.assertAlmostEqual(len(streamed), 44100, delta=1)
+        numpy.testing.assert_allclose(streamed, expected[:len(streamed)], atol=30)
+
+    def test_loop_starts_over(self):
+        write_wav(self.path('short.wav'), numpy.arange(100) * 100, 8000)
+        with WavStream(self.path('short.wav'), 8000, 64) as stream:
+            chunks = stream.chunks(True)
+            lengths = [len(next(chunks)) for _ in range(6)]
+        self.assertEqual(lengths, [64, 36] * 3)
+
+    def test_memory_does_not_grow_with_the_file(self):
+        peaks = []
+        for seconds in (2, 60):
+            write_wav(self.path('long.wav'), numpy.zeros((seconds * 22050, 2)), 22050)
+            tracemalloc.start()
+            try:
+                with WavStream(self.path('long.wav'), 44100) as stream:
+                    for _ in stream.chunks():
+                        pass
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        self.assertLess(peaks[1], peaks[0] * 1.5)
+        self.assertLess(peaks[1], 2 * 1024 * 1024)
+
+    def test_invalid_files(self):
+        with open(self.path('noise.wav'), 'wb') as noise:
+            noise.write(b'not a wav file at all')
+        write_wav(self.path('empty.wav'), numpy.zeros((0, 1)), 8000)
+
+        with self.assertRaises(wave.Error):
+            WavStream(self.path('noise.wav'), 44100)
+        with self.assertRaises(ValueError):
+            WavStream(self.path('empty.wav'), 44100)
+        with self.assertRaises(OSError):
+            WavStream(self.path('missing.wav'), 44100)
+
+
+class TestRingWithSound(WavTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = VirtualClock()
+        self.engine = audio.AudioEngine(clock=self.clock)
+
+    def tearDown(self):
+        self.engine.shutdown()
+        super().tearDown()
+
+    def test_file_is_streamed_for_the_ring_duration(self):
+        write_wav(self.path('alarm.wav'), sine(440, 0.5, 44100), 44100)
+        started = []
+        self.engine.ring(3, on_start=lambda: started.append(self.clock.monotonic()), sound=self.path('alarm.wav'))
+        self.assertEqual(started, [0.0])
+        self.assertAlmostEqual(sum(self.clock.sleeps), 3)
+        self.assertLessEqual(max(self.clock.sleeps), 8192 / 44100 / 4)
+
+    def test_chunks_are_queued_while_playing(self):
+        write_wav(self.path('alarm.wav'), sine(440, 0.3, 44100), 44100)
+        self.engine.start()
+        # A channel that has always played its queued chunk when asked.
+        channel = mock.Mock()
+        channel.get_queue.return_value = None
+        with mock.patch.object(self.engine._pygame.mixer, 'find_channel', return_value=channel), \
+                mock.patch.object(self.engine._pygame.sndarray, 'make_sound',
+                                  wraps=self.engine._pygame.sndarray.make_sound) as make_sound:
+            self.engine.ring(1, sound=self.path('alarm.wav'))
+
+        # One second needs at least five chunks of 8192 samples.
+        self.assertGreaterEqual(make_sound.call_count, 5)
+        self.assertEqual(channel.queue.call_count, make_sound.call_count - 1)
+        self.assertAlmostEqual(sum(self.clock.sleeps), 1)
+
+    def test_fallback_to_the_built_in_tones(self):
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            self.engine.ring(2, sound=self.path('missing.wav'))
+        self.assertIn("ringing the built-in tones", errors.getvalue())
+        self.assertEqual(self.clock.sleeps, [2])
+
+    def test_truncated_file_falls_back_to_the_built_in_tones(self):
+        # The header claims a second of samples, but the data is cut off.
+        write_wav(self.path('alarm.wav'), sine(440, 1, 44100), 44100)
+        with open(self.path('alarm.wav'), 'r+b') as wav_file:
+            wav_file.truncate(44)
+
+        with self.assertRaises(EOFError):
+            with WavStream(self.path('alarm.wav'), 44100) as stream:
+                next(stream.chunks(True))
+
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            self.engine.ring(2, sound=self.path('alarm.wav'))
+        self.assertIn("has no samples", errors.getvalue())
+        self.assertEqual(self.clock.sleeps, [2])
+
+
+if __name__ == '__main__':
+    unittest.main()